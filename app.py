@@ -1,40 +1,1624 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
 from flask_socketio import SocketIO, emit
 import os
 import uuid
+import atexit
+import csv
 import datetime
+import hashlib
+import io
+import heapq
+import itertools
 import json
+import queue
+import random
 import re
-from typing import Dict, List, Optional
-from langchain.memory import ConversationBufferMemory
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import HumanMessage, SystemMessage
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional
+# LangChain, the Gemini client and NumPy (for similarity.py) are imported where they are first used, so a
+# worker can start serving before paying for them; see create_model, CompiledPrompt.render and get_answer_index
+from dotenv import load_dotenv
+
+load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'excel-mock-interviewer-2025'
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Broker shared by all worker processes (e.g. redis://host:6379/0) so an emit reaches a client on any of them
+SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+# Threading mode lets the LLM worker pool emit back to clients from plain OS threads
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=os.getenv('SOCKETIO_ASYNC_MODE', 'threading'),
+                    message_queue=SOCKETIO_MESSAGE_QUEUE or None)
 
-# Initialize the ChatGoogleGenerativeAI model
-from dotenv import load_dotenv
-load_dotenv()
-api_key = os.getenv('GOOGLE_API_KEY')
-model = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=api_key)
+# Bounded pool for blocking LLM calls so a slow Gemini round-trip doesn't stall other candidates
+LLM_MAX_WORKERS = int(os.getenv('LLM_MAX_WORKERS', '8'))
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix='llm-worker')
+# Separate pool for the final-report fan-out; submitting back into llm_executor could deadlock when it is full
+report_executor = ThreadPoolExecutor(max_workers=2 * LLM_MAX_WORKERS, thread_name_prefix='report-worker')
+REPORT_LLM_TIMEOUT = float(os.getenv('REPORT_LLM_TIMEOUT', '30'))
+# Socket requests that need the model: at most ADMISSION_MAX_ACTIVE run at once and up to ADMISSION_QUEUE_MAX
+# wait their turn; beyond that they are served from fallback questions and evaluations instead
+ADMISSION_MAX_ACTIVE = int(os.getenv('ADMISSION_MAX_ACTIVE', str(LLM_MAX_WORKERS)))
+ADMISSION_QUEUE_MAX = int(os.getenv('ADMISSION_QUEUE_MAX', str(4 * LLM_MAX_WORKERS)))
+# Draft the report's feedback and recommendations in the background after the second-to-last answer,
+# so a narrative covering all but the last answer stands in while the final one is written
+REPORT_DRAFTS = os.getenv('REPORT_DRAFTS', 'true').lower() == 'true'
+
+# Adaptive interviews swap upcoming questions for harder/easier ones generated speculatively
+ADAPTIVE_INTERVIEWS = os.getenv('ADAPTIVE_INTERVIEWS', 'false').lower() == 'true'
+prefetch_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix='prefetch-worker')
+
+# Stream evaluation feedback to the candidate as the model writes it
+STREAM_EVALUATION = os.getenv('STREAM_EVALUATION', 'true').lower() == 'true'
+
+# Pre-generated question sets per skill level (size 0 disables the bank)
+QUESTION_BANK_SIZE = int(os.getenv('QUESTION_BANK_SIZE', '3'))
+QUESTION_BANK_TTL = float(os.getenv('QUESTION_BANK_TTL', '3600'))
+SKILL_LEVELS = ('beginner', 'intermediate', 'advanced')
+
+# USD per 1K tokens, used for the cost counters on /metrics (defaults are gemini-1.5-flash list prices)
+LLM_INPUT_COST_PER_1K = float(os.getenv('LLM_INPUT_COST_PER_1K', '0.000075'))
+LLM_OUTPUT_COST_PER_1K = float(os.getenv('LLM_OUTPUT_COST_PER_1K', '0.0003'))
+
+# Longest free-text field embedded in report prompts, in characters
+PROMPT_FIELD_MAX_CHARS = int(os.getenv('PROMPT_FIELD_MAX_CHARS', '160'))
+
+# Print per-call token counts (input, cached input, output) and latency to stdout
+LLM_LOG_CALLS = os.getenv('LLM_LOG_CALLS', 'false').lower() == 'true'
+
+# Answers and evaluation text at least this long are kept zlib-compressed in retained sessions
+TEXT_PACK_MIN_CHARS = int(os.getenv('TEXT_PACK_MIN_CHARS', '200'))
+
+# Where interview state lives: "memory" (per process), "sqlite" (shared by workers on one host)
+# or "redis" (shared across hosts)
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'memory')
+SESSION_DB_PATH = os.getenv('SESSION_DB_PATH', 'sessions.db')
+SESSION_REDIS_URL = os.getenv('SESSION_REDIS_URL', SOCKETIO_MESSAGE_QUEUE or 'redis://localhost:6379/0')
+SESSION_MAX = int(os.getenv('SESSION_MAX', '10000'))
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', '3600'))
+
+# Score obvious non-answers locally instead of spending an LLM call on them
+PRESCORE_ENABLED = os.getenv('PRESCORE_ENABLED', 'true').lower() == 'true'
+
+# Evaluations of identical answers are reused instead of re-asking the model (size 0 disables)
+EVAL_CACHE_SIZE = int(os.getenv('EVAL_CACHE_SIZE', '5000'))
+EVAL_CACHE_PATH = os.getenv('EVAL_CACHE_PATH', '')  # SQLite file; empty keeps the cache in memory only
+EVAL_CACHE_DISK_MAX = int(os.getenv('EVAL_CACHE_DISK_MAX', '100000'))  # rows kept in EVAL_CACHE_PATH
+
+# Answers at least this similar (0-1, TF-IDF cosine over character n-grams) to earlier graded answers to the
+# same question reuse their evaluations instead of calling the model. Off (0) unless set, since wording that
+# is close can still be a different answer
+SIMILAR_ANSWER_THRESHOLD = float(os.getenv('SIMILAR_ANSWER_THRESHOLD', '0'))
+SIMILAR_ANSWER_NEIGHBOURS = int(os.getenv('SIMILAR_ANSWER_NEIGHBOURS', '3'))
+SIMILAR_ANSWER_MAX_PER_QUESTION = int(os.getenv('SIMILAR_ANSWER_MAX_PER_QUESTION', '200'))
+
+# Completed reports are appended here for the /transcripts and /analytics queries (empty disables)
+TRANSCRIPT_DB_PATH = os.getenv('TRANSCRIPT_DB_PATH', 'transcripts.db')
+TRANSCRIPT_BATCH_SIZE = int(os.getenv('TRANSCRIPT_BATCH_SIZE', '50'))
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv('TRANSCRIPT_FLUSH_INTERVAL', '2'))
+
+# Client-side limits in front of the provider (rate 0 disables the token bucket)
+LLM_RATE_PER_SEC = float(os.getenv('LLM_RATE_PER_SEC', '0'))
+LLM_BURST = int(os.getenv('LLM_BURST', '10'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '0.5'))
+
+# "gemini" for the real model, "fake" for the local stub in fake_llm.py (offline runs and benchmarks)
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+
+# Model tiers; each call type is routed to one of these in CALL_ROUTES
+MODEL_TIERS = {
+    'fast': os.getenv('LLM_MODEL_FAST', 'gemini-1.5-flash-8b'),
+    'standard': os.getenv('LLM_MODEL_STANDARD', 'gemini-1.5-flash'),
+    'strong': os.getenv('LLM_MODEL_STRONG', 'gemini-1.5-pro')
+}
+
+# call type -> (tier, temperature, max output tokens)
+CALL_ROUTES = {
+    'evaluate': ('fast', 0.2, 768),
+    'evaluate_escalated': ('strong', 0.2, 1024),
+    'evaluate_batch': ('fast', 0.2, 4096),
+    'repair': ('fast', 0.0, 4096),
+    'generate': ('standard', 0.8, 1536),
+    'follow_up': ('standard', 0.7, 512),
+    'feedback': ('strong', 0.5, 512),
+    'recommend': ('standard', 0.4, 512)
+}
+
+# Evaluations whose self-reported confidence is below this are re-scored on the strong tier (0 disables)
+LLM_ESCALATE_BELOW = float(os.getenv('LLM_ESCALATE_BELOW', '6'))
+
+_fake_model = None
+
+def create_model(model_name: str, temperature: float, max_output_tokens: int):
+    """Build the chat model for the configured backend"""
+    global _fake_model
+    if LLM_BACKEND == 'fake':
+        # One shared stub keeps its seeded sequence repeatable across tiers
+        if _fake_model is None:
+            from fake_llm import FakeChatModel
+            _fake_model = FakeChatModel.from_env()
+        return _fake_model
+    # Initialize the ChatGoogleGenerativeAI model
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    api_key = os.getenv('GOOGLE_API_KEY')
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        google_api_key=api_key,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        # ResilientModel retries through the rate limiter; the client's own retries would bypass it
+        max_retries=0
+    )
+
+# Build the model clients on a background thread at startup instead of on the first call
+LLM_PRELOAD = os.getenv('LLM_PRELOAD', 'true').lower() == 'true'
+
+# Lower runs first when calls queue for the rate limiter: in-progress interviews beat new ones
+CALL_PRIORITIES = {
+    'evaluate': 0,
+    'repair': 0,
+    'feedback': 1,
+    'recommend': 1,
+    'generate': 2,
+    'evaluate_escalated': 0,
+    'follow_up': 3,
+    'evaluate_batch': 3
+}
+
+class PriorityTokenBucket:
+    """Token-bucket rate limiter that hands out tokens to the highest-priority waiter first"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int) -> float:
+        """Block until a token is granted; returns the seconds spent waiting"""
+        if self.rate <= 0:
+            return 0.0
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            while True:
+                self._refill()
+                at_head = self._waiters[0] == ticket
+                if at_head and self._tokens >= 1:
+                    heapq.heappop(self._waiters)
+                    self._tokens -= 1
+                    # Wake the next waiter so it can become head
+                    self._cond.notify_all()
+                    return time.monotonic() - started
+                # Only the head needs a timed wake-up; the rest wait to be notified
+                self._cond.wait(timeout=(1 - self._tokens) / self.rate if at_head else None)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+class ResilientModel:
+    """Wraps the chat model with rate limiting, single-flight coalescing and jittered retries
+
+    Identical prompts already in flight share one provider call instead of each
+    spending quota, which is what happens when a whole class starts at once.
+    """
+
+    def __init__(self, inner, limiter: PriorityTokenBucket, max_retries: int, base_delay: float):
+        self.inner = inner
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.retries = 0
+        self.coalesced = 0
+        self.rate_limit_wait = 0.0
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def invoke(self, messages: List, priority: int = 1, **kwargs):
+        key = self._prompt_key(messages)
+        with self._lock:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                owner = Future()
+                self._in_flight[key] = owner
+            else:
+                self.coalesced += 1
+        if shared is not None:
+            return shared.result()
+
+        try:
+            result = self._with_retries(lambda: self.inner.invoke(messages, **kwargs), priority)
+            owner.set_result(result)
+            return result
+        except Exception as e:
+            owner.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stream(self, messages: List, priority: int = 1, **kwargs):
+        # Streams aren't coalesced; a retry is only safe before the first chunk reaches the caller
+        attempt = 0
+        while True:
+            self._acquire(priority)
+            started = False
+            try:
+                for chunk in self.inner.stream(messages, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not self._should_retry(e, attempt):
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "coalesced": self.coalesced,
+                "rate_limit_wait_seconds": round(self.rate_limit_wait, 3)
+            }
+
+    def _with_retries(self, call: Callable, priority: int):
+        attempt = 0
+        while True:
+            self._acquire(priority)
+            try:
+                return call()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+
+    def _acquire(self, priority: int):
+        waited = self.limiter.acquire(priority)
+        if waited:
+            with self._lock:
+                self.rate_limit_wait += waited
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        # Bad arguments won't succeed on a second try; provider and network errors might
+        return attempt < self.max_retries and not isinstance(error, (ValueError, TypeError))
+
+    def _backoff(self, attempt: int):
+        with self._lock:
+            self.retries += 1
+        # Full jitter spreads retries from many clients that failed together
+        time.sleep(random.uniform(0, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def _prompt_key(messages: List) -> str:
+        payload = '\x1e'.join(f"{type(message).__name__}\x1f{message.content}" for message in messages)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ModelRouter:
+    """Hands each call type the client for its tier and generation settings
+
+    Clients are built on first use and share one rate limiter, since they draw
+    on the same provider quota.
+    """
+
+    def __init__(self, tiers: Dict[str, str], routes: Dict[str, tuple], limiter: PriorityTokenBucket):
+        self.tiers = tiers
+        self.routes = routes
+        self.limiter = limiter
+        self._clients: Dict[tuple, ResilientModel] = {}
+        self._lock = threading.Lock()
+
+    def for_call(self, call_type: str) -> ResilientModel:
+        tier, temperature, max_output_tokens = self.routes.get(call_type, self.routes['evaluate'])
+        key = (self.tiers[tier], temperature, max_output_tokens)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = ResilientModel(
+                    create_model(*key),
+                    self.limiter,
+                    max_retries=LLM_MAX_RETRIES,
+                    base_delay=LLM_RETRY_BASE_DELAY
+                )
+            return client
+
+    def model_name(self, call_type: str) -> str:
+        tier = self.routes.get(call_type, self.routes['evaluate'])[0]
+        return self.tiers[tier]
+
+    def preload(self):
+        """Build every route's client, importing the provider SDK and LangChain's message classes"""
+        try:
+            import langchain_core.messages  # noqa: F401
+            for call_type in self.routes:
+                self.for_call(call_type)
+        except Exception as e:
+            print(f"Error preloading model clients: {e}")
+
+    def status(self) -> str:
+        with self._lock:
+            loaded = len(self._clients)
+        routes = len({(self.tiers[tier], temperature, tokens) for tier, temperature, tokens in self.routes.values()})
+        return "ready" if loaded >= routes else "loading" if loaded else "not_loaded"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            clients = list(self._clients.values())
+        totals = {"retries": 0, "coalesced": 0, "rate_limit_wait_seconds": 0.0}
+        for client in clients:
+            for key, value in client.stats().items():
+                totals[key] += value
+        totals["rate_limit_wait_seconds"] = round(totals["rate_limit_wait_seconds"], 3)
+        return totals
+
+model_router = ModelRouter(MODEL_TIERS, CALL_ROUTES, PriorityTokenBucket(LLM_RATE_PER_SEC, LLM_BURST))
+
+def pack_text(text: str):
+    """Compress text long enough to be worth it; short text is kept as a str"""
+    if len(text) < TEXT_PACK_MIN_CHARS:
+        return text
+    return zlib.compress(text.encode('utf-8'))
+
+def unpack_text(packed) -> str:
+    return packed if isinstance(packed, str) else zlib.decompress(packed).decode('utf-8')
+
+class EvaluationRecord:
+    """One scored answer, stored compactly for as long as its session is kept
+
+    Scores are fixed slots. The free-text fields are only read again for the
+    final report, so they are packed together into one compressed blob. get()
+    and [] work as on the evaluation dict it is built from.
+    """
+    NUMBER_FIELDS = ('score', 'raw_score', 'technical_accuracy', 'communication_clarity', 'completeness',
+                     'practical_understanding', 'confidence', 'weighted_score', 'max_possible', 'difficulty')
+    TEXT_FIELDS = ('feedback', 'suggestions', 'strengths', 'areas_for_improvement')
+    __slots__ = NUMBER_FIELDS + ('topic', '_text', 'extra')
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EvaluationRecord':
+        record = cls()
+        for field in cls.NUMBER_FIELDS:
+            setattr(record, field, data.get(field))
+        # Topics repeat across every session, so share one string per topic
+        record.topic = sys.intern(str(data.get('topic', 'Unknown')))
+        # Models sometimes return strengths and the like as lists; keep them as they came
+        texts = [data.get(field) or '' for field in cls.TEXT_FIELDS]
+        record._text = pack_text(json.dumps([text if isinstance(text, list) else str(text) for text in texts],
+                                            ensure_ascii=False))
+        extra = {key: value for key, value in data.items()
+                 if key not in cls.NUMBER_FIELDS and key not in cls.TEXT_FIELDS and key != 'topic'}
+        # Anything else the model returned (e.g. the escalated flag) is rare enough to keep as a dict
+        record.extra = extra or None
+        return record
+
+    def get(self, key: str, default=None):
+        if key in self.NUMBER_FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        if key == 'topic':
+            return self.topic
+        if key in self.TEXT_FIELDS:
+            return json.loads(unpack_text(self._text))[self.TEXT_FIELDS.index(key)]
+        return (self.extra or {}).get(key, default)
+
+    def __getitem__(self, key: str):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, KeyError) is not KeyError
+
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in self.NUMBER_FIELDS if getattr(self, field) is not None}
+        data.update(zip(self.TEXT_FIELDS, json.loads(unpack_text(self._text))))
+        data['topic'] = self.topic
+        data.update(self.extra or {})
+        return data
+
+class ResponseRecord:
+    """A candidate's answer; the question text is shared with the question list, not copied"""
+    __slots__ = ('question', '_response', 'timestamp')
+
+    def __init__(self, question: str, response: str, timestamp: Optional[float] = None):
+        self.question = question
+        self._response = pack_text(response)
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def response(self) -> str:
+        return unpack_text(self._response)
+
+    def to_dict(self) -> Dict:
+        return {
+            'question': self.question,
+            'response': self.response,
+            'timestamp': datetime.datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ResponseRecord':
+        return cls(data['question'], data['response'], datetime.datetime.fromisoformat(data['timestamp']).timestamp())
+
+class RunningReport:
+    """Report totals kept up to date as each evaluation lands, so the report needs no final pass"""
+    __slots__ = ('answered', 'total_weighted_score', 'total_max_possible', 'raw_score_sum', 'topics')
+
+    def __init__(self):
+        self.answered = 0
+        self.total_weighted_score = 0.0
+        self.total_max_possible = 0
+        self.raw_score_sum = 0.0
+        # topic -> [score sum, questions]
+        self.topics: Dict[str, List] = {}
+
+    @classmethod
+    def from_scores(cls, scores: List[Dict]) -> 'RunningReport':
+        report = cls()
+        for evaluation in scores:
+            report.add(evaluation)
+        return report
+
+    def add(self, evaluation: Dict):
+        self.answered += 1
+        self.total_weighted_score += evaluation.get('weighted_score', 0)
+        self.total_max_possible += evaluation.get('max_possible', 0)
+        self.raw_score_sum += evaluation.get('raw_score', evaluation.get('score', 0))
+        totals = self.topics.setdefault(evaluation.get('topic', 'Unknown'), [0, 0])
+        totals[0] += evaluation.get('score', 0)
+        totals[1] += 1
+
+    @property
+    def percentage(self) -> float:
+        if self.total_max_possible <= 0:
+            return 0
+        # Ensure percentage cannot exceed 100%
+        return min(self.total_weighted_score / self.total_max_possible * 100, 100.0)
+
+    @property
+    def average_raw_score(self) -> float:
+        return self.raw_score_sum / self.answered if self.answered else 0
+
+    @property
+    def proficiency(self) -> str:
+        """Proficiency level based on average raw score (1-10 scale)"""
+        avg_raw_score = self.average_raw_score
+        if avg_raw_score >= 8.5:
+            return "Advanced"
+        elif avg_raw_score >= 7.0:
+            return "Intermediate"
+        elif avg_raw_score >= 5.5:
+            return "Basic"
+        return "Beginner"
+
+    def topic_breakdown(self) -> Dict:
+        """Performance by topic area"""
+        topic_analysis = {}
+        for topic, (score_sum, count) in self.topics.items():
+            avg_score = score_sum / count
+            topic_analysis[topic] = {
+                'average_score': round(avg_score, 1),
+                'questions_count': count,
+                'performance_level': 'Strong' if avg_score >= 7 else 'Moderate' if avg_score >= 5 else 'Needs Improvement'
+            }
+        return topic_analysis
+
+    def snapshot(self) -> Dict:
+        """The score part of the report for the answers so far"""
+        return {
+            "total_score": round(self.total_weighted_score, 1),
+            "max_possible_score": self.total_max_possible,
+            "percentage": round(self.percentage, 1),
+            "average_raw_score": round(self.average_raw_score, 1),
+            "proficiency_level": self.proficiency,
+            "questions_answered": self.answered,
+            "topic_breakdown": self.topic_breakdown()
+        }
 
 class InterviewState:
+    # Tens of thousands of these can be kept at once, so no per-instance __dict__
+    __slots__ = ('session_id', 'current_question', 'questions_asked', 'responses', 'scores', 'start_time',
+                 'is_active', 'candidate_name', 'skill_level', 'generated_questions', 'lock', 'adaptive',
+                 'prefetch', 'llm_timings', 'report', 'report_draft', 'final_report', 'sid')
+
     def __init__(self):
         self.session_id = str(uuid.uuid4())
         self.current_question = 0
         self.questions_asked = []
-        self.responses = []
-        self.scores = []
+        self.responses: List[ResponseRecord] = []
+        self.scores: List[EvaluationRecord] = []
         self.start_time = datetime.datetime.now()
         self.is_active = False
         self.candidate_name = ""
         self.skill_level = "beginner"  # beginner, intermediate, advanced
-        self.memory = ConversationBufferMemory(return_messages=True)
         self.generated_questions = []
+        # Serializes background work for this interview (evaluations, final report)
+        self.lock = threading.Lock()
+        self.adaptive = False
+        # (question index, direction, future) of the speculatively generated follow-up question
+        self.prefetch = None
+        # One entry per LLM call made for this interview, summarized in the final report
+        self.llm_timings = []
+        self.report = RunningReport()
+        # (answers covered, feedback future, recommendations future) of the background narrative draft
+        self.report_draft = None
+        # The finished report once its narrative has been sent; until then a resume rebuilds it
+        self.final_report = None
+        # Socket currently attached to this interview; None while the candidate is disconnected
+        self.sid = None
+
+    def to_dict(self) -> Dict:
+        """JSON-safe snapshot for session backends (locks, prefetches and the socket stay in-process)"""
+        return {
+            "session_id": self.session_id,
+            "current_question": self.current_question,
+            "questions_asked": self.questions_asked,
+            "responses": [response.to_dict() for response in self.responses],
+            "scores": [score.to_dict() for score in self.scores],
+            "start_time": self.start_time.isoformat(),
+            "is_active": self.is_active,
+            "candidate_name": self.candidate_name,
+            "skill_level": self.skill_level,
+            "generated_questions": self.generated_questions,
+            "adaptive": self.adaptive,
+            "llm_timings": self.llm_timings,
+            "final_report": self.final_report
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'InterviewState':
+        state = cls()
+        state.session_id = data["session_id"]
+        state.current_question = data["current_question"]
+        state.questions_asked = data["questions_asked"]
+        state.responses = [ResponseRecord.from_dict(response) for response in data["responses"]]
+        state.scores = [EvaluationRecord.from_dict(score) for score in data["scores"]]
+        state.start_time = datetime.datetime.fromisoformat(data["start_time"])
+        state.is_active = data["is_active"]
+        state.candidate_name = data["candidate_name"]
+        state.skill_level = data["skill_level"]
+        state.generated_questions = data["generated_questions"]
+        state.adaptive = data.get("adaptive", False)
+        state.llm_timings = data.get("llm_timings", [])
+        state.final_report = data.get("final_report")
+        state.report = RunningReport.from_scores(state.scores)
+        return state
+
+class SessionStore:
+    """In-memory interview sessions with LRU and idle-TTL eviction
+
+    Behaves like the dict it replaces. Call save() after mutating a state so
+    persistent backends see the change.
+    """
+
+    def __init__(self, max_sessions: int, idle_ttl: float):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        # session_id -> (last access, state), least recently used first
+        self._sessions: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[InterviewState]:
+        with self._lock:
+            self._evict()
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None:
+                self._sessions[session_id] = (time.monotonic(), entry[1])
+                return entry[1]
+
+        state = self._load(session_id)
+        if state is not None:
+            self._remember(session_id, state)
+        return state
+
+    def save(self, session_id: str, state: InterviewState):
+        self._remember(session_id, state)
+        self._persist(session_id, state)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        self._remove(session_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> InterviewState:
+        state = self.get(session_id)
+        if state is None:
+            raise KeyError(session_id)
+        return state
+
+    def __setitem__(self, session_id: str, state: InterviewState):
+        self.save(session_id, state)
+
+    def __delitem__(self, session_id: str):
+        self.delete(session_id)
+
+    def _remember(self, session_id: str, state: InterviewState):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (time.monotonic(), state)
+            self._evict()
+
+    def _evict(self):
+        # Entries are ordered by last access, so expired ones are always at the front
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if last_access >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    # Hooks for persistent backends; the in-memory store has nothing behind it
+    def _load(self, session_id: str) -> Optional[InterviewState]:
+        return None
+
+    def _persist(self, session_id: str, state: InterviewState):
+        pass
+
+    def _remove(self, session_id: str):
+        pass
+
+def thread_local_connection(local: threading.local, path: str) -> sqlite3.Connection:
+    """sqlite3 connections can't be shared across threads, so keep one per thread"""
+    conn = getattr(local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        local.conn = conn
+    return conn
+
+class SqliteSessionStore(SessionStore):
+    """Session store backed by SQLite so several workers can share interviews
+
+    Live states stay cached in-process, so their locks keep working; SQLite
+    holds the copy other workers and reconnects load from. Assumes sticky
+    sessions, so a worker's cached copy is the latest one.
+    """
+
+    def __init__(self, path: str, max_sessions: int, idle_ttl: float):
+        super().__init__(max_sessions, idle_ttl)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return thread_local_connection(self._local, self.path)
+
+    def _load(self, session_id: str) -> Optional[InterviewState]:
+        cutoff = time.time() - self.idle_ttl
+        row = self._connect().execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND updated_at >= ?", (session_id, cutoff)
+        ).fetchone()
+        return InterviewState.from_dict(json.loads(row[0])) if row else None
+
+    def _persist(self, session_id: str, state: InterviewState):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state.to_dict()), now)
+            )
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.idle_ttl,))
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id IN "
+                "(SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            )
+
+    def _remove(self, session_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+class RedisSessionStore(SessionStore):
+    """Session store in Redis, for workers spread over several hosts
+
+    Like SqliteSessionStore, live states stay cached in-process and sticky
+    sessions are assumed. Redis expires idle interviews itself; SESSION_MAX
+    only bounds each worker's cache, so size Redis's maxmemory for the rest.
+    """
+
+    def __init__(self, url: str, max_sessions: int, idle_ttl: float):
+        super().__init__(max_sessions, idle_ttl)
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f'interview:{session_id}'
+
+    def _load(self, session_id: str) -> Optional[InterviewState]:
+        data = self._redis.get(self._key(session_id))
+        return InterviewState.from_dict(json.loads(data)) if data else None
+
+    def _persist(self, session_id: str, state: InterviewState):
+        self._redis.set(self._key(session_id), json.dumps(state.to_dict()), ex=max(1, int(self.idle_ttl)))
+
+    def _remove(self, session_id: str):
+        self._redis.delete(self._key(session_id))
+
+interview_sessions: SessionStore
+if SESSION_BACKEND == 'sqlite':
+    interview_sessions = SqliteSessionStore(SESSION_DB_PATH, SESSION_MAX, SESSION_IDLE_TTL)
+elif SESSION_BACKEND == 'redis':
+    interview_sessions = RedisSessionStore(SESSION_REDIS_URL, SESSION_MAX, SESSION_IDLE_TTL)
+else:
+    interview_sessions = SessionStore(SESSION_MAX, SESSION_IDLE_TTL)
+
+NON_ANSWER_PHRASES = (
+    "don't know", "dont know", "do not know", "no idea", "not sure", "no clue",
+    "can't remember", "cant remember", "don't remember", "never used", "question skipped by candidate"
+)
+NON_ANSWER_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in NON_ANSWER_PHRASES) + r")\b")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'give',
+    'how', 'i', 'if', 'in', 'is', 'it', 'me', 'of', 'on', 'or', 'so', 'that', 'the', 'this', 'to',
+    'use', 'what', 'when', 'which', 'why', 'with', 'would', 'you', 'your', 'excel'
+}
+
+JSON_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+
+class EvaluationStreamParser:
+    """Incrementally pulls the feedback text and numeric scores out of a streamed evaluation JSON"""
+    SCORE_FIELDS = ('score', 'technical_accuracy', 'communication_clarity', 'completeness', 'practical_understanding')
+
+    def __init__(self, text_field: str = 'feedback'):
+        self.buffer = ''
+        self.text_field = text_field
+        self._text_pos = None  # Next unread index inside the text field's string value
+        self._text_done = False
+        self._scores = {}
+
+    def feed(self, chunk: str) -> Dict:
+        """Add a streamed chunk; returns any new feedback text and newly completed scores"""
+        self.buffer += chunk
+        update = {}
+        text = self._read_text()
+        if text:
+            update['text'] = text
+        scores = self._read_scores()
+        if scores:
+            update['scores'] = scores
+        return update
+
+    def _read_text(self) -> str:
+        if self._text_done:
+            return ''
+        if self._text_pos is None:
+            match = re.search(r'"%s"\s*:\s*"' % self.text_field, self.buffer)
+            if not match:
+                return ''
+            self._text_pos = match.end()
+
+        buffer = self.buffer
+        out = []
+        i = self._text_pos
+        while i < len(buffer):
+            ch = buffer[i]
+            if ch == '"':
+                self._text_done = True
+                break
+            if ch == '\\':
+                # Wait for the rest of an escape sequence split across chunks
+                if i + 1 >= len(buffer):
+                    break
+                escaped = buffer[i + 1]
+                if escaped == 'u':
+                    if i + 6 > len(buffer):
+                        break
+                    try:
+                        out.append(chr(int(buffer[i + 2:i + 6], 16)))
+                    except ValueError:
+                        pass
+                    i += 6
+                    continue
+                out.append(JSON_ESCAPES.get(escaped, escaped))
+                i += 2
+                continue
+            out.append(ch)
+            i += 1
+        self._text_pos = i
+        return ''.join(out)
+
+    def _read_scores(self) -> Dict:
+        new_scores = {}
+        # A number only counts once its terminator has arrived, so "8" isn't reported before "8.5"
+        for match in re.finditer(r'"(\w+)"\s*:\s*(\d+(?:\.\d+)?)\s*[,}\n]', self.buffer):
+            field = match.group(1)
+            if field in self.SCORE_FIELDS and field not in self._scores:
+                value = float(match.group(2))
+                self._scores[field] = new_scores[field] = int(value) if value.is_integer() else value
+        return new_scores
+
+NUMBER = (int, float)
+QUESTION_SCHEMA = {'question': str, 'topic': str, 'difficulty': NUMBER, 'weight': NUMBER}
+FOLLOW_UP_QUESTION_SCHEMA = {'question': str, 'topic': str, 'difficulty': NUMBER}
+EVALUATION_SCHEMA = {'score': NUMBER, 'feedback': str}
+
+class StructuredOutputError(ValueError):
+    """Model output that couldn't be turned into the expected JSON"""
+
+def find_json(text: str, expect: type = dict, schema=None):
+    """Return the first balanced JSON object or array in text that passes validate_json
+
+    Scans bracket by bracket, skipping over string contents, so prose or stray
+    brackets around the JSON don't break extraction the way a greedy regex does.
+    A fragment that parses but doesn't fit the schema, like "[1]" in "see [1]",
+    is skipped in favour of a later one.
+    """
+    opener, closer = ('{', '}') if expect is dict else ('[', ']')
+    error = StructuredOutputError(f"no valid JSON {expect.__name__} in model output")
+    start = text.find(opener)
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch in '{[':
+                depth += 1
+            elif ch in '}]':
+                depth -= 1
+                if depth == 0:
+                    if ch == closer:
+                        try:
+                            return validate_json(json.loads(text[start:i + 1]), expect, schema)
+                        except StructuredOutputError as e:
+                            error = e
+                        except ValueError:
+                            pass
+                    break
+        start = text.find(opener, start + 1)
+    # The last schema mismatch says more than "no JSON", which helps the repair prompt
+    raise error
+
+def validate_json(data, expect: type, schema=None):
+    """Check required keys and types, converting numeric strings like "7" in place"""
+    if not isinstance(data, expect):
+        raise StructuredOutputError(f"expected a JSON {expect.__name__}")
+    if schema is None:
+        return data
+    items = data if expect is list else [data]
+    for n, item in enumerate(items):
+        if isinstance(schema, type):
+            if not isinstance(item, schema):
+                raise StructuredOutputError(f"item {n} is not a {schema.__name__}")
+            continue
+        if not isinstance(item, dict):
+            raise StructuredOutputError(f"item {n} is not an object")
+        for key, types in schema.items():
+            if key not in item:
+                raise StructuredOutputError(f"missing required key '{key}'")
+            value = item[key]
+            if types is NUMBER and isinstance(value, str):
+                try:
+                    value = item[key] = float(value) if '.' in value else int(value)
+                except ValueError:
+                    pass
+            if not isinstance(value, types) or isinstance(value, bool):
+                raise StructuredOutputError(f"'{key}' has the wrong type")
+    return data
+
+class LLMMetrics:
+    """Latency, token, cost, error and fallback tracking for every model call, by call type
+
+    Calls made inside track() are also appended to that list, which is how each
+    interview collects its own timing breakdown.
+    """
+    BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+    def __init__(self, input_cost_per_1k: float, output_cost_per_1k: float):
+        self.input_cost_per_1k = input_cost_per_1k
+        self.output_cost_per_1k = output_cost_per_1k
+        self._latency: Dict[str, List] = {}  # call type -> [bucket counts..., sum, count]
+        self._first_token: Dict[str, List] = {}
+        self._tokens: Dict[tuple, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._fallbacks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def invoke(self, call_type: str, messages: List):
+        """model.invoke with timing and token accounting"""
+        started = time.perf_counter()
+        try:
+            result = model_router.for_call(call_type).invoke(messages, priority=CALL_PRIORITIES.get(call_type, 1))
+        except Exception:
+            self._record(call_type, time.perf_counter() - started, (0, 0, 0), error=True)
+            raise
+        tokens = self._usage(getattr(result, 'usage_metadata', None), messages, result.content)
+        self._record(call_type, time.perf_counter() - started, tokens)
+        return result
+
+    def stream(self, call_type: str, messages: List):
+        """model.stream with timing (including time to first token) and token accounting"""
+        started = time.perf_counter()
+        first_token_at = None
+        usage = {}
+        text = []
+        try:
+            for chunk in model_router.for_call(call_type).stream(messages, priority=CALL_PRIORITIES.get(call_type, 1)):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    self._observe(self._first_token, call_type, first_token_at - started)
+                # Streamed usage arrives as per-chunk increments, the same way LangChain adds chunks
+                for key, value in (getattr(chunk, 'usage_metadata', None) or {}).items():
+                    if isinstance(value, int):
+                        usage[key] = usage.get(key, 0) + value
+                    elif isinstance(value, dict):
+                        details = usage.setdefault(key, {})
+                        for detail, count in value.items():
+                            if isinstance(count, int):
+                                details[detail] = details.get(detail, 0) + count
+                if isinstance(chunk.content, str):
+                    text.append(chunk.content)
+                yield chunk
+        except Exception:
+            self._record(call_type, time.perf_counter() - started, (0, 0, 0), error=True)
+            raise
+        tokens = self._usage(usage, messages, ''.join(text))
+        self._record(call_type, time.perf_counter() - started, tokens)
+
+    def record_fallback(self, call_type: str):
+        with self._lock:
+            self._fallbacks[call_type] = self._fallbacks.get(call_type, 0) + 1
+
+    @contextmanager
+    def track(self, timings: Optional[List[Dict]]):
+        """Also append calls made by this thread to the given list"""
+        previous = getattr(self._local, 'timings', None)
+        self._local.timings = timings
+        try:
+            yield
+        finally:
+            self._local.timings = previous
+
+    def current_timings(self) -> Optional[List[Dict]]:
+        return getattr(self._local, 'timings', None)
+
+    def run_tracked(self, timings: Optional[List[Dict]], func: Callable, *args):
+        """Run func on another thread while still recording into the caller's timings"""
+        with self.track(timings):
+            return func(*args)
+
+    @staticmethod
+    def summarize(timings: List[Dict]) -> Dict:
+        """Per-call-type totals for an interview's report"""
+        breakdown = {}
+        for timing in timings:
+            entry = breakdown.setdefault(timing['call_type'], {
+                'calls': 0, 'errors': 0, 'total_seconds': 0.0, 'input_tokens': 0, 'cached_input_tokens': 0,
+                'output_tokens': 0
+            })
+            entry['calls'] += 1
+            entry['errors'] += int(timing['error'])
+            entry['total_seconds'] += timing['seconds']
+            entry['input_tokens'] += timing['input_tokens']
+            entry['cached_input_tokens'] += timing.get('cached_input_tokens', 0)
+            entry['output_tokens'] += timing['output_tokens']
+        for entry in breakdown.values():
+            entry['total_seconds'] = round(entry['total_seconds'], 3)
+        return breakdown
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            self._render_histogram(lines, 'llm_call_duration_seconds', 'Latency of LLM calls', self._latency)
+            self._render_histogram(lines, 'llm_time_to_first_token_seconds', 'Time to first streamed chunk', self._first_token)
+
+            lines.append('# HELP llm_tokens_total Tokens sent to and received from the model (cached_input is the part of input served from the provider\'s prefix cache)')
+            lines.append('# TYPE llm_tokens_total counter')
+            for (call_type, direction), count in sorted(self._tokens.items()):
+                lines.append(f'llm_tokens_total{{call_type="{call_type}",direction="{direction}"}} {count}')
+
+            lines.append('# HELP llm_cost_usd_total Estimated model spend')
+            lines.append('# TYPE llm_cost_usd_total counter')
+            for call_type in sorted({key[0] for key in self._tokens}):
+                # Cached input is billed at a discount that varies by provider; this counts it at full price
+                cost = (self._tokens.get((call_type, 'input'), 0) * self.input_cost_per_1k
+                        + self._tokens.get((call_type, 'output'), 0) * self.output_cost_per_1k) / 1000
+                lines.append(f'llm_cost_usd_total{{call_type="{call_type}"}} {cost:.6f}')
+
+            for name, help_text, counts in (
+                ('llm_errors_total', 'LLM calls that raised', self._errors),
+                ('llm_fallbacks_total', 'Results served by a fallback path instead of the model', self._fallbacks)
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for call_type, count in sorted(counts.items()):
+                    lines.append(f'{name}{{call_type="{call_type}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def _render_histogram(self, lines: List[str], name: str, help_text: str, histograms: Dict[str, List]):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for call_type, values in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{{call_type="{call_type}",le="{bound}"}} {cumulative}')
+            total, count = values[-2], values[-1]
+            lines.append(f'{name}_bucket{{call_type="{call_type}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{call_type="{call_type}"}} {total:.6f}')
+            lines.append(f'{name}_count{{call_type="{call_type}"}} {count}')
+
+    def _usage(self, usage: Optional[Dict], messages: List, output_text: str) -> tuple:
+        """(input, cached input, output) tokens for one call"""
+        if usage and usage.get('input_tokens') is not None:
+            cached = (usage.get('input_token_details') or {}).get('cache_read', 0)
+            return usage.get('input_tokens', 0), cached, usage.get('output_tokens', 0)
+        # Rough estimate (~4 characters per token) when the provider doesn't report usage
+        prompt_chars = sum(len(message.content) for message in messages if isinstance(message.content, str))
+        return prompt_chars // 4, 0, len(output_text) // 4
+
+    def _observe(self, histograms: Dict[str, List], call_type: str, seconds: float):
+        with self._lock:
+            values = histograms.setdefault(call_type, [0] * (len(self.BUCKETS) + 2))
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    values[i] += 1
+                    break
+            values[-2] += seconds
+            values[-1] += 1
+
+    def _record(self, call_type: str, seconds: float, tokens: tuple, error: bool = False):
+        input_tokens, cached_input_tokens, output_tokens = tokens
+        self._observe(self._latency, call_type, seconds)
+        with self._lock:
+            if error:
+                self._errors[call_type] = self._errors.get(call_type, 0) + 1
+            for direction, count in (('input', input_tokens), ('cached_input', cached_input_tokens), ('output', output_tokens)):
+                self._tokens[(call_type, direction)] = self._tokens.get((call_type, direction), 0) + count
+        if LLM_LOG_CALLS:
+            print(f"LLM {call_type}: {seconds:.2f}s, {input_tokens} input tokens ({cached_input_tokens} cached), "
+                  f"{output_tokens} output tokens{' [error]' if error else ''}")
+
+        timings = self.current_timings()
+        if timings is not None:
+            timings.append({
+                'call_type': call_type,
+                'seconds': round(seconds, 3),
+                'input_tokens': input_tokens,
+                'cached_input_tokens': cached_input_tokens,
+                'output_tokens': output_tokens,
+                'error': error
+            })
+
+llm_metrics = LLMMetrics(LLM_INPUT_COST_PER_1K, LLM_OUTPUT_COST_PER_1K)
+
+class StructuredOutputParser:
+    """Parses model replies into validated JSON, with one repair retry and per-call-site counts"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def parse(self, call_site: str, content: str, expect: type = dict, schema=None, messages: Optional[List] = None):
+        """Extract and validate JSON from a reply; raises StructuredOutputError when unusable
+
+        With the original messages, a bad reply gets one follow-up asking the model
+        to correct it, which is cheaper than throwing the whole call away.
+        """
+        try:
+            data = find_json(content, expect, schema)
+            self._record(call_site, 'success')
+            return data
+        except StructuredOutputError as e:
+            error = e
+            if messages is None:
+                self._record(call_site, 'failure')
+                raise
+
+        try:
+            from langchain_core.messages import AIMessage, HumanMessage
+            repair_messages = list(messages) + [
+                AIMessage(content=content),
+                HumanMessage(content=f"Your reply could not be used ({error}). Reply with only the corrected JSON and nothing else.")
+            ]
+            result = llm_metrics.invoke('repair', repair_messages)
+            data = find_json(result.content, expect, schema)
+            self._record(call_site, 'repaired')
+            return data
+        except Exception as e:
+            self._record(call_site, 'failure')
+            raise StructuredOutputError(f"{call_site}: {error}; repair failed: {e}") from e
 
-interview_sessions: Dict[str, InterviewState] = {}
+    def stats(self) -> Dict:
+        with self._lock:
+            report = {}
+            for call_site, counts in self._stats.items():
+                total = sum(counts.values())
+                report[call_site] = {
+                    **counts,
+                    "success_rate": round((counts['success'] + counts['repaired']) / total, 3) if total else 0.0
+                }
+            return report
+
+    def _record(self, call_site: str, outcome: str):
+        with self._lock:
+            counts = self._stats.setdefault(call_site, {'success': 0, 'repaired': 0, 'failure': 0})
+            counts[outcome] += 1
+
+structured_output = StructuredOutputParser()
+
+class EvaluationCache:
+    """LRU cache of model evaluations keyed by a hash of the normalized question and answer
+
+    Entries hold the model's 1-10 scores and text only; the weighted score is
+    recomputed on every hit because the same question can carry different weights.
+    The SQLite copy keeps the newest max_disk_entries rows, pruned every
+    PRUNE_EVERY writes, so it may briefly run that many rows over.
+    """
+    PRUNE_EVERY = 100
+
+    def __init__(self, max_entries: int, path: str = '', max_disk_entries: int = 100000):
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS evaluations (
+                        cache_key TEXT PRIMARY KEY,
+                        data TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_created_at ON evaluations (created_at)")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(question: str, topic: str, difficulty: int, response: str) -> str:
+        def normalize(text) -> str:
+            return ' '.join(str(text).lower().split()).rstrip('.!?')
+        payload = '\x1f'.join([normalize(question), normalize(topic), str(difficulty), normalize(response)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            evaluation = self._entries.get(key)
+            if evaluation is not None:
+                self._entries.move_to_end(key)
+        if evaluation is None and self.path:
+            row = self._connect().execute("SELECT data FROM evaluations WHERE cache_key = ?", (key,)).fetchone()
+            if row:
+                evaluation = json.loads(row[0])
+                self._remember(key, evaluation)
+
+        with self._lock:
+            if evaluation is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return dict(evaluation)
+
+    def put(self, key: str, evaluation: Dict):
+        if not self.enabled:
+            return
+        evaluation = dict(evaluation)
+        self._remember(key, evaluation)
+        if self.path:
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % self.PRUNE_EVERY == 0
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO evaluations (cache_key, data, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(evaluation), time.time())
+                )
+                if prune:
+                    conn.execute(
+                        "DELETE FROM evaluations WHERE cache_key IN "
+                        "(SELECT cache_key FROM evaluations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def _remember(self, key: str, evaluation: Dict):
+        with self._lock:
+            self._entries[key] = evaluation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        return thread_local_connection(self._local, self.path)
+
+evaluation_cache = EvaluationCache(EVAL_CACHE_SIZE, EVAL_CACHE_PATH, EVAL_CACHE_DISK_MAX)
+# Built by get_answer_index on first use (or by the preload thread); None until then
+answer_index = None
+answer_index_lock = threading.Lock()
+
+def get_answer_index():
+    """The near-duplicate answer index, importing similarity.py and NumPy the first time; None when disabled"""
+    global answer_index
+    if answer_index is None and SIMILAR_ANSWER_THRESHOLD > 0:
+        with answer_index_lock:
+            if answer_index is None:
+                from similarity import AnswerIndex
+                answer_index = AnswerIndex(SIMILAR_ANSWER_THRESHOLD, neighbours=SIMILAR_ANSWER_NEIGHBOURS,
+                                           max_per_question=SIMILAR_ANSWER_MAX_PER_QUESTION)
+    return answer_index
+
+class TranscriptStore:
+    """Completed interview reports in SQLite, with summaries kept up to date for analytics
+
+    append() only queues the report; a writer thread stores queued reports in
+    batches, one transaction each, and adds them to the summary tables in the
+    same transaction so aggregate queries never scan the reports. A session's
+    report is stored once; appending it again is a no-op.
+
+    The database is opened on first use rather than at import, so tools that
+    import the app create no file, and a path that can't be opened (say on a
+    read-only filesystem) disables the store instead of failing the app.
+    """
+
+    def __init__(self, path: str, batch_size: int, flush_interval: float):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._local = threading.local()
+        self._writer = None
+        # None until first use, then whether the database opened
+        self._opened: Optional[bool] = None
+        self._open_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        if self._opened is None and self.path:
+            self._open()
+        return bool(self._opened)
+
+    def _open(self):
+        with self._open_lock:
+            if self._opened is not None:
+                return
+            try:
+                self._create_schema()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Transcript store disabled, could not open {self.path}: {e}")
+                self._opened = False
+                return
+            self._writer = threading.Thread(target=self._write_loop, name='transcript-writer', daemon=True)
+            self._writer.start()
+            self._opened = True
+
+    def _create_schema(self):
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    report_id INTEGER PRIMARY KEY,
+                    session_id TEXT,
+                    candidate_name TEXT NOT NULL,
+                    skill_level TEXT NOT NULL,
+                    percentage REAL NOT NULL,
+                    average_raw_score REAL NOT NULL,
+                    proficiency_level TEXT NOT NULL,
+                    questions_answered INTEGER NOT NULL,
+                    completed_at REAL NOT NULL,
+                    completed_date TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_reports_candidate ON reports (candidate_name);
+                CREATE INDEX IF NOT EXISTS idx_reports_skill_level ON reports (skill_level, completed_date);
+                CREATE INDEX IF NOT EXISTS idx_reports_date ON reports (completed_date);
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_session ON reports (session_id);
+
+                CREATE TABLE IF NOT EXISTS report_scores (
+                    report_id INTEGER NOT NULL REFERENCES reports (report_id),
+                    question_number INTEGER NOT NULL,
+                    topic TEXT NOT NULL,
+                    difficulty INTEGER,
+                    score REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_report_scores_topic ON report_scores (topic, difficulty);
+                CREATE INDEX IF NOT EXISTS idx_report_scores_report ON report_scores (report_id);
+
+                CREATE TABLE IF NOT EXISTS topic_summary (
+                    topic TEXT NOT NULL,
+                    difficulty INTEGER NOT NULL,
+                    skill_level TEXT NOT NULL,
+                    answers INTEGER NOT NULL,
+                    score_sum REAL NOT NULL,
+                    PRIMARY KEY (topic, difficulty, skill_level)
+                );
+
+                CREATE TABLE IF NOT EXISTS daily_summary (
+                    completed_date TEXT NOT NULL,
+                    skill_level TEXT NOT NULL,
+                    reports INTEGER NOT NULL,
+                    percentage_sum REAL NOT NULL,
+                    PRIMARY KEY (completed_date, skill_level)
+                );
+            """)
+
+    def append(self, report: Dict, session_id: Optional[str] = None):
+        """Queue a completed report; returns immediately"""
+        if self.enabled and 'error' not in report:
+            self._queue.put((report, session_id, time.time()))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until everything queued so far is written"""
+        with self._open_lock:  # waits out an open in progress
+            writer = self._writer
+        if writer is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Write out what is still queued; registered to run at exit, since the writer thread is a daemon"""
+        self.flush(timeout)
+
+    def list_reports(self, candidate: str = '', skill_level: str = '', topic: str = '', since: str = '',
+                     until: str = '', limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Report headers, newest first; dates are YYYY-MM-DD and inclusive"""
+        where, params = self._where(candidate, skill_level, topic, since, until)
+        rows = self._connect().execute(f"""
+            SELECT report_id, candidate_name, skill_level, percentage, average_raw_score,
+                   proficiency_level, questions_answered, completed_at
+            FROM reports {where}
+            ORDER BY completed_at DESC LIMIT ? OFFSET ?
+        """, (*params, limit, offset)).fetchall()
+        columns = ('report_id', 'candidate_name', 'skill_level', 'percentage', 'average_raw_score',
+                   'proficiency_level', 'questions_answered', 'completed_at')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def iter_reports(self, candidate: str = '', skill_level: str = '', topic: str = '', since: str = '',
+                     until: str = '', chunk_size: int = 100) -> Iterator[Dict]:
+        """Full reports, oldest first, read a chunk at a time so exports don't load them all"""
+        where, params = self._where(candidate, skill_level, topic, since, until)
+        cursor = self._connect().execute(f"SELECT report_id, data FROM reports {where} ORDER BY report_id", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for report_id, data in rows:
+                    yield {'report_id': report_id, **json.loads(data)}
+        finally:
+            cursor.close()
+
+    def get_report(self, report_id: int) -> Optional[Dict]:
+        row = self._connect().execute("SELECT data FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_session_report(self, session_id: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            "SELECT report_id, data FROM reports WHERE session_id = ? ORDER BY report_id DESC LIMIT 1", (session_id,)
+        ).fetchone()
+        return {'report_id': row[0], **json.loads(row[1])} if row else None
+
+    def topic_averages(self, skill_level: str = '') -> List[Dict]:
+        """Average 1-10 score by topic and difficulty"""
+        if skill_level:
+            rows = self._connect().execute("""
+                SELECT topic, difficulty, answers, score_sum FROM topic_summary
+                WHERE skill_level = ? ORDER BY topic, difficulty
+            """, (skill_level,)).fetchall()
+        else:
+            rows = self._connect().execute("""
+                SELECT topic, difficulty, SUM(answers), SUM(score_sum) FROM topic_summary
+                GROUP BY topic, difficulty ORDER BY topic, difficulty
+            """).fetchall()
+        return [
+            {'topic': topic, 'difficulty': difficulty, 'answers': answers, 'average_score': round(score_sum / answers, 2)}
+            for topic, difficulty, answers, score_sum in rows
+        ]
+
+    def daily_averages(self, skill_level: str = '', since: str = '', until: str = '') -> List[Dict]:
+        """Reports per day and their average percentage"""
+        clauses, params = [], []
+        if skill_level:
+            clauses.append("skill_level = ?")
+            params.append(skill_level)
+        if since:
+            clauses.append("completed_date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("completed_date <= ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connect().execute(f"""
+            SELECT completed_date, SUM(reports), SUM(percentage_sum) FROM daily_summary {where}
+            GROUP BY completed_date ORDER BY completed_date
+        """, params).fetchall()
+        return [
+            {'date': date, 'reports': reports, 'average_percentage': round(percentage_sum / reports, 1)}
+            for date, reports, percentage_sum in rows
+        ]
+
+    @staticmethod
+    def _where(candidate: str, skill_level: str, topic: str, since: str, until: str) -> tuple:
+        clauses, params = [], []
+        if candidate:
+            clauses.append("candidate_name = ?")
+            params.append(candidate)
+        if skill_level:
+            clauses.append("skill_level = ?")
+            params.append(skill_level)
+        if topic:
+            clauses.append("report_id IN (SELECT report_id FROM report_scores WHERE topic = ?)")
+            params.append(topic)
+        if since:
+            clauses.append("completed_date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("completed_date <= ?")
+            params.append(until)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ''), params
+
+    def _write_loop(self):
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    print(f"Error writing {len(batch)} transcripts: {e}")
+            for waiter in waiters:
+                waiter.set()
+
+    def _write_batch(self, batch: List[tuple]):
+        topic_totals: Dict[tuple, List] = {}
+        daily_totals: Dict[tuple, List] = {}
+        with self._connect() as conn:
+            for report, session_id, completed_at in batch:
+                completed_date = datetime.date.fromtimestamp(completed_at).isoformat()
+                skill_level = report.get('skill_level', 'beginner')
+                # The unique session_id index turns a repeated report into a no-op (rowcount 0)
+                cursor = conn.execute("""
+                    INSERT OR IGNORE INTO reports (session_id, candidate_name, skill_level, percentage, average_raw_score,
+                                         proficiency_level, questions_answered, completed_at, completed_date, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (session_id, report.get('candidate_name', ''), skill_level, report.get('percentage', 0),
+                      report.get('average_raw_score', 0), report.get('proficiency_level', ''),
+                      report.get('questions_answered', 0), completed_at, completed_date, json.dumps(report)))
+                if cursor.rowcount == 0:
+                    continue
+                report_id = cursor.lastrowid
+                scores = report.get('detailed_scores', [])
+                conn.executemany(
+                    "INSERT INTO report_scores (report_id, question_number, topic, difficulty, score) VALUES (?, ?, ?, ?, ?)",
+                    [(report_id, n, score.get('topic', 'Unknown'), score.get('difficulty'), score.get('score', 0))
+                     for n, score in enumerate(scores, start=1)]
+                )
+                for score in scores:
+                    totals = topic_totals.setdefault((score.get('topic', 'Unknown'), score.get('difficulty') or 0, skill_level), [0, 0.0])
+                    totals[0] += 1
+                    totals[1] += score.get('score', 0)
+                totals = daily_totals.setdefault((completed_date, skill_level), [0, 0.0])
+                totals[0] += 1
+                totals[1] += report.get('percentage', 0)
+
+            conn.executemany("""
+                INSERT INTO topic_summary (topic, difficulty, skill_level, answers, score_sum) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (topic, difficulty, skill_level)
+                DO UPDATE SET answers = answers + excluded.answers, score_sum = score_sum + excluded.score_sum
+            """, [(*key, answers, score_sum) for key, (answers, score_sum) in topic_totals.items()])
+            conn.executemany("""
+                INSERT INTO daily_summary (completed_date, skill_level, reports, percentage_sum) VALUES (?, ?, ?, ?)
+                ON CONFLICT (completed_date, skill_level)
+                DO UPDATE SET reports = reports + excluded.reports, percentage_sum = percentage_sum + excluded.percentage_sum
+            """, [(*key, reports, percentage_sum) for key, (reports, percentage_sum) in daily_totals.items()])
+
+    def _connect(self) -> sqlite3.Connection:
+        return thread_local_connection(self._local, self.path)
+
+transcript_store = TranscriptStore(TRANSCRIPT_DB_PATH, TRANSCRIPT_BATCH_SIZE, TRANSCRIPT_FLUSH_INTERVAL)
+atexit.register(transcript_store.close)
+
+def compact_text(text: str) -> str:
+    """Strip indentation and blank-line runs that only cost input tokens"""
+    lines = [line.strip() for line in text.strip().splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
+
+def compact_json(data, max_chars: int = PROMPT_FIELD_MAX_CHARS) -> str:
+    """JSON for embedding in a prompt: no indentation or spaces, long strings truncated"""
+    def shorten(value):
+        if isinstance(value, str) and len(value) > max_chars:
+            return value[:max_chars - 3].rstrip() + '...'
+        if isinstance(value, dict):
+            return {key: shorten(item) for key, item in value.items() if item not in ('', None)}
+        if isinstance(value, list):
+            return [shorten(item) for item in value]
+        return value
+    return json.dumps(shorten(data), separators=(',', ':'), ensure_ascii=False)
+
+class CompiledPrompt:
+    """A prompt whose fixed instructions are assembled and compacted once
+
+    The instructions live in a system message that is the same object on every
+    call, so the request prefix is byte-identical and providers with prefix
+    caching can reuse it; only the per-call fields go in the human message.
+    """
+
+    def __init__(self, instructions: str, template: str):
+        self.instructions = compact_text(instructions)
+        self.template = compact_text(template)
+        self._system_message = None
+
+    def render(self, **fields) -> List:
+        # Message classes load LangChain, so that waits until the first prompt is needed
+        from langchain_core.messages import HumanMessage, SystemMessage
+        if self._system_message is None:
+            self._system_message = SystemMessage(content=self.instructions)
+        return [self._system_message, HumanMessage(content=self.template.format(**fields))]
 
 class ExcelInterviewAgent:
     def __init__(self):
@@ -55,50 +1639,147 @@ When evaluating responses, consider:
 
 Respond in a natural, conversational way as a human interviewer would.
         """
+        # Rubric shared by the single and batched evaluation prompts
+        self.evaluation_criteria = """1. Technical accuracy - Is the information correct?
+2. Completeness - Does it fully answer the question?
+3. Practical understanding - Do they understand real-world applications?
+4. Communication clarity - Is the explanation clear and well-structured?
+5. Depth of knowledge - Do they show understanding beyond basics?"""
+        self.evaluation_format = """{
+    "score": <number from 1-10>,
+    "technical_accuracy": <number from 1-10>,
+    "communication_clarity": <number from 1-10>,
+    "completeness": <number from 1-10>,
+    "practical_understanding": <number from 1-10>,
+    "feedback": "<constructive feedback about their response>",
+    "suggestions": "<specific suggestions for improvement>",
+    "strengths": "<what they did well in their response>",
+    "areas_for_improvement": "<specific areas that need work>",
+    "confidence": <number from 1-10, how sure you are of this score>
+}"""
+        self.scoring_guidelines = """Scoring guidelines:
+- 1-3: Poor/Incorrect response with major errors
+- 4-5: Basic understanding but significant gaps or errors
+- 6-7: Good understanding with minor gaps
+- 8-9: Very good response with comprehensive understanding
+- 10: Excellent, expert-level response
 
-    def generate_questions(self, skill_level: str, num_questions: int = 5) -> List[Dict]:
-        """Generate Excel questions based on skill level using AI"""
-        
-        question_prompt = f"""
-Generate {num_questions} Excel interview questions for {skill_level} level candidates.
+Be fair but thorough in your evaluation. Consider the difficulty level when scoring.
+Be strict with scoring - wrong answers should get low scores (1-3)."""
+        question_format = """{
+    "question": "Question text here",
+    "topic": "Main topic (e.g., VLOOKUP, Pivot Tables, etc.)",
+    "difficulty": 1-10,
+    "weight": 5-15 (higher for more important topics)
+}"""
+
+        # Built once; everything fixed goes in the shared system message
+        self.prompts = {
+            'generate': CompiledPrompt(f"""{self.system_prompt}
 
-For {skill_level} level, focus on:
+Level focus when generating questions:
 - Beginner: Basic formulas, cell formatting, simple functions (SUM, AVERAGE), basic charts
 - Intermediate: VLOOKUP, Pivot Tables, conditional formatting, intermediate functions, data validation
 - Advanced: INDEX/MATCH, advanced functions, VBA basics, complex formulas, data analysis
 
-Return the questions in this exact JSON format:
-[
-    {{
-        "question": "Question text here",
-        "topic": "Main topic (e.g., VLOOKUP, Pivot Tables, etc.)",
-        "difficulty": 1-10,
-        "weight": 5-15 (higher for more important topics)
-    }}
-]
-
-Make questions practical and scenario-based. Each question should test real Excel skills that would be used in a workplace.
-        """
+Return questions as a JSON array of objects in this exact format:
+{question_format}
+
+Make questions practical and scenario-based. Each question should test real Excel skills that would be used in a workplace.""",
+                """Generate {num_questions} Excel interview questions for {skill_level} level candidates."""),
+            'follow_up': CompiledPrompt(f"""{self.system_prompt}
+
+Return a follow-up question as a single JSON object in this exact format:
+{question_format}
+
+Make the question practical and scenario-based.""",
+                """Generate 1 follow-up Excel interview question for a {skill_level} level candidate.
+
+The candidate is averaging {avg_raw_score:.1f}/10 so far, so make this question {difficulty_hint} the previous ones.
+Weak Areas Identified: {weak_topics}
+
+Questions already asked (do not repeat them):
+{previous}"""),
+            'evaluate': CompiledPrompt(f"""{self.system_prompt}
+
+Evaluate the response based on:
+{self.evaluation_criteria}
+
+Provide your evaluation in this exact JSON format:
+{self.evaluation_format}
+
+{self.scoring_guidelines}""",
+                """As an Excel interviewer, evaluate this candidate's response to an Excel question.
+
+Question: {question}
+Topic: {topic}
+Difficulty Level: {difficulty}/10
+Candidate's Response: {response}"""),
+            'evaluate_batch': CompiledPrompt(f"""{self.system_prompt}
+
+Evaluate each response independently based on:
+{self.evaluation_criteria}
+
+Provide your evaluations as a JSON array with one object per response, in the same order as the responses, each in this exact format:
+{self.evaluation_format}
+
+{self.scoring_guidelines}""",
+                """As an Excel interviewer, evaluate each of these {count} candidate responses to Excel questions independently. Return exactly {count} objects.
+
+{responses}"""),
+            'feedback': CompiledPrompt(f"""{self.system_prompt}
+
+When asked for overall feedback, write a comprehensive but concise paragraph (2-3 sentences) that:
+1. Acknowledges their overall performance level
+2. Highlights key strengths observed across questions
+3. Identifies the most important areas for improvement
+4. Is encouraging but honest
+
+Write in a professional, supportive tone as an interviewer would.""",
+                """Analyze this Excel interview performance and provide overall feedback.
+
+Candidate Level: {skill_level}
+Overall Percentage: {percentage:.1f}%
+Number of Questions: {count}
+
+Question-by-question performance:
+{score_summary}"""),
+            'recommend': CompiledPrompt(f"""{self.system_prompt}
+
+When asked for learning recommendations, provide 3-5 specific, actionable ones as a JSON array:
+["recommendation 1", "recommendation 2", "recommendation 3", ...]
+
+Focus on:
+1. Addressing identified weak areas
+2. Building on strengths
+3. Practical learning resources or methods
+4. Progressive skill development
+5. Real-world application practice
+
+Keep recommendations concise and actionable.""",
+                """Based on this Excel interview performance, provide specific, actionable learning recommendations.
+
+Skill Level Tested: {skill_level}
+Overall Score: {percentage:.1f}%
+Weak Areas Identified: {weak_topics}
+
+Performance Summary:
+{score_summary}""")
+        }
+
+    def generate_questions(self, skill_level: str, num_questions: int = 5) -> List[Dict]:
+        """Generate Excel questions based on skill level using AI"""
         
         try:
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=question_prompt)
-            ]
-            
-            result = model.invoke(messages)
+            messages = self.prompts['generate'].render(num_questions=num_questions, skill_level=skill_level)
+
+            result = llm_metrics.invoke('generate', messages)
             
-            # Extract JSON from response
-            json_match = re.search(r'\[.*\]', result.content, re.DOTALL)
-            if json_match:
-                questions = json.loads(json_match.group())
-                return questions
-            else:
-                # Fallback to default questions if AI generation fails
-                return self._get_fallback_questions(skill_level)
+            return structured_output.parse('generate', result.content, expect=list, schema=QUESTION_SCHEMA, messages=messages)
                 
         except Exception as e:
             print(f"Error generating questions: {e}")
+            llm_metrics.record_fallback('generate')
             return self._get_fallback_questions(skill_level)
 
     def _get_fallback_questions(self, skill_level: str) -> List[Dict]:
@@ -204,78 +1885,261 @@ Make questions practical and scenario-based. Each question should test real Exce
         
         return fallback_questions.get(skill_level, fallback_questions["beginner"])
 
-    def evaluate_response(self, question: str, response: str, topic: str, difficulty: int, weight: int) -> Dict:
-        """Evaluate response using AI instead of keyword matching"""
-        
-        evaluation_prompt = f"""
-As an Excel interviewer, evaluate this candidate's response to an Excel question.
+    def evaluate_response(self, question: str, response: str, topic: str, difficulty: int, weight: int,
+                          use_model: bool = True) -> Dict:
+        """Evaluate response using AI instead of keyword matching
 
-Question: {question}
-Topic: {topic}
-Difficulty Level: {difficulty}/10
-Candidate's Response: {response}
+        With use_model False (the server is shedding load) only the local paths
+        are tried: pre-scoring, the caches, then the fallback evaluation.
+        """
+        prescored = self._prescore_response(question, response, topic, difficulty, weight)
+        if prescored is not None:
+            return prescored
 
-Evaluate the response based on:
-1. Technical accuracy - Is the information correct?
-2. Completeness - Does it fully answer the question?
-3. Practical understanding - Do they understand real-world applications?
-4. Communication clarity - Is the explanation clear and well-structured?
-5. Depth of knowledge - Do they show understanding beyond basics?
+        cache_key = EvaluationCache.make_key(question, topic, difficulty, response)
+        cached = evaluation_cache.get(cache_key)
+        if cached is not None:
+            return self._apply_weight(cached, weight, topic, difficulty)
+        similar = self._similar_evaluation(question, response, topic, difficulty, weight)
+        if similar is not None:
+            return similar
+        if not use_model:
+            llm_metrics.record_fallback('evaluate')
+            return self._fallback_evaluation(response, weight, topic, difficulty)
+
+        try:
+            messages = self._build_evaluation_messages(question, response, topic, difficulty)
+            result = llm_metrics.invoke('evaluate', messages)
+            evaluation = self._parse_evaluation(result.content, messages, topic, difficulty, weight, cache_key)
+            self._remember_answer(question, response, topic, difficulty, evaluation)
+            return evaluation
+                
+        except Exception as e:
+            print(f"Error evaluating response: {e}")
+            llm_metrics.record_fallback('evaluate')
+            return self._fallback_evaluation(response, weight, topic, difficulty)
+
+    def evaluate_response_stream(self, question: str, response: str, topic: str, difficulty: int, weight: int,
+                                 on_chunk: Callable[[Dict], None]) -> Dict:
+        """Evaluate response using the model's stream, reporting feedback text and scores as they arrive"""
+        prescored = self._prescore_response(question, response, topic, difficulty, weight)
+        if prescored is not None:
+            self._send_whole_evaluation(prescored, on_chunk)
+            return prescored
+
+        cache_key = EvaluationCache.make_key(question, topic, difficulty, response)
+        cached = evaluation_cache.get(cache_key)
+        if cached is not None:
+            evaluation = self._apply_weight(cached, weight, topic, difficulty)
+            self._send_whole_evaluation(evaluation, on_chunk)
+            return evaluation
+        similar = self._similar_evaluation(question, response, topic, difficulty, weight)
+        if similar is not None:
+            self._send_whole_evaluation(similar, on_chunk)
+            return similar
+
+        parser = EvaluationStreamParser()
+        parts = []
+        try:
+            messages = self._build_evaluation_messages(question, response, topic, difficulty)
+            for chunk in llm_metrics.stream('evaluate', messages):
+                text = chunk.content if isinstance(chunk.content, str) else ''
+                if not text:
+                    continue
+                parts.append(text)
+                update = parser.feed(text)
+                if update:
+                    on_chunk(update)
+
+            evaluation = self._parse_evaluation(''.join(parts), messages, topic, difficulty, weight, cache_key)
+            self._remember_answer(question, response, topic, difficulty, evaluation)
+            return evaluation
+
+        except Exception as e:
+            print(f"Error streaming evaluation: {e}")
+            llm_metrics.record_fallback('evaluate')
+            return self._fallback_evaluation(response, weight, topic, difficulty)
+
+    def evaluate_responses_batch(self, items: List[Dict]) -> List[Dict]:
+        """Evaluate several answers with one model call, for offline grading
+
+        Each item needs question, response, topic, difficulty and weight. Items the
+        batched reply doesn't cover are evaluated one by one.
+        """
+        results: List[Optional[Dict]] = [None] * len(items)
+        pending = []
+        for i, item in enumerate(items):
+            prescored = self._prescore_response(item['question'], item['response'], item['topic'], item['difficulty'], item['weight'])
+            if prescored is not None:
+                results[i] = prescored
+                continue
+            cache_key = EvaluationCache.make_key(item['question'], item['topic'], item['difficulty'], item['response'])
+            cached = evaluation_cache.get(cache_key)
+            if cached is not None:
+                results[i] = self._apply_weight(cached, item['weight'], item['topic'], item['difficulty'])
+                continue
+            similar = self._similar_evaluation(item['question'], item['response'], item['topic'], item['difficulty'], item['weight'])
+            if similar is not None:
+                results[i] = similar
+                continue
+            pending.append((i, cache_key))
+
+        if pending:
+            try:
+                messages = self._build_batch_evaluation_messages([items[i] for i, _ in pending])
+                result = llm_metrics.invoke('evaluate_batch', messages)
+                evaluations = structured_output.parse('evaluate_batch', result.content, expect=list, schema=EVALUATION_SCHEMA, messages=messages)
+            except Exception as e:
+                print(f"Error evaluating batch: {e}")
+                evaluations = []
+
+            # A reply with the wrong number of entries can't be matched up safely
+            if len(evaluations) == len(pending):
+                for (i, cache_key), evaluation in zip(pending, evaluations):
+                    item = items[i]
+                    results[i] = self._apply_weight(evaluation, item['weight'], item['topic'], item['difficulty'])
+                    evaluation_cache.put(cache_key, results[i])
+                    self._remember_answer(item['question'], item['response'], item['topic'], item['difficulty'], results[i])
+
+        for i, item in enumerate(items):
+            if results[i] is None:
+                results[i] = self.evaluate_response(item['question'], item['response'], item['topic'], item['difficulty'], item['weight'])
+        return results
+
+    def _build_batch_evaluation_messages(self, items: List[Dict]) -> List:
+        """Build one prompt asking for a JSON array of evaluations"""
+        responses = '\n\n'.join(
+            f"""Response {n}
+Question: {item['question']}
+Topic: {item['topic']}
+Difficulty Level: {item['difficulty']}/10
+Candidate's Response: {item['response']}"""
+            for n, item in enumerate(items, start=1)
+        )
+        return self.prompts['evaluate_batch'].render(count=len(items), responses=responses)
+
+    def _send_whole_evaluation(self, evaluation: Dict, on_chunk: Callable[[Dict], None]):
+        """Report an evaluation that didn't come from the stream as a single chunk"""
+        scores = {field: evaluation[field] for field in EvaluationStreamParser.SCORE_FIELDS if field in evaluation}
+        on_chunk({'text': evaluation.get('feedback', ''), 'scores': scores})
+
+    def _prescore_response(self, question: str, response: str, topic: str, difficulty: int, weight: int) -> Optional[Dict]:
+        """Deterministic low score for obvious non-answers; None when the model should judge"""
+        if not PRESCORE_ENABLED:
+            return None
+
+        normalized = ' '.join(response.lower().replace('\u2019', "'").split())
+        words = re.findall(r"[a-z0-9']+", normalized)
+        # A reply that mentions anything from the question or topic goes to the model
+        keywords = set(re.findall(r"[a-z0-9]+", f"{question} {topic}".lower())) - STOPWORDS
+        on_topic = bool(keywords.intersection(re.findall(r"[a-z0-9]+", normalized)))
+
+        if not words:
+            reason = "No response was given."
+        elif on_topic:
+            return None
+        elif len(words) <= 12 and NON_ANSWER_PATTERN.search(normalized):
+            reason = "The response says the candidate doesn't know the answer."
+        elif len(words) < 3:
+            reason = "The response is too short and doesn't address the question."
+        else:
+            return None
+
+        base_score = 1
+        max_possible_for_question = 10
+        percentage_score = (base_score / max_possible_for_question) * weight
+
+        return {
+            "score": base_score,
+            "raw_score": base_score,
+            "technical_accuracy": base_score,
+            "communication_clarity": base_score,
+            "completeness": base_score,
+            "practical_understanding": base_score,
+            "feedback": f"{reason} No credit can be given for this question.",
+            "suggestions": f"Review the fundamentals of {topic} and practise explaining them with a concrete example.",
+            "strengths": "None demonstrated for this question.",
+            "areas_for_improvement": f"Build working knowledge of {topic}.",
+            "weighted_score": percentage_score,
+            "max_possible": weight,
+            "topic": topic,
+            "difficulty": difficulty
+        }
+
+    def _similar_evaluation(self, question: str, response: str, topic: str, difficulty: int, weight: int) -> Optional[Dict]:
+        """Evaluation reused from near-identical earlier answers to the same question; None when there are none"""
+        index = get_answer_index()
+        if index is None:
+            return None
+        from similarity import question_key
+        evaluation = index.match(question_key(question, topic, difficulty), response)
+        if evaluation is None:
+            return None
+        return self._apply_weight(evaluation, weight, topic, difficulty)
+
+    def _remember_answer(self, question: str, response: str, topic: str, difficulty: int, evaluation: Dict):
+        """Add a model-graded answer to the near-duplicate index"""
+        index = get_answer_index()
+        if index is not None:
+            from similarity import question_key
+            index.add(question_key(question, topic, difficulty), response, evaluation)
+
+    def _build_evaluation_messages(self, question: str, response: str, topic: str, difficulty: int) -> List:
+        """Build the evaluation prompt shared by the blocking and streaming paths"""
+        return self.prompts['evaluate'].render(question=question, topic=topic, difficulty=difficulty, response=response)
+
+    def _parse_evaluation(self, content: str, messages: List, topic: str, difficulty: int, weight: int,
+                          cache_key: Optional[str] = None) -> Dict:
+        """Turn the model's JSON evaluation into a scored evaluation dict
 
-Provide your evaluation in this exact JSON format:
-{{
-    "score": <number from 1-10>,
-    "technical_accuracy": <number from 1-10>,
-    "communication_clarity": <number from 1-10>,
-    "completeness": <number from 1-10>,
-    "practical_understanding": <number from 1-10>,
-    "feedback": "<constructive feedback about their response>",
-    "suggestions": "<specific suggestions for improvement>",
-    "strengths": "<what they did well in their response>",
-    "areas_for_improvement": "<specific areas that need work>"
-}}
+        Raises StructuredOutputError if the reply is unusable even after a repair
+        attempt; callers fall back to _fallback_evaluation.
+        """
+        evaluation = structured_output.parse('evaluate', content, expect=dict, schema=EVALUATION_SCHEMA, messages=messages)
+        evaluation = self._escalate_if_unsure(evaluation, messages)
+        evaluation = self._apply_weight(evaluation, weight, topic, difficulty)
+        # Only real model evaluations are cached, never fallbacks
+        if cache_key:
+            evaluation_cache.put(cache_key, evaluation)
+        return evaluation
 
-Scoring guidelines:
-- 1-3: Poor/Incorrect response with major errors
-- 4-5: Basic understanding but significant gaps or errors
-- 6-7: Good understanding with minor gaps
-- 8-9: Very good response with comprehensive understanding
-- 10: Excellent, expert-level response
+    def _escalate_if_unsure(self, evaluation: Dict, messages: List) -> Dict:
+        """Re-score on the strong tier when the fast model is unsure or its sub-scores disagree
 
-Be fair but thorough in your evaluation. Consider the difficulty level when scoring.
-Be strict with scoring - wrong answers should get low scores (1-3).
+        Keeps the original evaluation if the escalated call fails.
         """
-        
+        confidence = evaluation.get('confidence')
+        sub_scores = [evaluation[field] for field in EvaluationStreamParser.SCORE_FIELDS[1:]
+                      if isinstance(evaluation.get(field), (int, float))]
+        unsure = LLM_ESCALATE_BELOW > 0 and isinstance(confidence, (int, float)) and confidence < LLM_ESCALATE_BELOW
+        split = len(sub_scores) > 1 and max(sub_scores) - min(sub_scores) >= 5
+        if not (unsure or split):
+            return evaluation
+
         try:
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=evaluation_prompt)
-            ]
-            
-            result = model.invoke(messages)
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', result.content, re.DOTALL)
-            if json_match:
-                evaluation = json.loads(json_match.group())
-                # Fix scoring calculation - use percentage of max possible for this question
-                raw_score = evaluation['score']
-                max_possible_for_question = 10  # Each question is scored out of 10
-                percentage_score = (raw_score / max_possible_for_question) * weight
-                
-                evaluation['raw_score'] = raw_score
-                evaluation['weighted_score'] = percentage_score
-                evaluation['max_possible'] = weight
-                evaluation['topic'] = topic
-                evaluation['difficulty'] = difficulty
-                return evaluation
-            else:
-                # Fallback scoring if JSON parsing fails
-                return self._fallback_evaluation(response, weight, topic, difficulty)
-                
+            result = llm_metrics.invoke('evaluate_escalated', messages)
+            escalated = structured_output.parse('evaluate_escalated', result.content, expect=dict,
+                                                schema=EVALUATION_SCHEMA, messages=messages)
         except Exception as e:
-            print(f"Error evaluating response: {e}")
-            return self._fallback_evaluation(response, weight, topic, difficulty)
+            print(f"Error escalating evaluation: {e}")
+            return evaluation
+        escalated['escalated'] = True
+        return escalated
+
+    def _apply_weight(self, evaluation: Dict, weight: int, topic: str, difficulty: int) -> Dict:
+        """Add the weighted score for this question to a 1-10 evaluation"""
+        evaluation = dict(evaluation)
+        # Fix scoring calculation - use percentage of max possible for this question
+        raw_score = evaluation['score']
+        max_possible_for_question = 10  # Each question is scored out of 10
+        percentage_score = (raw_score / max_possible_for_question) * weight
+        
+        evaluation['raw_score'] = raw_score
+        evaluation['weighted_score'] = percentage_score
+        evaluation['max_possible'] = weight
+        evaluation['topic'] = topic
+        evaluation['difficulty'] = difficulty
+        return evaluation
 
     def _fallback_evaluation(self, response: str, weight: int, topic: str, difficulty: int) -> Dict:
         """Fallback evaluation when AI evaluation fails"""
@@ -308,64 +2172,135 @@ Be strict with scoring - wrong answers should get low scores (1-3).
             "weighted_score": percentage_score,
             "max_possible": weight,
             "topic": topic,
-            "difficulty": difficulty
+            "difficulty": difficulty,
+            # Lets offline grading tell a placeholder from a real grade
+            "fallback": True
         }
 
-    def get_next_question(self, state: InterviewState) -> Optional[Dict]:
-        """Get the next question for the interview"""
-        if state.current_question >= len(state.generated_questions):
-            return None
-        return state.generated_questions[state.current_question]
+    def get_adaptive_direction(self, scores: List[Dict]) -> str:
+        """Whether the next question should be harder, easier or similar based on the running score"""
+        raw_scores = [score.get('raw_score', score.get('score', 0)) for score in scores]
+        if not raw_scores:
+            return "similar"
+        avg_raw_score = sum(raw_scores) / len(raw_scores)
+        if avg_raw_score >= 7.0:
+            return "harder"
+        elif avg_raw_score < 5.0:
+            return "easier"
+        return "similar"
 
-    def generate_final_report(self, state: InterviewState) -> Dict:
-        """Generate comprehensive final report using AI analysis"""
-        if not state.scores:
-            return {"error": "No responses to evaluate"}
+    def generate_follow_up_question(self, skill_level: str, scores: List[Dict], previous_questions: List[str], direction: str) -> Optional[Dict]:
+        """Generate a single question adapted to how the candidate is doing so far"""
+        raw_scores = [score.get('raw_score', score.get('score', 0)) for score in scores]
+        avg_raw_score = sum(raw_scores) / len(raw_scores) if raw_scores else 0
+        difficulty_hint = {
+            "harder": "more challenging than",
+            "easier": "more approachable than",
+            "similar": "of similar difficulty to"
+        }[direction]
+        previous = '\n'.join(f"- {q}" for q in previous_questions)
+        weak_topics = self._get_weak_topics(scores)
 
-        # Calculate scores properly
-        total_weighted_score = sum(score.get('weighted_score', 0) for score in state.scores)
-        total_max_possible = sum(score.get('max_possible', 0) for score in state.scores)
-        
-        # Calculate percentage correctly
-        percentage = (total_weighted_score / total_max_possible * 100) if total_max_possible > 0 else 0
-        
-        # Ensure percentage cannot exceed 100%
-        percentage = min(percentage, 100.0)
+        try:
+            messages = self.prompts['follow_up'].render(
+                skill_level=skill_level,
+                avg_raw_score=avg_raw_score,
+                difficulty_hint=difficulty_hint,
+                weak_topics=', '.join(weak_topics) if weak_topics else 'None major',
+                previous=previous
+            )
 
-        # Calculate average raw score for proficiency determination
-        raw_scores = [score.get('raw_score', score.get('score', 0)) for score in state.scores]
-        avg_raw_score = sum(raw_scores) / len(raw_scores) if raw_scores else 0
+            result = llm_metrics.invoke('follow_up', messages)
 
-        # Determine proficiency level based on average raw score (1-10 scale)
-        if avg_raw_score >= 8.5:
-            proficiency = "Advanced"
-        elif avg_raw_score >= 7.0:
-            proficiency = "Intermediate" 
-        elif avg_raw_score >= 5.5:
-            proficiency = "Basic"
-        else:
-            proficiency = "Beginner"
+            return structured_output.parse('follow_up', result.content, expect=dict, schema=FOLLOW_UP_QUESTION_SCHEMA, messages=messages)
 
-        # Generate AI-powered overall assessment
-        overall_feedback = self._generate_ai_feedback(state.scores, percentage, state.skill_level)
-        recommendations = self._generate_ai_recommendations(state.scores, percentage, state.skill_level)
+        except Exception as e:
+            print(f"Error generating follow-up question: {e}")
+            llm_metrics.record_fallback('follow_up')
+            return None
+
+    def get_next_question(self, state: InterviewState) -> Optional[Dict]:
+        """Get the next question for the interview"""
+        if state.current_question >= len(state.generated_questions):
+            return None
+        return state.generated_questions[state.current_question]
 
+    def build_report(self, state: InterviewState, overall_feedback: str, recommendations: List[str]) -> Dict:
+        """Assemble the report from the running totals and a narrative"""
         return {
             "candidate_name": state.candidate_name,
             "skill_level": state.skill_level,
-            "total_score": round(total_weighted_score, 1),
-            "max_possible_score": total_max_possible,
-            "percentage": round(percentage, 1),
-            "average_raw_score": round(avg_raw_score, 1),
-            "proficiency_level": proficiency,
-            "questions_answered": len(state.responses),
+            **state.report.snapshot(),
             "interview_duration": str(datetime.datetime.now() - state.start_time),
-            "detailed_scores": state.scores,
+            # The answer text goes with each score so saved reports can be replayed by similarity.py
+            "detailed_scores": [{**score.to_dict(), 'question': answer.question, 'response': answer.response}
+                                for score, answer in zip(state.scores, state.responses)],
             "overall_feedback": overall_feedback,
             "recommendations": recommendations,
-            "topic_breakdown": self._analyze_topic_performance(state.scores)
+            "timing_breakdown": LLMMetrics.summarize(state.llm_timings)
         }
 
+    def start_narrative(self, scores: List[Dict], percentage: float, skill_level: str) -> tuple:
+        """Request the overall feedback and recommendations; the two calls are independent so send them together"""
+        timings = llm_metrics.current_timings()
+        scores = list(scores)
+        feedback_future = report_executor.submit(llm_metrics.run_tracked, timings, self._generate_ai_feedback, scores, percentage, skill_level)
+        recommendations_future = report_executor.submit(llm_metrics.run_tracked, timings, self._generate_ai_recommendations, scores, percentage, skill_level)
+        return feedback_future, recommendations_future
+
+    def finish_narrative(self, futures: tuple, scores: List[Dict], percentage: float, skill_level: str,
+                         timeout: float = REPORT_LLM_TIMEOUT) -> tuple:
+        """Wait for start_narrative's calls, using canned text for any that time out"""
+        feedback_future, recommendations_future = futures
+        wait([feedback_future, recommendations_future], timeout=timeout)
+
+        # Both helpers fall back on errors themselves, so only a timeout (or a cancelled draft) is left to handle here
+        if feedback_future.done() and not feedback_future.cancelled():
+            overall_feedback = feedback_future.result()
+        else:
+            feedback_future.cancel()
+            llm_metrics.record_fallback('feedback')
+            overall_feedback = self._fallback_feedback(percentage)
+
+        if recommendations_future.done() and not recommendations_future.cancelled():
+            recommendations = recommendations_future.result()
+        else:
+            recommendations_future.cancel()
+            llm_metrics.record_fallback('recommend')
+            recommendations = self._fallback_recommendations(percentage, skill_level, self._get_weak_topics(scores))
+
+        return overall_feedback, recommendations
+
+    def on_narrative(self, futures: tuple, scores: List[Dict], percentage: float, skill_level: str,
+                     callback: Callable[[str, List[str]], None]):
+        """Call callback(feedback, recommendations) once start_narrative's calls finish, without blocking
+
+        Runs on whichever thread finishes last; after REPORT_LLM_TIMEOUT any call
+        still running gets canned text, as in finish_narrative.
+        """
+        finished = threading.Lock()
+
+        def finish():
+            if finished.acquire(blocking=False):
+                timer.cancel()
+                callback(*self.finish_narrative(futures, scores, percentage, skill_level, timeout=0))
+
+        def future_done(_):
+            if all(future.done() for future in futures):
+                finish()
+
+        timer = threading.Timer(REPORT_LLM_TIMEOUT, finish)
+        timer.daemon = True
+        timer.start()
+        for future in futures:
+            future.add_done_callback(future_done)
+
+    def fallback_narrative(self, scores: List[Dict], percentage: float, skill_level: str) -> tuple:
+        """Canned feedback and recommendations, for when the model shouldn't be called at all"""
+        llm_metrics.record_fallback('feedback')
+        llm_metrics.record_fallback('recommend')
+        return self._fallback_feedback(percentage), self._fallback_recommendations(percentage, skill_level, self._get_weak_topics(scores))
+
     def _generate_ai_feedback(self, scores: List[Dict], percentage: float, skill_level: str) -> str:
         """Generate overall feedback using AI"""
         
@@ -381,96 +2316,62 @@ Be strict with scoring - wrong answers should get low scores (1-3).
                 "areas_for_improvement": score.get('areas_for_improvement', '')
             })
 
-        feedback_prompt = f"""
-Analyze this Excel interview performance and provide overall feedback.
-
-Candidate Level: {skill_level}
-Overall Percentage: {percentage:.1f}%
-Number of Questions: {len(scores)}
-
-Question-by-question performance:
-{json.dumps(score_summary, indent=2)}
-
-Provide a comprehensive but concise overall feedback (2-3 sentences) that:
-1. Acknowledges their overall performance level
-2. Highlights key strengths observed across questions
-3. Identifies the most important areas for improvement
-4. Is encouraging but honest
-
-Write in a professional, supportive tone as an interviewer would.
-        """
-        
         try:
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=feedback_prompt)
-            ]
-            
-            result = model.invoke(messages)
+            messages = self.prompts['feedback'].render(
+                skill_level=skill_level,
+                percentage=percentage,
+                count=len(scores),
+                score_summary=compact_json(score_summary)
+            )
+
+            result = llm_metrics.invoke('feedback', messages)
             return result.content.strip()
             
         except Exception as e:
-            # Fallback feedback
-            if percentage >= 85:
-                return "Excellent performance! You demonstrate strong Excel proficiency across multiple areas."
-            elif percentage >= 70:
-                return "Good performance with solid Excel knowledge. Some areas could benefit from additional practice."
-            elif percentage >= 55:
-                return "Basic understanding demonstrated. Focus on expanding your Excel skills through targeted practice."
-            else:
-                return "Foundational Excel concepts need development. Consider structured learning to build core skills."
+            llm_metrics.record_fallback('feedback')
+            return self._fallback_feedback(percentage)
+
+    def _fallback_feedback(self, percentage: float) -> str:
+        """Fallback feedback when AI generation fails or times out"""
+        if percentage >= 85:
+            return "Excellent performance! You demonstrate strong Excel proficiency across multiple areas."
+        elif percentage >= 70:
+            return "Good performance with solid Excel knowledge. Some areas could benefit from additional practice."
+        elif percentage >= 55:
+            return "Basic understanding demonstrated. Focus on expanding your Excel skills through targeted practice."
+        else:
+            return "Foundational Excel concepts need development. Consider structured learning to build core skills."
 
     def _generate_ai_recommendations(self, scores: List[Dict], percentage: float, skill_level: str) -> List[str]:
         """Generate personalized recommendations using AI"""
         
         # Analyze weak areas
-        weak_topics = []
-        for score in scores:
-            if score.get('score', 0) < 6:
-                weak_topics.append(score.get('topic', 'Unknown'))
-        
-        recommendations_prompt = f"""
-Based on this Excel interview performance, provide 3-5 specific, actionable learning recommendations.
-
-Skill Level Tested: {skill_level}
-Overall Score: {percentage:.1f}%
-Weak Areas Identified: {', '.join(weak_topics) if weak_topics else 'None major'}
-
-Performance Summary:
-{json.dumps([{'topic': s.get('topic'), 'score': s.get('score')} for s in scores], indent=2)}
-
-Provide specific, actionable recommendations as a JSON array:
-["recommendation 1", "recommendation 2", "recommendation 3", ...]
-
-Focus on:
-1. Addressing identified weak areas
-2. Building on strengths
-3. Practical learning resources or methods
-4. Progressive skill development
-5. Real-world application practice
-
-Keep recommendations concise and actionable.
-        """
+        weak_topics = self._get_weak_topics(scores)
         
         try:
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=recommendations_prompt)
-            ]
-            
-            result = model.invoke(messages)
+            messages = self.prompts['recommend'].render(
+                skill_level=skill_level,
+                percentage=percentage,
+                weak_topics=', '.join(weak_topics) if weak_topics else 'None major',
+                score_summary=compact_json([{'topic': s.get('topic'), 'score': s.get('score')} for s in scores])
+            )
+
+            result = llm_metrics.invoke('recommend', messages)
             
-            # Extract JSON array from response
-            json_match = re.search(r'\[.*\]', result.content, re.DOTALL)
-            if json_match:
-                recommendations = json.loads(json_match.group())
-                return recommendations
-            else:
-                return self._fallback_recommendations(percentage, skill_level, weak_topics)
+            return structured_output.parse('recommend', result.content, expect=list, schema=str, messages=messages)
                 
         except Exception as e:
+            llm_metrics.record_fallback('recommend')
             return self._fallback_recommendations(percentage, skill_level, weak_topics)
 
+    def _get_weak_topics(self, scores: List[Dict]) -> List[str]:
+        """Topics of questions that scored below 6"""
+        weak_topics = []
+        for score in scores:
+            if score.get('score', 0) < 6:
+                weak_topics.append(score.get('topic', 'Unknown'))
+        return weak_topics
+
     def _fallback_recommendations(self, percentage: float, skill_level: str, weak_topics: List[str]) -> List[str]:
         """Fallback recommendations when AI generation fails"""
         recommendations = []
@@ -494,142 +2395,847 @@ Keep recommendations concise and actionable.
         
         return recommendations[:5]  # Limit to 5 recommendations
 
-    def _analyze_topic_performance(self, scores: List[Dict]) -> Dict:
-        """Analyze performance by topic area"""
-        topic_scores = {}
-        
-        for score in scores:
-            topic = score.get('topic', 'Unknown')
-            if topic not in topic_scores:
-                topic_scores[topic] = []
-            topic_scores[topic].append(score.get('score', 0))
-        
-        topic_analysis = {}
-        for topic, topic_score_list in topic_scores.items():
-            avg_score = sum(topic_score_list) / len(topic_score_list)
-            topic_analysis[topic] = {
-                'average_score': round(avg_score, 1),
-                'questions_count': len(topic_score_list),
-                'performance_level': 'Strong' if avg_score >= 7 else 'Moderate' if avg_score >= 5 else 'Needs Improvement'
-            }
-        
-        return topic_analysis
+class QuestionBank:
+    """Background-refilled pool of AI-generated question sets per skill level"""
+
+    def __init__(self, agent: ExcelInterviewAgent, size: int, ttl: float, num_questions: int = 5):
+        self.agent = agent
+        self.size = size
+        self.ttl = ttl
+        self.num_questions = num_questions
+        self._pools: Dict[str, deque] = {level: deque() for level in SKILL_LEVELS}
+        # Normalized question texts recently pooled or served, so sessions don't get repeats
+        self._recent: Dict[str, deque] = {level: deque(maxlen=max(1, size) * num_questions * 4) for level in SKILL_LEVELS}
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='question-bank')
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def take(self, skill_level: str) -> Optional[List[Dict]]:
+        """Pop a question set for this level; None if the bank doesn't cover it"""
+        if not self.enabled or skill_level not in self._pools:
+            return None
+
+        with self._lock:
+            self._evict_expired(skill_level)
+            pool = self._pools[skill_level]
+            questions = pool.popleft()[1] if pool else None
+
+        self._schedule_refill(skill_level)
+        if questions is None:
+            # Pool is cold or drained; don't make the candidate wait for the LLM
+            llm_metrics.record_fallback('generate')
+            return self.agent._get_fallback_questions(skill_level)
+        return list(questions)
+
+    def warm(self):
+        """Start filling every skill level's pool"""
+        if self.enabled:
+            for skill_level in SKILL_LEVELS:
+                self._schedule_refill(skill_level)
+
+    def _evict_expired(self, skill_level: str):
+        pool = self._pools[skill_level]
+        cutoff = time.monotonic() - self.ttl
+        while pool and pool[0][0] < cutoff:
+            pool.popleft()
+
+    def _schedule_refill(self, skill_level: str):
+        with self._lock:
+            if skill_level in self._refilling or len(self._pools[skill_level]) >= self.size:
+                return
+            self._refilling.add(skill_level)
+        self._executor.submit(self._refill, skill_level)
+
+    def _refill(self, skill_level: str):
+        try:
+            # Bound the attempts so a failing provider doesn't spin forever
+            for _ in range(self.size * 2):
+                with self._lock:
+                    self._evict_expired(skill_level)
+                    if len(self._pools[skill_level]) >= self.size:
+                        return
+
+                questions = self.agent.generate_questions(skill_level, num_questions=self.num_questions)
+                if not self._is_valid(skill_level, questions):
+                    continue
+
+                keys = [self._normalize(q['question']) for q in questions]
+                with self._lock:
+                    recent = self._recent[skill_level]
+                    if any(key in recent for key in keys):
+                        continue
+                    recent.extend(keys)
+                    self._pools[skill_level].append((time.monotonic(), questions))
+        except Exception as e:
+            print(f"Error refilling question bank for {skill_level}: {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(skill_level)
+
+    def _is_valid(self, skill_level: str, questions) -> bool:
+        """Only pool complete AI-generated sets, never the static fallback"""
+        if not isinstance(questions, list) or len(questions) != self.num_questions:
+            return False
+        if questions == self.agent._get_fallback_questions(skill_level):
+            return False
+        required = ('question', 'topic', 'difficulty', 'weight')
+        return all(isinstance(q, dict) and all(key in q for key in required) for q in questions)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r'\W+', ' ', text.lower()).strip()
 
 interview_agent = ExcelInterviewAgent()
+question_bank = QuestionBank(interview_agent, QUESTION_BANK_SIZE, QUESTION_BANK_TTL)
+
+def preload():
+    """Pay the import costs deferred at startup: the model clients, then the near-duplicate index"""
+    model_router.preload()
+    get_answer_index()
+
+STARTED_AT = time.time()
+if LLM_PRELOAD:
+    # Connections are accepted meanwhile; /ready reports when the clients are built
+    threading.Thread(target=preload, name='model-preload', daemon=True).start()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+# One CSV row per answered question, with the report's headline figures repeated on each
+EXPORT_CSV_COLUMNS = (
+    'report_id', 'candidate_name', 'skill_level', 'percentage', 'proficiency_level', 'question_number', 'topic',
+    'difficulty', 'score', 'technical_accuracy', 'communication_clarity', 'completeness', 'practical_understanding',
+    'feedback'
+)
+
+def export_chunks(reports: Iterator[Dict], fmt: str, single: bool = False) -> Iterator[str]:
+    """Serialize reports one at a time in the requested format"""
+    if fmt == 'ndjson':
+        for report in reports:
+            yield json.dumps(report) + '\n'
+    elif fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        yield buffer.getvalue()
+        for report in reports:
+            # Reuse one small buffer so memory doesn't grow with the export
+            buffer.seek(0)
+            buffer.truncate()
+            for number, score in enumerate(report.get('detailed_scores', []), start=1):
+                row = {**report, **score, 'question_number': number}
+                writer.writerow([row.get(column, '') for column in EXPORT_CSV_COLUMNS])
+            yield buffer.getvalue()
+    elif single:
+        for report in reports:
+            yield json.dumps(report)
+    else:
+        yield '['
+        for n, report in enumerate(reports):
+            yield (',\n' if n else '\n') + json.dumps(report)
+        yield '\n]\n'
+
+def gzip_chunks(chunks: Iterator[str]) -> Iterator[bytes]:
+    """Compress a stream of text as it is produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_response(reports: Iterator[Dict], fmt: str, filename: str, single: bool = False) -> Response:
+    """Stream reports with chunked transfer, gzipped when the client accepts it"""
+    chunks = export_chunks(reports, fmt, single)
+    headers = {'Content-Disposition': f'attachment; filename="{filename}.{fmt}"'}
+    if 'gzip' in request.accept_encodings:
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+        body = gzip_chunks(chunks)
+    else:
+        body = (chunk.encode('utf-8') for chunk in chunks)
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt], headers=headers)
+
+@app.route('/export/session/<session_id>')
+def export_session_report(session_id: str):
+    """One interview's report by its token, from the transcript store or the live session"""
+    fmt = request.args.get('format', 'json')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'format must be one of {", ".join(EXPORT_FORMATS)}'}), 400
+
+    report = transcript_store.get_session_report(session_id) if transcript_store.enabled else None
+    if report is None:
+        state = interview_sessions.get(session_id)
+        if state is None or not state.scores:
+            return jsonify({'error': 'Report not found'}), 404
+        # Queued for the store but not written yet; it has the narrative a rebuild from the draft could miss
+        report = state.final_report
+        if report is None:
+            # Not locked: waiting out an in-flight evaluation or narrative would stall the download
+            overall_feedback, recommendations = ready_narrative(state.report_draft) or ('', [])
+            report = interview_agent.build_report(state, overall_feedback, recommendations)
+    return export_response(iter([report]), fmt, f"excel-interview-report-{session_id}", single=True)
+
+@app.route('/export/reports')
+def export_reports():
+    """Stored reports matching candidate, skill_level, topic and since/until (YYYY-MM-DD), oldest first"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'format must be one of {", ".join(EXPORT_FORMATS)}'}), 400
+    if not transcript_store.enabled:
+        return jsonify({'error': 'Transcript storage is disabled'}), 404
+    args = request.args
+    reports = transcript_store.iter_reports(
+        candidate=args.get('candidate', ''),
+        skill_level=args.get('skill_level', ''),
+        topic=args.get('topic', ''),
+        since=args.get('since', ''),
+        until=args.get('until', '')
+    )
+    return export_response(reports, fmt, 'excel-interview-reports')
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: the worker serves as soon as it is imported; llm_client says whether the first call will pay for loading the SDK"""
+    return jsonify({
+        'status': 'ready',
+        # Tells workers apart behind a load balancer
+        'pid': os.getpid(),
+        'llm_client': model_router.status(),
+        'sessions': len(interview_sessions),
+        'uptime_seconds': round(time.time() - STARTED_AT, 1)
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    lines = [llm_metrics.render_prometheus()]
+
+    cache_stats = evaluation_cache.stats()
+    lines.append('# HELP evaluation_cache_lookups_total Evaluation cache lookups by result')
+    lines.append('# TYPE evaluation_cache_lookups_total counter')
+    lines.append(f'evaluation_cache_lookups_total{{result="hit"}} {cache_stats["hits"]}')
+    lines.append(f'evaluation_cache_lookups_total{{result="miss"}} {cache_stats["misses"]}')
+
+    admission_stats = admission.stats()
+    lines.append('# HELP admission_requests_total Model-bound socket requests by admission outcome')
+    lines.append('# TYPE admission_requests_total counter')
+    for outcome in ('admitted', 'queued', 'shed', 'duplicate'):
+        lines.append(f'admission_requests_total{{outcome="{outcome}"}} {admission_stats[outcome]}')
+    lines.append('# HELP admission_active Requests running on the LLM pool')
+    lines.append('# TYPE admission_active gauge')
+    lines.append(f'admission_active {admission_stats["active"]}')
+    lines.append('# HELP admission_waiting Requests queued for a slot')
+    lines.append('# TYPE admission_waiting gauge')
+    lines.append(f'admission_waiting {admission_stats["waiting"]}')
+
+    # Not built yet means no lookups yet; scraping shouldn't be what imports NumPy
+    if answer_index is not None:
+        similar_stats = answer_index.stats()
+        lines.append('# HELP similar_answer_lookups_total Near-duplicate answer lookups by result')
+        lines.append('# TYPE similar_answer_lookups_total counter')
+        lines.append(f'similar_answer_lookups_total{{result="hit"}} {similar_stats["hits"]}')
+        lines.append(f'similar_answer_lookups_total{{result="miss"}} {similar_stats["misses"]}')
+
+    lines.append('# HELP structured_output_parses_total Model replies parsed, by call site and outcome')
+    lines.append('# TYPE structured_output_parses_total counter')
+    for call_site, counts in sorted(structured_output.stats().items()):
+        for outcome in ('success', 'repaired', 'failure'):
+            lines.append(f'structured_output_parses_total{{call_site="{call_site}",outcome="{outcome}"}} {counts[outcome]}')
+
+    model_stats = model_router.stats()
+    lines.append('# HELP llm_retries_total Provider calls retried after an error')
+    lines.append('# TYPE llm_retries_total counter')
+    lines.append(f'llm_retries_total {model_stats["retries"]}')
+    lines.append('# HELP llm_coalesced_total Calls that shared an identical in-flight prompt')
+    lines.append('# TYPE llm_coalesced_total counter')
+    lines.append(f'llm_coalesced_total {model_stats["coalesced"]}')
+    lines.append('# HELP llm_rate_limit_wait_seconds_total Time calls spent queued for the rate limiter')
+    lines.append('# TYPE llm_rate_limit_wait_seconds_total counter')
+    lines.append(f'llm_rate_limit_wait_seconds_total {model_stats["rate_limit_wait_seconds"]}')
+
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/stats/evaluation-cache')
+def evaluation_cache_stats():
+    stats = evaluation_cache.stats()
+    stats['similar_answers'] = answer_index.stats() if answer_index is not None else None
+    return jsonify(stats)
+
+@app.route('/stats/structured-output')
+def structured_output_stats():
+    return jsonify(structured_output.stats())
+
+@app.route('/transcripts')
+def list_transcripts():
+    """Stored reports filtered by candidate, skill_level, topic and since/until dates (YYYY-MM-DD)"""
+    if not transcript_store.enabled:
+        return jsonify({'error': 'Transcript storage is disabled'}), 404
+    args = request.args
+    return jsonify(transcript_store.list_reports(
+        candidate=args.get('candidate', ''),
+        skill_level=args.get('skill_level', ''),
+        topic=args.get('topic', ''),
+        since=args.get('since', ''),
+        until=args.get('until', ''),
+        limit=min(args.get('limit', 50, type=int), 500),
+        offset=args.get('offset', 0, type=int)
+    ))
+
+@app.route('/transcripts/<int:report_id>')
+def get_transcript(report_id: int):
+    report = transcript_store.get_report(report_id) if transcript_store.enabled else None
+    if report is None:
+        return jsonify({'error': 'Report not found'}), 404
+    return jsonify(report)
+
+@app.route('/analytics/topics')
+def topic_analytics():
+    """Average score by topic and difficulty, optionally for one skill_level"""
+    if not transcript_store.enabled:
+        return jsonify({'error': 'Transcript storage is disabled'}), 404
+    return jsonify(transcript_store.topic_averages(request.args.get('skill_level', '')))
+
+@app.route('/analytics/daily')
+def daily_analytics():
+    """Reports per day and their average percentage"""
+    if not transcript_store.enabled:
+        return jsonify({'error': 'Transcript storage is disabled'}), 404
+    args = request.args
+    return jsonify(transcript_store.daily_averages(args.get('skill_level', ''), args.get('since', ''), args.get('until', '')))
+
+# Socket id -> interview token. Interviews are stored by token so a new socket can pick one up again.
+socket_interviews: Dict[str, str] = {}
+socket_lock = threading.Lock()
+
+def attach_socket(state: InterviewState, sid: str):
+    """Point an interview's events at a socket, detaching whichever socket had it before"""
+    with socket_lock:
+        if state.sid is not None and state.sid != sid:
+            socket_interviews.pop(state.sid, None)
+        state.sid = sid
+        socket_interviews[sid] = state.session_id
+
+def interview_for_socket(sid: str) -> Optional[InterviewState]:
+    """The interview this socket is attached to, if it hasn't been resumed elsewhere since"""
+    token = socket_interviews.get(sid)
+    state = interview_sessions.get(token) if token else None
+    if state is None:
+        return None
+    with socket_lock:
+        # Persistent backends don't keep the socket, so a state reloaded after eviction comes back detached
+        if state.sid is None and socket_interviews.get(sid) == token:
+            state.sid = sid
+    return state if state.sid == sid else None
+
+def send(state: InterviewState, event: str, data: Dict):
+    """Emit to the interview's current socket; dropped while disconnected, since resuming replays the state"""
+    sid = state.sid
+    if sid is not None:
+        socketio.emit(event, data, to=sid)
+
 @socketio.on('connect')
 def on_connect():
     print(f'Client connected: {request.sid}')
+    # No-op once the pools are full or already refilling
+    question_bank.warm()
 
 @socketio.on('disconnect')
 def on_disconnect():
     print(f'Client disconnected: {request.sid}')
+    admission.drop(request.sid)
+    with socket_lock:
+        token = socket_interviews.pop(request.sid, None)
+    state = interview_sessions.get(token) if token else None
+    if state is None:
+        return
+    with socket_lock:
+        if state.sid == request.sid:
+            # In-flight work carries on; its results are replayed when the candidate resumes
+            state.sid = None
+    # Finished interviews can go once the whole report has been sent; until then a reconnect
+    # still needs them for the narrative. The rest are kept until idle eviction
+    if not state.is_active and state.final_report is not None:
+        interview_sessions.delete(token)
+
+class AdmissionQueue:
+    """Admission control for socket requests that call the model
+
+    A request is identified by its socket, kind and request_id (the question
+    number for answers); a repeat while the same request is pending is
+    dropped. Up to max_active requests run on the LLM pool, the next
+    max_queue wait in order and are told their position, and anything beyond
+    that runs straight away with use_model=False so it is answered from
+    fallbacks. That keeps latency bounded by the queue length instead of
+    growing with the backlog.
+    """
+
+    def __init__(self, max_active: int, max_queue: int, executor: ThreadPoolExecutor):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.executor = executor
+        self.active = 0
+        self.counts = {'admitted': 0, 'queued': 0, 'shed': 0, 'duplicate': 0}
+        self._waiting: deque = deque()  # (request key, task)
+        self._pending = set()  # (sid, kind, request_id) of requests admitted, queued or running
+        self._lock = threading.Lock()
+
+    def submit(self, sid: str, kind: str, task: Callable[[bool], None], request_id=None) -> str:
+        """Admit, queue or shed task(use_model); returns which of those happened, or 'duplicate'"""
+        key = (sid, kind, request_id)
+        with self._lock:
+            if key in self._pending:
+                outcome = 'duplicate'
+            else:
+                self._pending.add(key)
+                if self.active < self.max_active:
+                    self.active += 1
+                    outcome = 'admitted'
+                elif len(self._waiting) < self.max_queue:
+                    self._waiting.append((key, task))
+                    socketio.emit('queue_position', {'position': len(self._waiting)}, to=sid)
+                    outcome = 'queued'
+                else:
+                    outcome = 'shed'
+            self.counts[outcome] += 1
+
+        if outcome == 'admitted':
+            self.executor.submit(self._run, key, task, True)
+        elif outcome == 'shed':
+            # The caller's handler thread does the cheap fallback work itself
+            self._run(key, task, False)
+        return outcome
+
+    def drop(self, sid: str):
+        """Forget a disconnected socket's queued interview start; answers still run so a resume can replay them"""
+        with self._lock:
+            dropped = [key for key, _ in self._waiting if key[0] == sid and key[1] == 'start_interview']
+            if not dropped:
+                return
+            self._waiting = deque(entry for entry in self._waiting if entry[0] not in dropped)
+            self._pending.difference_update(dropped)
+            self._announce_positions()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'active': self.active, 'waiting': len(self._waiting), **self.counts}
+
+    def _run(self, key: tuple, task: Callable[[bool], None], use_model: bool):
+        try:
+            task(use_model)
+        except Exception as e:
+            print(f"Error processing request for {key[0]}: {e}")
+            socketio.emit('error', {'message': 'Something went wrong while processing your request'}, to=key[0])
+        finally:
+            self._finish(key, use_model)
+
+    def _finish(self, key: tuple, used_slot: bool):
+        with self._lock:
+            self._pending.discard(key)
+            if not used_slot:
+                return
+            if not self._waiting:
+                self.active -= 1
+                return
+            # Hand the slot straight to the next waiting request
+            next_key, next_task = self._waiting.popleft()
+            socketio.emit('queue_position', {'position': 0}, to=next_key[0])
+            self._announce_positions()
+        self.executor.submit(self._run, next_key, next_task, True)
+
+    def _announce_positions(self):
+        # Called with the lock held so clients never see positions out of order
+        for position, (key, _) in enumerate(self._waiting, start=1):
+            socketio.emit('queue_position', {'position': position}, to=key[0])
+
+admission = AdmissionQueue(ADMISSION_MAX_ACTIVE, ADMISSION_QUEUE_MAX, llm_executor)
+
+def release_socket_interview(sid: str):
+    """End the interview a socket already has before it starts another, so repeated starts leave no orphans"""
+    previous = interview_for_socket(sid)
+    if previous is None:
+        return
+    with socket_lock:
+        previous.sid = None
+        socket_interviews.pop(sid, None)
+    cancel_prefetch(previous)
+    previous.is_active = False
+    interview_sessions.delete(previous.session_id)
+
+def run_in_background(sid: str, task: Callable, *args):
+    """Run blocking agent work on the LLM pool and report failures to the requesting socket"""
+    def runner():
+        try:
+            task(*args)
+        except Exception as e:
+            print(f"Error processing request for {sid}: {e}")
+            socketio.emit('error', {'message': 'Something went wrong while processing your request'}, to=sid)
+
+    return llm_executor.submit(runner)
 
 @socketio.on('start_interview')
 def handle_start_interview(data):
-    session_id = request.sid
+    sid = request.sid
     candidate_name = data.get('name', 'Candidate')
     skill_level = data.get('skill_level', 'beginner')
+    adaptive = bool(data.get('adaptive', ADAPTIVE_INTERVIEWS))
+
+    # Use a pre-generated set when available so the welcome message goes out immediately
+    questions = question_bank.take(skill_level)
+    if questions is not None:
+        begin_interview(sid, candidate_name, skill_level, questions, adaptive)
+    else:
+        admission.submit(sid, 'start_interview',
+                         lambda use_model: start_interview_task(sid, candidate_name, skill_level, adaptive, use_model))
+
+def start_interview_task(sid: str, candidate_name: str, skill_level: str, adaptive: bool, use_model: bool = True):
+    """Generate questions using AI, then start the interview (runs on the LLM pool)"""
+    timings = []
+    if use_model:
+        with llm_metrics.track(timings):
+            questions = interview_agent.generate_questions(skill_level, num_questions=5)
+    else:
+        llm_metrics.record_fallback('generate')
+        questions = interview_agent._get_fallback_questions(skill_level)
+    begin_interview(sid, candidate_name, skill_level, questions, adaptive, timings)
 
+def begin_interview(sid: str, candidate_name: str, skill_level: str, questions: List[Dict],
+                    adaptive: bool = False, llm_timings: Optional[List[Dict]] = None):
+    """Create the interview state and send the welcome message"""
     state = InterviewState()
     state.candidate_name = candidate_name
     state.skill_level = skill_level
     state.is_active = True
-    
-    # Generate questions using AI
-    state.generated_questions = interview_agent.generate_questions(skill_level, num_questions=5)
-    
-    interview_sessions[session_id] = state
+    state.adaptive = adaptive
+    state.generated_questions = questions
+    state.llm_timings = llm_timings or []
+
+    release_socket_interview(sid)
+    interview_sessions[state.session_id] = state
+    attach_socket(state, sid)
     
     if state.generated_questions:
         first_question = state.generated_questions[0]
         welcome_message = f"Hello {candidate_name}! Welcome to your Excel mock interview. I'll be asking you {len(state.generated_questions)} questions about Excel at the {skill_level} level. Let's begin with our first question: {first_question['question']}"
 
-        emit('interview_started', {
+        send(state, 'interview_started', {
             'message': welcome_message,
             'question_number': 1,
-            'total_questions': len(state.generated_questions)
+            'total_questions': len(state.generated_questions),
+            # Sent back in resume_interview to pick the interview up from a new connection
+            'token': state.session_id
         })
     else:
-        emit('error', {'message': 'Could not generate interview questions'})
+        send(state, 'error', {'message': 'Could not generate interview questions'})
+
+@socketio.on('resume_interview')
+def handle_resume_interview(data):
+    """Reattach a reconnected client to its interview and replay where it stands"""
+    token = (data or {}).get('token', '')
+    state = interview_sessions.get(token) if token else None
+    if state is None:
+        # A finished interview is dropped once its report has been sent, but the transcript store keeps the report
+        report = transcript_store.get_session_report(token) if token and transcript_store.enabled else None
+        if report is not None:
+            emit('interview_complete', {'report': report, 'message': "Welcome back! Here's your performance report."})
+        else:
+            emit('resume_failed', {'message': 'That interview has expired. Please start a new one.'})
+        return
+    if socket_interviews.get(request.sid) != token:
+        # A socket follows one interview; otherwise two would send to it
+        release_socket_interview(request.sid)
+    attach_socket(state, request.sid)
+
+    if not state.is_active:
+        # Finished while the candidate was away; send the report again
+        report = state.final_report
+        if report is None:
+            # The narrative is still being written and goes to this socket when it is done
+            narrative = ready_narrative(state.report_draft)
+            report = interview_agent.build_report(state, *(narrative or ('', [])))
+            if narrative is None:
+                report['narrative_pending'] = True
+        emit('interview_complete', {'report': report, 'message': "Welcome back! Here's your performance report."})
+        return
+
+    current = state.current_question
+    question = state.generated_questions[current] if current < len(state.generated_questions) else None
+    emit('interview_resumed', {
+        'token': token,
+        'candidate_name': state.candidate_name,
+        'question': question['question'] if question else None,
+        'question_number': current + 1,
+        'total_questions': len(state.generated_questions),
+        # Held while an answer submitted before the drop is still being evaluated
+        'evaluating': state.lock.locked(),
+        'scores': [
+            {'question_number': n, 'topic': score.get('topic'), 'score': score.get('score', 0), 'feedback': score.get('feedback', '')}
+            for n, score in enumerate(state.scores, start=1)
+        ],
+        'progress': state.report.snapshot()
+    })
 
 @socketio.on('submit_response')
 def handle_response(data):
     """Handle candidate response and evaluate using AI"""
-    session_id = request.sid
     response_text = data.get('response', '')
-    
-    if session_id not in interview_sessions:
+    # Lets a repeated submit for a question that has already been answered be ignored
+    question_number = data.get('question_number')
+    if question_number is not None:
+        try:
+            question_number = int(question_number)
+        except (TypeError, ValueError):
+            emit('error', {'message': 'question_number must be a whole number'})
+            return
+
+    state = interview_for_socket(request.sid)
+    if state is None:
         emit('error', {'message': 'No active interview session'})
         return
     
-    state = interview_sessions[session_id]
     if not state.is_active:
         emit('error', {'message': 'Interview is not active'})
         return
 
-    if state.current_question >= len(state.generated_questions):
-        emit('error', {'message': 'No more questions available'})
-        return
+    if question_number is not None and question_number <= state.current_question:
+        return  # already answered; evaluate_response_task checks again under the lock
 
-    current_q = state.generated_questions[state.current_question]
+    admission.submit(request.sid, 'submit_response',
+                     lambda use_model: evaluate_response_task(state, response_text, question_number, use_model),
+                     request_id=question_number)
 
-    # Store response
-    state.responses.append({
-        'question': current_q['question'],
-        'response': response_text,
-        'timestamp': datetime.datetime.now()
-    })
+def schedule_prefetch(state: InterviewState):
+    """Speculatively generate the question after the current one while the candidate answers"""
+    index = state.current_question + 1
+    if not state.adaptive or not state.is_active or index >= len(state.generated_questions):
+        return
 
-    # Evaluate response using AI
-    evaluation = interview_agent.evaluate_response(
-        current_q['question'],
-        response_text,
-        current_q['topic'],
-        current_q['difficulty'],
-        current_q['weight']
+    direction = interview_agent.get_adaptive_direction(state.scores)
+    previous_questions = [q['question'] for q in state.generated_questions[:index]]
+    future = prefetch_executor.submit(
+        llm_metrics.run_tracked,
+        state.llm_timings,
+        interview_agent.generate_follow_up_question,
+        state.skill_level,
+        list(state.scores),
+        previous_questions,
+        direction
     )
+    state.prefetch = (index, direction, future)
+
+def apply_prefetch(state: InterviewState):
+    """Swap in the prefetched question if it is ready and still matches the running score"""
+    if state.prefetch is None:
+        return
+    index, direction, future = state.prefetch
+    state.prefetch = None
 
-    state.scores.append(evaluation)
-    state.current_question += 1
+    # Never wait on the speculation; the planned question is always a valid fallback
+    if index != state.current_question or not future.done() or future.cancelled():
+        future.cancel()
+        return
+    question = future.result()
+    if question is None or direction != interview_agent.get_adaptive_direction(state.scores):
+        return
 
-    # Check if interview is complete
-    if state.current_question >= len(state.generated_questions):
-        final_report = interview_agent.generate_final_report(state)
-        state.is_active = False
-        emit('interview_complete', {
-            'report': final_report,
-            'message': "Congratulations! You've completed the Excel mock interview. Here's your detailed performance report."
-        })
-    else:
-        next_question = state.generated_questions[state.current_question]
-        emit('next_question', {
-            'question': next_question['question'],
-            'question_number': state.current_question + 1,
-            'total_questions': len(state.generated_questions),
-            'feedback': evaluation.get('feedback', ''),
-            'score': evaluation.get('score', 0)
-        })
+    planned = state.generated_questions[index]
+    # Keep the planned weight so the maximum possible score doesn't shift mid-interview
+    question['weight'] = planned['weight']
+    state.generated_questions[index] = question
+
+def cancel_prefetch(state: InterviewState):
+    """Drop any speculative question generation for an interview that is ending"""
+    if state.prefetch is not None:
+        state.prefetch[2].cancel()
+        state.prefetch = None
+
+def cancel_report_draft(state: InterviewState):
+    """Drop the background narrative draft; only stops calls that haven't started, a running one finishes and is ignored"""
+    if state.report_draft is not None:
+        for future in state.report_draft[1:]:
+            future.cancel()
+
+def schedule_report_draft(state: InterviewState):
+    """Start drafting the report narrative from the answers so far, replacing any older draft"""
+    cancel_report_draft(state)
+    with llm_metrics.track(state.llm_timings):
+        futures = interview_agent.start_narrative(state.scores, state.report.percentage, state.skill_level)
+    state.report_draft = (len(state.scores), *futures)
+
+def ready_narrative(draft: Optional[tuple]) -> Optional[tuple]:
+    """(feedback, recommendations) of a draft whose calls have both finished, else None"""
+    if draft is None or not all(future.done() and not future.cancelled() for future in draft[1:]):
+        return None
+    return draft[1].result(), draft[2].result()
+
+def keep_final_report(state: InterviewState, report: Dict):
+    """Hold the finished report for resumes and queue it for the transcript store, before it is sent"""
+    state.final_report = report
+    interview_sessions.save(state.session_id, state)
+    transcript_store.append(report, state.session_id)
+
+def deliver_final_report(state: InterviewState, message: str, use_model: bool = True):
+    """Send the report from the running totals straight away, then the narrative if it is still being written
+
+    Never waits for the model: the narrative is sent from a callback when its
+    calls finish, so the worker (and its admission slot) is free straight away.
+    With use_model False (the last answer was shed) the narrative is canned.
+    """
+    if not use_model:
+        cancel_report_draft(state)
+        report = interview_agent.build_report(
+            state, *interview_agent.fallback_narrative(state.scores, state.report.percentage, state.skill_level)
+        )
+        keep_final_report(state, report)
+        send(state, 'interview_complete', {'report': report, 'message': message})
+        return
+
+    earlier = ready_narrative(state.report_draft)
+    if state.report_draft is None or state.report_draft[0] != len(state.scores):
+        schedule_report_draft(state)
+    draft = state.report_draft
+
+    current = ready_narrative(draft)
+    if current is not None:
+        report = interview_agent.build_report(state, *current)
+        keep_final_report(state, report)
+        send(state, 'interview_complete', {'report': report, 'message': message})
+        return
+
+    # A draft from one answer earlier stands in until the final narrative arrives
+    overall_feedback, recommendations = earlier or ('', [])
+    report = interview_agent.build_report(state, overall_feedback, recommendations)
+    report['narrative_pending'] = True
+    send(state, 'interview_complete', {'report': report, 'message': message})
+
+    def send_narrative(overall_feedback: str, recommendations: List[str]):
+        narrative = {
+            'overall_feedback': overall_feedback,
+            'recommendations': recommendations,
+            'timing_breakdown': LLMMetrics.summarize(state.llm_timings)
+        }
+        final_report = {**report, **narrative}
+        del final_report['narrative_pending']
+        keep_final_report(state, final_report)
+        send(state, 'report_narrative', narrative)
+
+    interview_agent.on_narrative(draft[1:], list(state.scores), state.report.percentage, state.skill_level, send_narrative)
+
+def evaluate_response_task(state: InterviewState, response_text: str, question_number: Optional[int] = None,
+                           use_model: bool = True):
+    """Evaluate a response and push the next question or final report (runs on the LLM pool)"""
+    with state.lock, llm_metrics.track(state.llm_timings):
+        if not state.is_active:
+            send(state, 'error', {'message': 'Interview is not active'})
+            return
+
+        if question_number is not None and question_number != state.current_question + 1:
+            print(f"Ignoring repeated answer to question {question_number} of {state.session_id}")
+            return
+
+        if state.current_question >= len(state.generated_questions):
+            send(state, 'error', {'message': 'No more questions available'})
+            return
+
+        current_q = state.generated_questions[state.current_question]
+
+        # Store response
+        state.responses.append(ResponseRecord(current_q['question'], response_text))
+
+        # Evaluate response using AI
+        if STREAM_EVALUATION and use_model:
+            question_number = state.current_question + 1
+            evaluation = interview_agent.evaluate_response_stream(
+                current_q['question'],
+                response_text,
+                current_q['topic'],
+                current_q['difficulty'],
+                current_q['weight'],
+                on_chunk=lambda update: send(state, 'feedback_chunk', {'question_number': question_number, **update})
+            )
+        else:
+            evaluation = interview_agent.evaluate_response(
+                current_q['question'],
+                response_text,
+                current_q['topic'],
+                current_q['difficulty'],
+                current_q['weight'],
+                use_model=use_model
+            )
+
+        state.scores.append(EvaluationRecord.from_dict(evaluation))
+        state.report.add(evaluation)
+        state.current_question += 1
+
+        # Check if interview is complete
+        if state.current_question >= len(state.generated_questions):
+            cancel_prefetch(state)
+            state.is_active = False
+            interview_sessions.save(state.session_id, state)
+            deliver_final_report(
+                state,
+                "Congratulations! You've completed the Excel mock interview. Here's your detailed performance report.",
+                use_model
+            )
+        else:
+            apply_prefetch(state)
+            interview_sessions.save(state.session_id, state)
+            next_question = state.generated_questions[state.current_question]
+            send(state, 'next_question', {
+                'question': next_question['question'],
+                'question_number': state.current_question + 1,
+                'total_questions': len(state.generated_questions),
+                'feedback': evaluation.get('feedback', ''),
+                'score': evaluation.get('score', 0)
+            })
+            send(state, 'report_progress', state.report.snapshot())
+            # Speculative work is the first thing to go when shedding load
+            if use_model:
+                schedule_prefetch(state)
+                # Earlier drafts would all be replaced before the report needs them
+                if REPORT_DRAFTS and state.current_question == len(state.generated_questions) - 1:
+                    schedule_report_draft(state)
 
 @socketio.on('end_interview')
 def handle_end_interview():
-    session_id = request.sid
-    if session_id in interview_sessions:
-        state = interview_sessions[session_id]
-        if state.responses:  # If at least one question was answered
-            final_report = interview_agent.generate_final_report(state)
-            emit('interview_complete', {
-                'report': final_report,
-                'message': "Interview ended early. Here's your performance report based on the questions you answered."
-            })
-        else:
-            emit('interview_ended', {'message': 'Interview ended. No responses to evaluate.'})
+    state = interview_for_socket(request.sid)
+    # An interview that has finished has already sent its report (or interview_ended)
+    if state is not None and state.is_active:
+        cancel_prefetch(state)
+        run_in_background(request.sid, end_interview_task, state)
+
+def end_interview_task(state: InterviewState):
+    """Build the report for an interview ended early (runs on the LLM pool)"""
+    # Waits for any in-flight evaluation so the report includes it
+    with state.lock, llm_metrics.track(state.llm_timings):
+        # A second End queued behind the first, or the last answer completed the interview meanwhile
+        if not state.is_active:
+            return
+        # An evaluation that finished while we waited may have started another prefetch
+        cancel_prefetch(state)
         state.is_active = False
+        interview_sessions.save(state.session_id, state)
+        if state.scores:  # If at least one question was answered
+            deliver_final_report(
+                state,
+                "Interview ended early. Here's your performance report based on the questions you answered."
+            )
+        else:
+            send(state, 'interview_ended', {'message': 'Interview ended. No responses to evaluate.'})
 
 if __name__ == '__main__':
-    print("use: http://localhost:5000")
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    port = int(os.getenv('PORT', '5000'))
+    # FLASK_DEBUG=0 turns off the reloader, e.g. when benchmark.py spawns the server
+    debug = os.getenv('FLASK_DEBUG', '1') == '1'
+    print(f"use: http://localhost:{port}")
+    socketio.run(app, debug=debug, host='0.0.0.0', port=port, allow_unsafe_werkzeug=True)
\ No newline at end of file
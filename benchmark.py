@@ -0,0 +1,701 @@
+"""Benchmarks for the interviewer.
+
+    python benchmark.py load --clients 50 --spawn
+    python benchmark.py memory --sessions 20000
+    python benchmark.py startup --runs 5
+    python benchmark.py cohort --reports 100000
+    python benchmark.py scale --workers 1 2 4
+
+load
+    Drives concurrent Socket.IO clients through full interviews
+    (start_interview -> submit_response x N -> interview_complete) and reports
+    p50/p95/p99 latency per event plus completed sessions per second. With
+    --spawn it starts app.py on the fake LLM backend first, so no API key or
+    network is needed.
+
+memory
+    Builds many finished interviews in memory and reports bytes per session for
+    the old dict-based layout and for the slotted records InterviewState keeps
+    now, measured with tracemalloc.
+
+startup
+    Times `import app` in fresh interpreters (what a cold start or new worker
+    pays before it can serve), lists the slowest imports from -X importtime,
+    and checks that LangChain was not loaded.
+
+cohort
+    Generates synthetic reports at 1k, 10k, ... up to --reports, loads them into
+    cohort.CohortColumns and times each aggregation, next to a plain Python
+    loop computing per-topic means over the same dicts.
+
+scale
+    Runs the multi-process mode from serve.py at each worker count against a
+    local stand-in broker (just enough of the Redis protocol for Socket.IO's
+    message queue and the redis session store) and the fake model, and reports
+    completed interviews per second. Clients are spread over the workers by
+    number, as a sticky load balancer would. Each worker has its own
+    LLM_MAX_WORKERS, so more workers also means more model calls at once; the
+    "total" rows split --llm-workers across the workers to show what the
+    processes themselves add, the "per-worker" rows give each worker that many.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import socketserver
+import subprocess
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+import uuid
+from typing import Dict, List, Optional
+
+ANSWERS = [
+    "I would select the range and use the SUM function, for example =SUM(B2:B20), then copy it across with absolute references where needed.",
+    "VLOOKUP takes the lookup value, the table range, the column index and FALSE for an exact match, so I'd use it to pull prices from a product sheet.",
+    "I would insert a Pivot Table from the data, drag Region to rows and Sales to values, then add a slicer for the month.",
+    "Conditional formatting with a formula rule like =C2<0 lets me highlight negative balances in red.",
+    "I don't know",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def print_latency_table(latencies: Dict[str, List[float]]):
+    print(f"{'event':<40}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for event, values in sorted(latencies.items()):
+        print(f"{event:<40}{len(values):>7}"
+              f"{percentile(values, 50) * 1000:>10.0f}{percentile(values, 95) * 1000:>10.0f}"
+              f"{percentile(values, 99) * 1000:>10.0f}{max(values) * 1000:>10.0f}")
+
+
+def wait_for_server(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return
+        except Exception:
+            time.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not come up within {timeout:.0f}s")
+
+
+def spawn_server(port: int, extra_env: Dict[str, str]) -> subprocess.Popen:
+    """Start app.py on the fake LLM backend"""
+    env = dict(os.environ, LLM_BACKEND='fake', PORT=str(port), FLASK_DEBUG='0', **extra_env)
+    return subprocess.Popen([sys.executable, 'app.py'], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class InterviewClient:
+    """One candidate running a whole interview over Socket.IO, timing each server reply"""
+
+    def __init__(self, url: str, client_id: int, skill_level: str, timeout: float, unique_answers: bool):
+        import socketio
+        self.url = url
+        self.client_id = client_id
+        self.skill_level = skill_level
+        self.timeout = timeout
+        self.unique_answers = unique_answers
+        self.latencies: Dict[str, List[float]] = {}
+        self.error = None
+        self.completed = False
+        self.queued = 0
+        self.fallbacks = 0
+        self._reply = threading.Event()
+        self._reply_event = None
+        self._reply_data = None
+        self._sent_at = 0.0
+        self._first_chunk_seen = False
+        self._queued_seen = False
+        self.sio = socketio.Client(reconnection=False)
+        for event in ('interview_started', 'next_question', 'interview_complete', 'interview_ended', 'error'):
+            self.sio.on(event, self._make_handler(event))
+        self.sio.on('feedback_chunk', self._on_feedback_chunk)
+        self.sio.on('queue_position', self._on_queue_position)
+
+    def _make_handler(self, event: str):
+        def handler(data=None):
+            self._reply_event = event
+            self._reply_data = data or {}
+            self._reply.set()
+        return handler
+
+    def _on_queue_position(self, data=None):
+        # A queued request gets an update each time the queue moves; count the request once
+        if data and data.get('position') and not self._queued_seen:
+            self._queued_seen = True
+            self.queued += 1
+
+    def _on_feedback_chunk(self, data=None):
+        if not self._first_chunk_seen:
+            self._first_chunk_seen = True
+            self._record('submit_response->first_feedback_chunk', time.perf_counter() - self._sent_at)
+
+    def _record(self, name: str, seconds: float):
+        self.latencies.setdefault(name, []).append(seconds)
+
+    def _request(self, event: str, data) -> str:
+        self._reply.clear()
+        self._first_chunk_seen = False
+        self._queued_seen = False
+        self._sent_at = time.perf_counter()
+        self.sio.emit(event, data)
+        if not self._reply.wait(self.timeout):
+            raise TimeoutError(f"no reply to {event} within {self.timeout:.0f}s")
+        reply = self._reply_event
+        self._record(f"{event}->{reply}", time.perf_counter() - self._sent_at)
+        if reply == 'error':
+            raise RuntimeError(f"server error after {event}")
+        return reply
+
+    def run(self):
+        try:
+            self.sio.connect(self.url)
+            reply = self._request('start_interview', {'name': f'bench-{self.client_id}', 'skill_level': self.skill_level})
+            rng = random.Random(self.client_id)
+            while reply in ('interview_started', 'next_question'):
+                answer = rng.choice(ANSWERS)
+                if self.unique_answers:
+                    # Keeps the evaluation cache from hiding model latency
+                    answer = f"{answer} (candidate {self.client_id}, {rng.randint(0, 10 ** 6)})"
+                reply = self._request('submit_response', {'response': answer,
+                                                          'question_number': self._reply_data.get('question_number')})
+            self.completed = reply == 'interview_complete'
+            if self.completed:
+                self.fallbacks = sum(1 for score in self._reply_data['report']['detailed_scores']
+                                     if score.get('feedback', '').startswith('Response evaluated using fallback'))
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if self.sio.connected:
+                self.sio.disconnect()
+
+
+WORDS = ("formula range lookup column table pivot reference absolute relative criteria sheet workbook value "
+         "error filter chart format condition array match index sum average count data validation list "
+         "explains correctly example practical clear missing detail deeper scenario mentions approach").split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def synthetic_interview(rng: random.Random, questions: int = 5) -> Dict:
+    """Plain data for one finished interview, with answer and feedback lengths like real ones"""
+    topics = ["VLOOKUP", "Pivot Tables", "Conditional Formatting", "Data Validation", "Error Handling"]
+    generated = [{"question": sentence(rng, 18), "topic": topics[i % len(topics)], "difficulty": rng.randint(4, 8),
+                  "weight": rng.randint(5, 15)} for i in range(questions)]
+    answers, evaluations = [], []
+    for question in generated:
+        answers.append(' '.join(sentence(rng, 14) for _ in range(rng.randint(2, 5))))
+        score = rng.randint(3, 9)
+        evaluations.append({
+            "score": score, "raw_score": score, "technical_accuracy": score, "communication_clarity": score,
+            "completeness": score, "practical_understanding": score, "confidence": rng.randint(5, 10),
+            "feedback": ' '.join(sentence(rng, 16) for _ in range(3)),
+            "suggestions": ' '.join(sentence(rng, 14) for _ in range(2)),
+            "strengths": sentence(rng, 14), "areas_for_improvement": sentence(rng, 16),
+            "weighted_score": score / 10 * question["weight"], "max_possible": question["weight"],
+            "topic": question["topic"], "difficulty": question["difficulty"]
+        })
+    timings = [{"call_type": "evaluate", "seconds": 1.2, "input_tokens": 900, "cached_input_tokens": 0,
+                "output_tokens": 250, "error": False} for _ in range(questions)]
+    return {"questions": generated, "answers": answers, "evaluations": evaluations, "timings": timings}
+
+
+class LegacyInterviewState:
+    """The dict-based layout InterviewState used before its records were slotted"""
+
+    def __init__(self):
+        self.session_id = str(uuid.uuid4())
+        self.current_question = 0
+        self.questions_asked = []
+        self.responses = []
+        self.scores = []
+        self.start_time = datetime.datetime.now()
+        self.is_active = False
+        self.candidate_name = ""
+        self.skill_level = "beginner"
+        self.generated_questions = []
+        self.lock = threading.Lock()
+        self.adaptive = False
+        self.prefetch = None
+        self.llm_timings = []
+
+
+def build_legacy(interview: Dict):
+    state = LegacyInterviewState()
+    state.generated_questions = interview["questions"]
+    for question, answer, evaluation in zip(interview["questions"], interview["answers"], interview["evaluations"]):
+        state.responses.append({'question': question['question'], 'response': answer, 'timestamp': datetime.datetime.now()})
+        state.scores.append(evaluation)
+    state.current_question = len(state.scores)
+    state.llm_timings = interview["timings"]
+    return state
+
+
+def build_compact(interview: Dict):
+    from app import EvaluationRecord, InterviewState, ResponseRecord
+    state = InterviewState()
+    state.generated_questions = interview["questions"]
+    for question, answer, evaluation in zip(interview["questions"], interview["answers"], interview["evaluations"]):
+        state.responses.append(ResponseRecord(question['question'], answer))
+        state.scores.append(EvaluationRecord.from_dict(evaluation))
+        state.report.add(evaluation)
+    state.current_question = len(state.scores)
+    state.llm_timings = interview["timings"]
+    return state
+
+
+def measure_sessions(build, count: int, seed: int) -> float:
+    """Bytes allocated per retained session; the raw inputs are freed as each one is built"""
+    rng = random.Random(seed)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = [build(synthetic_interview(rng)) for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del sessions
+    return used / count
+
+
+def run_memory(args) -> int:
+    # Importing app must not need an API key
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    import app  # noqa: F401  (imported before measuring so module setup isn't counted)
+
+    legacy = measure_sessions(build_legacy, args.sessions, args.seed)
+    compact = measure_sessions(build_compact, args.sessions, args.seed)
+    print(f"{args.sessions} finished 5-question interviews")
+    print(f"{'layout':<12}{'bytes/session':>15}{'MB total':>12}")
+    for name, per_session in (('dicts', legacy), ('slotted', compact)):
+        print(f"{name:<12}{per_session:>15,.0f}{per_session * args.sessions / 2 ** 20:>12.1f}")
+    print(f"reduction: {(1 - compact / legacy) * 100:.0f}%")
+    return 0
+
+
+def synthetic_report(rng: random.Random, skill_levels=('beginner', 'intermediate', 'advanced')) -> Dict:
+    """A report as build_report produces it, without the long text fields"""
+    topics = ["VLOOKUP", "Pivot Tables", "Conditional Formatting", "Data Validation", "Error Handling",
+              "INDEX/MATCH", "Array Formulas", "Charts", "Cell References", "Power Query"]
+    ability = rng.gauss(6, 1.5)
+    detailed = []
+    for _ in range(rng.randint(3, 8)):
+        difficulty = rng.randint(2, 9)
+        score = max(1, min(10, round(ability - (difficulty - 5) * 0.4 + rng.gauss(0, 1))))
+        detailed.append({
+            "score": score, "raw_score": score,
+            **{field: max(1, min(10, score + rng.randint(-1, 1)))
+               for field in ('technical_accuracy', 'communication_clarity', 'completeness', 'practical_understanding')},
+            "feedback": "Synthetic feedback.", "topic": rng.choice(topics), "difficulty": difficulty
+        })
+    average = sum(score['score'] for score in detailed) / len(detailed)
+    return {
+        "candidate_name": f"candidate {rng.randint(1, 10 ** 6)}", "skill_level": rng.choice(skill_levels),
+        "percentage": round(average * 10, 1), "average_raw_score": round(average, 1),
+        "questions_answered": len(detailed), "detailed_scores": detailed,
+        "completed_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    }
+
+
+def python_topic_means(reports: List[Dict]) -> Dict[str, float]:
+    """Per-topic mean score with dict loops, for comparison"""
+    totals = {}
+    for report in reports:
+        for score in report['detailed_scores']:
+            total = totals.setdefault(score['topic'], [0.0, 0])
+            total[0] += score['score']
+            total[1] += 1
+    return {topic: score_sum / count for topic, (score_sum, count) in totals.items()}
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def run_cohort(args) -> int:
+    from cohort import CohortColumns
+
+    sizes = []
+    size = 1000
+    while size < args.reports:
+        sizes.append(size)
+        size *= 10
+    sizes.append(args.reports)
+
+    rng = random.Random(args.seed)
+    reports = [synthetic_report(rng) for _ in range(args.reports)]
+    print(f"{'reports':>9}{'answers':>10}{'load s':>9}{'topics ms':>11}{'scores ms':>11}{'pctile ms':>11}"
+          f"{'levels ms':>11}{'filter ms':>11}{'py topics ms':>14}")
+    for size in sizes:
+        subset = reports[:size]
+        started = time.perf_counter()
+        columns = CohortColumns.from_reports(subset)
+        load = time.perf_counter() - started
+        print(f"{size:>9,}{columns.answers:>10,}{load:>9.2f}"
+              f"{timed(columns.topic_means) * 1000:>11.1f}"
+              f"{timed(columns.subscore_distributions) * 1000:>11.1f}"
+              f"{timed(columns.adjusted_percentiles) * 1000:>11.1f}"
+              f"{timed(columns.proficiency) * 1000:>11.1f}"
+              f"{timed(columns.select, 'intermediate', '2025-03-01', '2025-09-30') * 1000:>11.1f}"
+              f"{timed(python_topic_means, subset) * 1000:>14.1f}")
+    return 0
+
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'langchain_loaded': sorted({name.split('.')[0] for name in sys.modules if name.startswith('langchain')})
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[tuple]:
+    """(cumulative microseconds, nesting level, module) for each line of -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Each nesting level indents the name by two spaces after the separator's one
+        level = (len(name) - 1 - len(name.lstrip())) // 2
+        modules.append((int(cumulative), level, name.strip()))
+    return modules
+
+
+def run_startup(args) -> int:
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, LLM_BACKEND=args.backend, LLM_PRELOAD='false', QUESTION_BANK_SIZE='0',
+                   TRANSCRIPT_DB_PATH=os.path.join(tmp, 'transcripts.db'))
+        timings, modules, loaded = [], [], []
+        for _ in range(args.runs):
+            result = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORT_PROBE], env=env, cwd=root,
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import app failed")
+                return 1
+            probe = json.loads(result.stdout.strip().splitlines()[-1])
+            timings.append(probe['seconds'])
+            loaded = probe['langchain_loaded']
+            modules = parse_importtime(result.stderr)
+
+    print(f"import app: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms over {args.runs} runs")
+    print(f"LangChain modules loaded at import: {', '.join(loaded) if loaded else 'none'}")
+    print("\nslowest imports made directly by app.py (cumulative, last run):")
+    # Level 1 under app, so a package's own dependencies aren't counted twice
+    direct = [(us, name) for us, level, name in modules if level == 1]
+    for us, name in sorted(direct, reverse=True)[:args.top]:
+        print(f"{us / 1000:>10.1f} ms  {name}")
+    return 0 if not loaded else 1
+
+
+class StandInBroker:
+    """Enough of the Redis protocol for the app's message queue and session store, so scale runs need no Redis
+
+    Supports HELLO (RESP2 or 3), SUBSCRIBE/UNSUBSCRIBE/PUBLISH and
+    GET/SET/DEL; anything else is acknowledged with OK.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.channels: Dict[bytes, set] = {}
+        self.values: Dict[bytes, bytes] = {}
+        self.lock = threading.Lock()
+        broker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                broker.serve(self.rfile, self.wfile)
+
+        server_class = type('BrokerServer', (socketserver.ThreadingTCPServer,), {'daemon_threads': True, 'allow_reuse_address': True})
+        self.server = server_class((host, port), Handler)
+        self.url = f"redis://{host}:{self.server.server_address[1]}/0"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def encode(value, array_type: bytes = b'*') -> bytes:
+        if value is None:
+            return b'$-1\r\n'
+        if isinstance(value, int):
+            return b':%d\r\n' % value
+        if isinstance(value, list):
+            return array_type + b'%d\r\n' % len(value) + b''.join(StandInBroker.encode(item) for item in value)
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+    @staticmethod
+    def read_command(rfile) -> Optional[List[bytes]]:
+        line = rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(rfile.readline()[1:])
+            args.append(rfile.read(size + 2)[:-2])
+        return args
+
+    def serve(self, rfile, wfile):
+        write_lock = threading.Lock()
+
+        def send(data: bytes):
+            with write_lock:
+                wfile.write(data)
+                wfile.flush()
+
+        subscribed = set()
+        # RESP3 clients (HELLO 3) get pub/sub messages as push frames
+        push_type = b'*'
+        try:
+            while True:
+                command = self.read_command(rfile)
+                if command is None:
+                    break
+                if not command:
+                    continue
+                name, args = command[0].upper(), command[1:]
+                if name in (b'SUBSCRIBE', b'UNSUBSCRIBE'):
+                    for channel in args:
+                        with self.lock:
+                            if name == b'SUBSCRIBE':
+                                self.channels.setdefault(channel, set()).add((send, push_type))
+                                subscribed.add(channel)
+                            else:
+                                self.channels.get(channel, set()).discard((send, push_type))
+                                subscribed.discard(channel)
+                        send(self.encode([name.lower(), channel, len(subscribed)], push_type))
+                elif name == b'PUBLISH':
+                    with self.lock:
+                        receivers = list(self.channels.get(args[0], ()))
+                    for receiver, receiver_push_type in receivers:
+                        try:
+                            receiver(self.encode([b'message', args[0], args[1]], receiver_push_type))
+                        except OSError:
+                            pass
+                    send(self.encode(len(receivers)))
+                elif name == b'GET':
+                    with self.lock:
+                        value = self.values.get(args[0])
+                    # RESP3 has its own null; a RESP2 null bulk string leaves the client waiting
+                    send(b'_\r\n' if value is None and push_type == b'>' else self.encode(value))
+                elif name == b'SET':
+                    with self.lock:
+                        self.values[args[0]] = args[1]
+                    send(b'+OK\r\n')
+                elif name == b'DEL':
+                    with self.lock:
+                        removed = sum(self.values.pop(key, None) is not None for key in args)
+                    send(self.encode(removed))
+                elif name == b'HELLO':
+                    protocol = int(args[0]) if args else 2
+                    push_type = b'>' if protocol == 3 else b'*'
+                    fields = [b'server', b'stand-in', b'proto', protocol]
+                    send((b'%2\r\n' if protocol == 3 else b'*4\r\n') + b''.join(self.encode(field) for field in fields))
+                elif name == b'PING':
+                    send(b'+PONG\r\n')
+                else:
+                    send(b'+OK\r\n')
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self.lock:
+                for channel in subscribed:
+                    self.channels.get(channel, set()).discard((send, push_type))
+
+
+def run_clients(urls: List[str], count: int, skill_level: str, timeout: float, ramp: float) -> tuple:
+    """Run count interviews, client i on urls[i % len(urls)]; returns (clients, elapsed seconds)"""
+    clients = [InterviewClient(urls[i % len(urls)], i, skill_level, timeout, True) for i in range(count)]
+    threads = [threading.Thread(target=client.run) for client in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        time.sleep(ramp / max(1, count))
+    for thread in threads:
+        thread.join()
+    return clients, time.perf_counter() - started
+
+
+def run_scale(args) -> int:
+    import serve
+
+    broker = StandInBroker()
+    rows = []
+    modes = ('total', 'per-worker') if args.concurrency == 'both' else (args.concurrency,)
+    runs = [(mode, workers) for mode in modes for workers in args.workers]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for run, (mode, workers) in enumerate(runs):
+                llm_workers = max(1, args.llm_workers // workers) if mode == 'total' else args.llm_workers
+                options = serve.build_parser().parse_args([
+                    '--workers', str(workers), '--base-port', str(args.base_port), '--message-queue', broker.url,
+                    '--server', args.server
+                ])
+                env = {
+                    'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': str(args.fake_latency),
+                    'LLM_MAX_WORKERS': str(llm_workers), 'ADMISSION_QUEUE_MAX': '100000',
+                    'SESSION_BACKEND': 'redis', 'TRANSCRIPT_DB_PATH': os.path.join(tmp, f'transcripts-{run}.db'),
+                    'EVAL_CACHE_SIZE': '0', 'SIMILAR_ANSWER_THRESHOLD': '0', 'LLM_PRELOAD': 'false'
+                }
+                processes = serve.start_workers(options, env, quiet=True)
+                try:
+                    urls = [f"http://127.0.0.1:{port}" for port in processes]
+                    for url in urls:
+                        wait_for_server(url + '/ready')
+                    clients, elapsed = run_clients(urls, args.clients, args.skill_level, args.timeout, args.ramp)
+                finally:
+                    serve.stop_workers(processes)
+
+                latencies = [value for client in clients for value in client.latencies.get('submit_response->next_question', [])]
+                completed = sum(client.completed for client in clients)
+                rows.append((mode, workers, workers * llm_workers, completed, elapsed, latencies,
+                             sum(1 for client in clients if client.error)))
+    finally:
+        broker.close()
+
+    print(f"{args.clients} interviews per run, fake model {args.fake_latency}s, --llm-workers {args.llm_workers}; "
+          f"speedup is against the first row of the same concurrency mode")
+    print(f"{'concurrency':>12}{'workers':>8}{'model calls':>12}{'completed':>11}{'seconds':>9}{'sessions/s':>12}"
+          f"{'speedup':>9}{'p50 ms':>9}{'p95 ms':>9}{'failed':>8}")
+    bases = {}
+    for mode, workers, model_calls, completed, elapsed, latencies, failed in rows:
+        throughput = completed / elapsed
+        base = bases.setdefault(mode, throughput) or 1.0
+        print(f"{mode:>12}{workers:>8}{model_calls:>12}{completed:>11}{elapsed:>9.1f}{throughput:>12.2f}"
+              f"{throughput / base:>8.1f}x{percentile(latencies, 50) * 1000:>9.0f}"
+              f"{percentile(latencies, 95) * 1000:>9.0f}{failed:>8}")
+    return 0 if all(row[6] == 0 for row in rows) else 1
+
+
+def run_load(args) -> int:
+    server = data_dir = None
+    if args.spawn:
+        # Reports from the run go to a throwaway store, not the repository's transcripts.db
+        data_dir = tempfile.TemporaryDirectory()
+        extra_env = {'FAKE_LLM_LATENCY': str(args.fake_latency), 'FAKE_LLM_ERROR_RATE': str(args.fake_error_rate),
+                     'TRANSCRIPT_DB_PATH': os.path.join(data_dir.name, 'transcripts.db')}
+        if args.admission_max_active:
+            extra_env['ADMISSION_MAX_ACTIVE'] = str(args.admission_max_active)
+        if args.admission_queue_max is not None:
+            extra_env['ADMISSION_QUEUE_MAX'] = str(args.admission_queue_max)
+        server = spawn_server(args.port, extra_env)
+        args.url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_for_server(args.url)
+        clients = [
+            InterviewClient(args.url, i, args.skill_level, args.timeout, not args.allow_cache_hits)
+            for i in range(args.clients)
+        ]
+        threads = [threading.Thread(target=client.run) for client in clients]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+            # Spread connects over the ramp period instead of a thundering herd
+            time.sleep(args.ramp / max(1, args.clients))
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies: Dict[str, List[float]] = {}
+        for client in clients:
+            for name, values in client.latencies.items():
+                latencies.setdefault(name, []).extend(values)
+        completed = sum(client.completed for client in clients)
+        errors = [client.error for client in clients if client.error]
+
+        print(f"{args.clients} clients, {completed} interviews completed in {elapsed:.1f}s "
+              f"({completed / elapsed:.2f} sessions/s)")
+        print_latency_table(latencies)
+        print(f"requests queued: {sum(client.queued for client in clients)}, "
+              f"answers graded by fallback (errors or load shedding): {sum(client.fallbacks for client in clients)}")
+        if errors:
+            print(f"{len(errors)} clients failed, e.g. {errors[0]}")
+        return 0 if not errors else 1
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if data_dir is not None:
+            data_dir.cleanup()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Interviewer benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load = subparsers.add_parser('load', help="concurrent Socket.IO interview load test")
+    load.add_argument('--url', default='http://localhost:5000')
+    load.add_argument('--clients', type=int, default=20)
+    load.add_argument('--skill-level', default='intermediate')
+    load.add_argument('--ramp', type=float, default=2.0, help="seconds over which clients connect")
+    load.add_argument('--timeout', type=float, default=120.0, help="seconds to wait for each reply")
+    load.add_argument('--allow-cache-hits', action='store_true', help="reuse answers verbatim across clients")
+    load.add_argument('--spawn', action='store_true', help="start app.py with the fake LLM backend")
+    load.add_argument('--port', type=int, default=5055, help="port for --spawn")
+    load.add_argument('--fake-latency', type=float, default=0.5, help="median fake LLM latency for --spawn")
+    load.add_argument('--fake-error-rate', type=float, default=0.0, help="fake LLM error rate for --spawn")
+    load.add_argument('--admission-max-active', type=int, default=0, help="ADMISSION_MAX_ACTIVE for --spawn")
+    load.add_argument('--admission-queue-max', type=int, help="ADMISSION_QUEUE_MAX for --spawn")
+    load.set_defaults(func=run_load)
+
+    memory = subparsers.add_parser('memory', help="memory per retained interview session")
+    memory.add_argument('--sessions', type=int, default=10000)
+    memory.add_argument('--seed', type=int, default=7)
+    memory.set_defaults(func=run_memory)
+
+    startup = subparsers.add_parser('startup', help="cold import time of app.py")
+    startup.add_argument('--runs', type=int, default=5)
+    startup.add_argument('--top', type=int, default=15, help="slowest imports to list")
+    startup.add_argument('--backend', default='gemini', help="LLM_BACKEND during the import")
+    startup.set_defaults(func=run_startup)
+
+    cohort = subparsers.add_parser('cohort', help="cohort analytics over many stored reports")
+    cohort.add_argument('--reports', type=int, default=100000)
+    cohort.add_argument('--seed', type=int, default=7)
+    cohort.set_defaults(func=run_cohort)
+
+    scale = subparsers.add_parser('scale', help="throughput of the multi-process mode by worker count")
+    scale.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    scale.add_argument('--clients', type=int, default=64)
+    scale.add_argument('--skill-level', default='intermediate')
+    scale.add_argument('--ramp', type=float, default=1.0, help="seconds over which clients connect")
+    scale.add_argument('--timeout', type=float, default=120.0, help="seconds to wait for each reply")
+    scale.add_argument('--fake-latency', type=float, default=0.2, help="median fake LLM latency")
+    scale.add_argument('--llm-workers', type=int, default=4,
+                       help="model calls at once: split across the workers for 'total', each worker's for 'per-worker'")
+    scale.add_argument('--concurrency', choices=('total', 'per-worker', 'both'), default='both',
+                       help="hold total model concurrency fixed, give each worker --llm-workers, or run both")
+    scale.add_argument('--base-port', type=int, default=5101)
+    scale.add_argument('--server', choices=('gunicorn', 'builtin'), default='gunicorn')
+    scale.set_defaults(func=run_scale)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
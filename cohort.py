@@ -0,0 +1,313 @@
+"""Columnar analytics across many interview reports.
+
+A report carries its own topic breakdown and averages, which is enough for one
+candidate. Dashboards need the same figures across thousands of interviews.
+CohortColumns loads reports (the JSON the app produces and stores) into flat
+NumPy arrays once: one row per report and one per answered question. Every
+aggregation then runs as a handful of vectorized operations, without looping
+over dicts:
+
+    topic_means()           average score and sub-scores per topic
+    subscore_distributions() mean, spread, percentiles and 1-10 histogram per score field
+    adjusted_percentiles()  each report's percentile once question difficulty is accounted for
+    proficiency()           reports per proficiency level and where each cut-off falls in the cohort
+
+Usage:
+    python cohort.py transcripts/ --skill-level intermediate
+    python cohort.py --db transcripts.db --since 2025-09-01
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SCORE_FIELDS = ('score', 'technical_accuracy', 'communication_clarity', 'completeness', 'practical_understanding')
+
+# Lowest average raw score for each level, as in RunningReport.proficiency
+PROFICIENCY_CUTOFFS = (('Advanced', 8.5), ('Intermediate', 7.0), ('Basic', 5.5), ('Beginner', 0.0))
+
+
+class _Codes:
+    """Maps strings to small integer codes, so categorical columns are plain int arrays"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class CohortColumns:
+    """Reports and their answers as parallel arrays
+
+    Report columns (one entry per report): skill_level (codes into
+    skill_levels), percentage, average_raw_score, date. Answer columns (one
+    entry per answered question): report (row of the report it belongs to),
+    topic (codes into topics), difficulty, and one array per SCORE_FIELDS
+    entry. Missing numbers are NaN; older reports lack some sub-scores.
+    """
+
+    def __init__(self, skill_levels: List[str], topics: List[str], skill_level: np.ndarray, percentage: np.ndarray,
+                 average_raw_score: np.ndarray, date: np.ndarray, report: np.ndarray, topic: np.ndarray,
+                 difficulty: np.ndarray, scores: Dict[str, np.ndarray]):
+        self.skill_levels = skill_levels
+        self.topics = topics
+        self.skill_level = skill_level
+        self.percentage = percentage
+        self.average_raw_score = average_raw_score
+        self.date = date
+        self.report = report
+        self.topic = topic
+        self.difficulty = difficulty
+        self.scores = scores
+
+    @property
+    def reports(self) -> int:
+        return len(self.percentage)
+
+    @property
+    def answers(self) -> int:
+        return len(self.report)
+
+    @classmethod
+    def from_reports(cls, reports: Iterable[Dict]) -> 'CohortColumns':
+        """Build the columns from report dicts; a completed_date key, as stored, is used when generated_date is absent"""
+        skill_levels, topics = _Codes(), _Codes()
+        report_skill, percentage, average, dates = [], [], [], []
+        answer_report, answer_topic, difficulty = [], [], []
+        scores = {field: [] for field in SCORE_FIELDS}
+
+        for row, report in enumerate(reports):
+            report_skill.append(skill_levels.code(report.get('skill_level') or 'unknown'))
+            percentage.append(_number(report.get('percentage')))
+            average.append(_number(report.get('average_raw_score')))
+            dates.append(str(report.get('generated_date') or report.get('completed_date') or 'NaT')[:10])
+            for answer in report.get('detailed_scores', []):
+                answer_report.append(row)
+                answer_topic.append(topics.code(answer.get('topic') or 'Unknown'))
+                difficulty.append(_number(answer.get('difficulty')))
+                for field, values in scores.items():
+                    values.append(_number(answer.get(field)))
+
+        columns = cls(
+            skill_levels.names, topics.names,
+            np.array(report_skill, dtype=np.int32),
+            np.array(percentage, dtype=np.float32),
+            np.array(average, dtype=np.float32),
+            np.array(dates, dtype='datetime64[D]'),
+            np.array(answer_report, dtype=np.int32),
+            np.array(answer_topic, dtype=np.int32),
+            np.array(difficulty, dtype=np.float32),
+            {field: np.array(values, dtype=np.float32) for field, values in scores.items()}
+        )
+        columns._fill_average_raw_score()
+        return columns
+
+    def _fill_average_raw_score(self):
+        # Old reports have no average_raw_score; derive it from their answers
+        missing = np.isnan(self.average_raw_score)
+        if missing.any():
+            means = self._per_report_mean(self.scores['score'])
+            self.average_raw_score[missing] = means[missing]
+
+    def _per_report_mean(self, values: np.ndarray) -> np.ndarray:
+        present = ~np.isnan(values)
+        sums = np.bincount(self.report[present], weights=values[present], minlength=self.reports)
+        counts = np.bincount(self.report[present], minlength=self.reports)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (sums / counts).astype(np.float32)
+
+    def select(self, skill_level: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None) -> 'CohortColumns':
+        """Reports (and their answers) matching all the given filters; dates are YYYY-MM-DD and inclusive"""
+        keep = np.ones(self.reports, dtype=bool)
+        if skill_level is not None:
+            code = self.skill_levels.index(skill_level) if skill_level in self.skill_levels else -1
+            keep &= self.skill_level == code
+        if since:
+            keep &= self.date >= np.datetime64(since, 'D')
+        if until:
+            keep &= self.date <= np.datetime64(until, 'D')
+
+        # Renumber the kept reports 0..n-1 so answer rows still point at them
+        new_row = np.cumsum(keep) - 1
+        answer_keep = keep[self.report]
+        return CohortColumns(
+            self.skill_levels, self.topics, self.skill_level[keep], self.percentage[keep],
+            self.average_raw_score[keep], self.date[keep], new_row[self.report[answer_keep]].astype(np.int32),
+            self.topic[answer_keep], self.difficulty[answer_keep],
+            {field: values[answer_keep] for field, values in self.scores.items()}
+        )
+
+    def topic_means(self) -> Dict[str, Dict]:
+        """Answers and mean of each score field per topic, topics with the lowest average score first"""
+        counts = np.bincount(self.topic, minlength=len(self.topics))
+        means = {}
+        for field, values in self.scores.items():
+            present = ~np.isnan(values)
+            sums = np.bincount(self.topic[present], weights=values[present], minlength=len(self.topics))
+            field_counts = np.bincount(self.topic[present], minlength=len(self.topics))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[field] = sums / field_counts
+
+        order = np.argsort(means['score'])
+        return {
+            self.topics[code]: {
+                'answers': int(counts[code]),
+                **{f'average_{field}': _rounded(means[field][code]) for field in self.scores}
+            }
+            for code in order if counts[code]
+        }
+
+    def subscore_distributions(self, percentiles: Tuple[int, ...] = (10, 25, 50, 75, 90)) -> Dict[str, Dict]:
+        """Mean, standard deviation, percentiles and a 1-10 histogram of every score field"""
+        distributions = {}
+        for field, values in self.scores.items():
+            values = values[~np.isnan(values)]
+            if not len(values):
+                distributions[field] = {'answers': 0}
+                continue
+            histogram = np.bincount(np.clip(np.rint(values), 0, 10).astype(np.int64), minlength=11)
+            distributions[field] = {
+                'answers': int(len(values)),
+                'mean': _rounded(values.mean()),
+                'std': _rounded(values.std()),
+                'percentiles': {str(p): _rounded(v) for p, v in zip(percentiles, np.percentile(values, percentiles))},
+                # Index is the score; a few old evaluations used 0
+                'histogram': histogram.tolist()
+            }
+        return distributions
+
+    def adjusted_percentiles(self) -> np.ndarray:
+        """Percentile (0-100) of each report by how far its scores beat the cohort average at the same difficulties
+
+        Each answer's score is compared with the mean score of all answers at
+        the same (rounded) difficulty, so a candidate who was asked harder
+        questions isn't ranked below one who got easier ones for the same raw
+        scores. Answers with no difficulty, or one outside 0-10, are compared
+        with each other. Reports without scored answers get NaN.
+        """
+        score = self.scores['score']
+        scored = ~np.isnan(score)
+        rounded = np.rint(self.difficulty)
+        # Level 0 holds missing and out-of-range difficulties, 1-11 the difficulties 0-10
+        level = np.where((rounded >= 0) & (rounded <= 10), rounded + 1, 0).astype(np.int64)
+        sums = np.bincount(level[scored], weights=score[scored], minlength=12)
+        counts = np.bincount(level[scored], minlength=12)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            expected = sums / counts
+
+        residual = np.full(len(score), np.nan, dtype=np.float32)
+        residual[scored] = score[scored] - expected[level[scored]]
+        adjusted = self._per_report_mean(residual)
+
+        percentiles = np.full(self.reports, np.nan, dtype=np.float32)
+        ranked = ~np.isnan(adjusted)
+        if ranked.any():
+            ordered = np.sort(adjusted[ranked])
+            # Mid-rank: reports below plus half of those tied, so ties share a percentile
+            below = np.searchsorted(ordered, adjusted[ranked], side='left')
+            at_or_below = np.searchsorted(ordered, adjusted[ranked], side='right')
+            percentiles[ranked] = (below + at_or_below) / 2 / len(ordered) * 100
+        return percentiles
+
+    def proficiency(self) -> Dict[str, Dict]:
+        """Reports per proficiency level, and the share of the cohort below each level's cut-off"""
+        average = self.average_raw_score[~np.isnan(self.average_raw_score)]
+        total = len(average)
+        levels = {}
+        upper = np.inf
+        for name, cutoff in PROFICIENCY_CUTOFFS:
+            in_level = int(np.count_nonzero((average >= cutoff) & (average < upper)))
+            levels[name] = {
+                'cutoff': cutoff,
+                'reports': in_level,
+                'share': _rounded(in_level / total * 100) if total else 0.0,
+                'cohort_percentile': _rounded(np.count_nonzero(average < cutoff) / total * 100) if total else 0.0
+            }
+            upper = cutoff
+        return levels
+
+    def cutoffs_for_shares(self, shares: Dict[str, float]) -> Dict[str, float]:
+        """Average raw score needed to be in the top share (percent) of this cohort, e.g. {'Advanced': 10}"""
+        average = self.average_raw_score[~np.isnan(self.average_raw_score)]
+        if not len(average):
+            return {}
+        return {name: _rounded(np.percentile(average, 100 - share)) for name, share in shares.items()}
+
+    def summary(self) -> Dict:
+        percentiles = self.adjusted_percentiles()
+        return {
+            'reports': self.reports,
+            'answers': self.answers,
+            'average_percentage': _rounded(np.nanmean(self.percentage)) if self.reports else None,
+            'topics': self.topic_means(),
+            'sub_scores': self.subscore_distributions(),
+            'proficiency': self.proficiency(),
+            'adjusted_percentile_deciles': np.histogram(percentiles[~np.isnan(percentiles)], bins=10, range=(0, 100))[0].tolist()
+        }
+
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else float('nan')
+
+
+def _rounded(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else round(value, 2)
+
+
+def iter_report_files(paths: Iterable[str]) -> Iterator[Dict]:
+    for path in paths:
+        names = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.json')] \
+            if os.path.isdir(path) else [path]
+        for name in names:
+            with open(name, encoding='utf-8') as f:
+                yield json.load(f)
+
+
+def iter_stored_reports(db_path: str, batch_size: int = 1000) -> Iterator[Dict]:
+    """Reports from the app's transcript database (TRANSCRIPT_DB_PATH), read in batches"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute("SELECT data, completed_date FROM reports ORDER BY report_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for data, completed_date in rows:
+                yield {**json.loads(data), 'completed_date': completed_date}
+    finally:
+        conn.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cohort analytics over interview reports")
+    parser.add_argument('paths', nargs='*', help="report JSON files or directories of them")
+    parser.add_argument('--db', help="transcript database written by the app")
+    parser.add_argument('--skill-level')
+    parser.add_argument('--since', help="YYYY-MM-DD")
+    parser.add_argument('--until', help="YYYY-MM-DD")
+    args = parser.parse_args(argv)
+    if not args.paths and not args.db:
+        parser.error("give report files or --db")
+
+    reports = iter_report_files(args.paths)
+    if args.db:
+        reports = (report for source in (reports, iter_stored_reports(args.db)) for report in source)
+    columns = CohortColumns.from_reports(reports).select(args.skill_level, args.since, args.until)
+    print(json.dumps(columns.summary(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Deterministic stand-in for the Gemini chat model, for offline and load testing.
+
+Selected with LLM_BACKEND=fake. It reads the prompt to decide what kind of
+reply ExcelInterviewAgent expects and returns valid JSON (or plain text for the
+overall feedback), after a simulated delay. Errors and malformed replies can be
+injected to exercise the fallback and repair paths.
+
+Settings (environment variables):
+    FAKE_LLM_LATENCY        median seconds per call (default 0.5)
+    FAKE_LLM_LATENCY_SIGMA  spread of the lognormal latency distribution, 0 for fixed (default 0.4)
+    FAKE_LLM_ERROR_RATE     probability a call raises (default 0)
+    FAKE_LLM_MALFORMED_RATE probability a reply isn't valid JSON (default 0)
+    FAKE_LLM_SEED           random seed, so runs are repeatable (default 42)
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterator, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+TOPICS = {
+    "beginner": ["Basic Formulas", "Cell Formatting", "Charts", "Cell References", "Sorting and Filtering"],
+    "intermediate": ["VLOOKUP", "Pivot Tables", "Conditional Formatting", "Data Validation", "Error Handling"],
+    "advanced": ["INDEX/MATCH", "Array Formulas", "VBA", "Power Query", "Performance Optimization"]
+}
+
+FEEDBACK = [
+    "The answer covers the main idea but skips how it would be applied to a real worksheet.",
+    "Clear explanation with a relevant example; mentioning common pitfalls would make it stronger.",
+    "The response is partly correct but mixes up the function's arguments.",
+    "A thorough answer that shows hands-on experience with the feature."
+]
+
+
+class FakeLLMError(RuntimeError):
+    """Injected failure, standing in for provider errors such as 429s and timeouts"""
+
+
+class FakeChatModel:
+    """Implements the invoke/stream surface the app uses on ChatGoogleGenerativeAI"""
+
+    def __init__(self, latency: float = 0.5, latency_sigma: float = 0.4, error_rate: float = 0.0,
+                 malformed_rate: float = 0.0, seed: int = 42):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seen_prefixes = set()
+
+    @classmethod
+    def from_env(cls) -> 'FakeChatModel':
+        return cls(
+            latency=float(os.getenv('FAKE_LLM_LATENCY', '0.5')),
+            latency_sigma=float(os.getenv('FAKE_LLM_LATENCY_SIGMA', '0.4')),
+            error_rate=float(os.getenv('FAKE_LLM_ERROR_RATE', '0')),
+            malformed_rate=float(os.getenv('FAKE_LLM_MALFORMED_RATE', '0')),
+            seed=int(os.getenv('FAKE_LLM_SEED', '42'))
+        )
+
+    def invoke(self, messages: List, **kwargs) -> AIMessage:
+        delay, fail, malformed, rng = self._draw()
+        time.sleep(delay)
+        if fail:
+            raise FakeLLMError("injected fake LLM failure")
+        content = self._reply(messages, rng, malformed)
+        return AIMessage(content=content, usage_metadata=self._usage(messages, content))
+
+    def stream(self, messages: List, **kwargs) -> Iterator[AIMessageChunk]:
+        delay, fail, malformed, rng = self._draw()
+        # Time to first token is about a third of the call; the rest is spread over the chunks
+        time.sleep(delay / 3)
+        if fail:
+            raise FakeLLMError("injected fake LLM failure")
+        content = self._reply(messages, rng, malformed)
+        chunks = [content[i:i + 16] for i in range(0, len(content), 16)] or ['']
+        for i, text in enumerate(chunks):
+            if i:
+                time.sleep(2 * delay / 3 / len(chunks))
+            usage = self._usage(messages, content) if i == len(chunks) - 1 else None
+            yield AIMessageChunk(content=text, usage_metadata=usage)
+
+    def batch(self, inputs: List[List], **kwargs) -> List[AIMessage]:
+        return [self.invoke(messages) for messages in inputs]
+
+    def _draw(self):
+        # One locked draw per call keeps the sequence repeatable for a given seed
+        with self._lock:
+            if self.latency_sigma > 0:
+                delay = self._random.lognormvariate(0, self.latency_sigma) * self.latency
+            else:
+                delay = self.latency
+            fail = self._random.random() < self.error_rate
+            malformed = self._random.random() < self.malformed_rate
+            rng = random.Random(self._random.random())
+        return delay, fail, malformed, rng
+
+    def _usage(self, messages: List, content: str) -> Dict:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = len(content) // 4
+        # Mimic implicit prefix caching: a system prompt seen before is reported as a cache read
+        prefix = str(messages[0].content) if messages else ''
+        with self._lock:
+            cached = len(prefix) // 4 if prefix in self._seen_prefixes else 0
+            self._seen_prefixes.add(prefix)
+        return {'input_tokens': input_tokens, 'output_tokens': output_tokens, 'total_tokens': input_tokens + output_tokens,
+                'input_token_details': {'cache_read': cached}}
+
+    def _reply(self, messages: List, rng: random.Random, malformed: bool) -> str:
+        prompt = str(messages[-1].content)
+        if malformed:
+            return "I'm sorry, I can't format that as JSON right now."
+
+        generate = re.search(r'Generate (\d+) Excel interview questions for (\w+)', prompt)
+        if generate:
+            return json.dumps(self._questions(int(generate.group(1)), generate.group(2), rng), indent=2)
+        if 'follow-up Excel interview question' in prompt:
+            level = re.search(r'for an? (\w+) level', prompt)
+            return json.dumps(self._questions(1, level.group(1) if level else 'beginner', rng)[0], indent=2)
+        batch = re.search(r'evaluate each of these (\d+) candidate responses', prompt)
+        if batch:
+            return json.dumps([self._evaluation(rng) for _ in range(int(batch.group(1)))], indent=2)
+        if "evaluate this candidate's response" in prompt:
+            return "```json\n" + json.dumps(self._evaluation(rng), indent=2) + "\n```"
+        if 'learning recommendations' in prompt:
+            return json.dumps([
+                "Practise lookup functions on a sample sales dataset",
+                "Build a Pivot Table dashboard from raw transaction data",
+                "Work through an intermediate Excel course with exercises"
+            ])
+        if 'overall feedback' in prompt:
+            return ("You showed a reasonable grasp of the fundamentals and explained your answers clearly. "
+                    "Focus next on applying functions to realistic scenarios to build confidence.")
+        # A repair request follows the original prompt and the bad reply; answer the original properly
+        if 'corrected JSON' in prompt and len(messages) >= 3:
+            return self._reply(messages[:-2], rng, False)
+        return "{}"
+
+    def _questions(self, count: int, skill_level: str, rng: random.Random) -> List[Dict]:
+        topics = TOPICS.get(skill_level, TOPICS['beginner'])
+        base = {'beginner': 2, 'intermediate': 5, 'advanced': 8}.get(skill_level, 2)
+        return [
+            {
+                "question": f"Scenario {rng.randint(1000, 9999)}: how would you use {topic} to solve a reporting task?",
+                "topic": topic,
+                "difficulty": min(10, base + rng.randint(0, 2)),
+                "weight": rng.randint(5, 15)
+            }
+            for topic in rng.sample(topics * ((count // len(topics)) + 1), count)
+        ]
+
+    def _evaluation(self, rng: random.Random) -> Dict:
+        score = rng.randint(3, 9)
+        return {
+            "score": score,
+            "technical_accuracy": max(1, min(10, score + rng.randint(-1, 1))),
+            "communication_clarity": max(1, min(10, score + rng.randint(-1, 1))),
+            "completeness": max(1, min(10, score + rng.randint(-2, 0))),
+            "practical_understanding": max(1, min(10, score + rng.randint(-1, 1))),
+            "feedback": rng.choice(FEEDBACK),
+            "suggestions": "Walk through a concrete example step by step.",
+            "strengths": "Relevant terminology and a sensible approach.",
+            "areas_for_improvement": "Depth on edge cases and real-world use.",
+            "confidence": rng.randint(5, 10)
+        }
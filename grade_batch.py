@@ -0,0 +1,143 @@
+"""Grade many (question, response) pairs offline with bounded concurrency.
+
+Input is JSONL with one answer per line:
+
+    {"id": "a1", "question": "...", "response": "...", "topic": "VLOOKUP", "difficulty": 6, "weight": 10}
+
+Only "question" and "response" are required. Results are appended to the output
+JSONL as each pack finishes, so rerunning the same command after a crash skips
+everything already graded. Answers the model couldn't grade are left out of the
+output, so a rerun tries them again.
+
+Usage:
+    python grade_batch.py answers.jsonl graded.jsonl --pack-size 5 --concurrency 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Set, Tuple
+
+from app import interview_agent
+
+
+def load_items(path: str) -> Iterator[Dict]:
+    """Yield answers from the input file, filling in defaults for optional fields"""
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            yield {
+                'id': str(item.get('id', line_number)),
+                'question': item['question'],
+                'response': item.get('response', ''),
+                'topic': item.get('topic', 'General'),
+                'difficulty': item.get('difficulty', 5),
+                'weight': item.get('weight', 10)
+            }
+
+
+def load_done_ids(path: str) -> Set[str]:
+    """IDs already written to the output, so a rerun resumes instead of regrading"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record['evaluation'].get('fallback'):
+                    continue
+                done.add(record['id'])
+            except (ValueError, KeyError, AttributeError):
+                # A line cut short by a crash is graded again
+                continue
+    return done
+
+
+def end_last_line(path: str):
+    """Finish a line cut short by a crash, so the next result isn't appended onto it"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b'\n':
+            f.write(b'\n')
+
+
+def packs(items: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    pack = []
+    for item in items:
+        pack.append(item)
+        if len(pack) == size:
+            yield pack
+            pack = []
+    if pack:
+        yield pack
+
+
+def grade_pack(pack: List[Dict]) -> List[Dict]:
+    evaluations = interview_agent.evaluate_responses_batch(pack)
+    return [{'id': item['id'], 'evaluation': evaluation} for item, evaluation in zip(pack, evaluations)]
+
+
+def write_results(out, futures) -> Tuple[int, int]:
+    """Append graded answers; returns (written, skipped) where skipped only got a fallback score"""
+    written = skipped = 0
+    for future in futures:
+        for record in future.result():
+            if record['evaluation'].get('fallback'):
+                skipped += 1
+                continue
+            out.write(json.dumps(record) + '\n')
+            written += 1
+    out.flush()
+    return written, skipped
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Grade Excel interview answers in bulk")
+    parser.add_argument('input', help="JSONL file of answers to grade")
+    parser.add_argument('output', help="JSONL file results are appended to")
+    parser.add_argument('--pack-size', type=int, default=5, help="answers sent in each prompt")
+    parser.add_argument('--concurrency', type=int, default=4, help="prompts in flight at once")
+    args = parser.parse_args(argv)
+
+    done = load_done_ids(args.output)
+    end_last_line(args.output)
+    remaining = (item for item in load_items(args.input) if item['id'] not in done)
+    if done:
+        print(f"Resuming: {len(done)} answers already graded")
+
+    graded = ungraded = 0
+    started = time.monotonic()
+    with open(args.output, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        in_flight = set()
+        for pack in packs(remaining, args.pack_size):
+            # Keep submissions bounded so huge inputs aren't read into memory at once
+            if len(in_flight) >= args.concurrency * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                written, skipped = write_results(out, finished)
+                graded += written
+                ungraded += skipped
+            in_flight.add(executor.submit(grade_pack, pack))
+
+        written, skipped = write_results(out, in_flight)
+        graded += written
+        ungraded += skipped
+
+    elapsed = time.monotonic() - started
+    print(f"Graded {graded} answers in {elapsed:.1f}s")
+    if ungraded:
+        print(f"{ungraded} answers couldn't be graded by the model; rerun the same command to retry them")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Run the interviewer as several worker processes, for production.
+
+`python app.py` is one debug process, which uses one core, and its emits
+can't reach clients on other processes. Socket.IO needs every request of a
+session to reach the process that holds it, and gunicorn's own worker
+balancing isn't sticky. So this starts one single-worker gunicorn server per
+port on consecutive ports and restarts any that exit. Put a load balancer with
+sticky sessions in front of them. --nginx prints an nginx config that pins
+clients by IP.
+
+All workers share:
+    SOCKETIO_MESSAGE_QUEUE  broker, so an emit from any worker reaches a client on another
+    SESSION_BACKEND         sqlite on one host, redis across hosts (default: redis when the broker is redis)
+    TRANSCRIPT_DB_PATH      the SQLite report store, already safe for several writers
+
+Usage:
+    python serve.py --workers 4 --message-queue redis://localhost:6379/0
+    python serve.py --workers 4 --nginx > /etc/nginx/conf.d/interviewer.conf
+    python serve.py --workers 2 --server builtin   # no gunicorn, e.g. on Windows
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def worker_env(args, port: int, extra_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG='0', **(extra_env or {}))
+    if args.message_queue:
+        env['SOCKETIO_MESSAGE_QUEUE'] = args.message_queue
+    if 'SESSION_BACKEND' not in env:
+        # A process-local store would lose interviews that reconnect to another worker
+        env['SESSION_BACKEND'] = 'redis' if args.message_queue.startswith('redis') else 'sqlite'
+    if args.worker_class == 'eventlet':
+        env['SOCKETIO_ASYNC_MODE'] = 'eventlet'
+    return env
+
+
+def worker_command(args, port: int) -> List[str]:
+    if args.server == 'builtin':
+        return [sys.executable, 'app.py']
+    # No --preload: the app starts background threads at import, and threads don't survive a fork
+    return [sys.executable, '-m', 'gunicorn', '--worker-class', args.worker_class, '--workers', '1',
+            '--threads', str(args.threads), '--bind', f'{args.host}:{port}', '--graceful-timeout', '30', 'app:app']
+
+
+def start_worker(args, port: int, extra_env: Optional[Dict[str, str]] = None, quiet: bool = False) -> subprocess.Popen:
+    output = subprocess.DEVNULL if quiet else None
+    return subprocess.Popen(worker_command(args, port), env=worker_env(args, port, extra_env), cwd=ROOT,
+                            stdout=output, stderr=output)
+
+
+def start_workers(args, extra_env: Optional[Dict[str, str]] = None, quiet: bool = False) -> Dict[int, subprocess.Popen]:
+    return {port: start_worker(args, port, extra_env, quiet)
+            for port in range(args.base_port, args.base_port + args.workers)}
+
+
+def stop_workers(workers: Dict[int, subprocess.Popen], timeout: float = 30.0):
+    for process in workers.values():
+        if process.poll() is None:
+            process.terminate()
+    deadline = time.monotonic() + timeout
+    for process in workers.values():
+        try:
+            process.wait(max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def nginx_config(args) -> str:
+    servers = '\n'.join(f'    server {args.host}:{port};' for port in range(args.base_port, args.base_port + args.workers))
+    return f"""upstream interviewer {{
+    # Socket.IO sessions must stay on one worker
+    ip_hash;
+{servers}
+}}
+
+server {{
+    listen 80;
+
+    location / {{
+        proxy_pass http://interviewer;
+        proxy_http_version 1.1;
+        proxy_set_header Host $host;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+    }}
+
+    location /socket.io {{
+        proxy_pass http://interviewer/socket.io;
+        proxy_http_version 1.1;
+        proxy_buffering off;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "Upgrade";
+        proxy_set_header Host $host;
+        proxy_read_timeout 3600s;
+    }}
+}}
+"""
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run several interviewer worker processes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--base-port', type=int, default=5001, help="first worker's port; the rest follow on")
+    parser.add_argument('--host', default='127.0.0.1', help="address workers bind to (the balancer connects here)")
+    parser.add_argument('--message-queue', default=os.getenv('SOCKETIO_MESSAGE_QUEUE', ''),
+                        help="broker URL shared by the workers, e.g. redis://localhost:6379/0")
+    parser.add_argument('--server', choices=('gunicorn', 'builtin'), default='gunicorn')
+    parser.add_argument('--worker-class', choices=('gthread', 'eventlet'), default='gthread',
+                        help="gthread keeps the app's thread pools; eventlet needs every dependency to be green-safe")
+    parser.add_argument('--threads', type=int, default=100, help="connections each gthread worker serves at once")
+    parser.add_argument('--nginx', action='store_true', help="print an nginx config for these workers and exit")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.nginx:
+        print(nginx_config(args), end='')
+        return 0
+    if args.workers > 1 and not args.message_queue:
+        print("warning: without --message-queue, emits only reach clients on the same worker")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    workers = start_workers(args)
+    print(f"{args.workers} workers on ports {args.base_port}-{args.base_port + args.workers - 1}")
+    try:
+        while not stopping:
+            for port, process in list(workers.items()):
+                if process.poll() is not None and not stopping:
+                    print(f"worker on port {port} exited with {process.returncode}; restarting")
+                    workers[port] = start_worker(args, port)
+            time.sleep(1)
+    finally:
+        stop_workers(workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Near-duplicate answer detection with hashed character n-grams.
+
+Answers to the same question, especially the fixed fallback questions, tend to
+repeat with small wording changes that an exact-match cache misses. AnswerIndex
+keeps past graded answers per question as hashed character n-gram vectors and
+finds the nearest ones by TF-IDF cosine similarity, all on the CPU with NumPy.
+When the closest answers clear the threshold and say the same words in the
+same order (see same_wording), their evaluations are reused: scores are the
+similarity-weighted mean of the matches, text comes from the closest one.
+
+Run as a script it replays graded answers from saved reports through the index
+and shows, for each threshold, how many answers would have been reused and how
+far the reused score is from the one the model gave:
+
+    python similarity.py transcripts/ --thresholds 0.8 0.85 0.9 0.95
+
+Only reports whose detailed_scores include the question and response text can
+be replayed; older reports without them are counted and skipped.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SCORE_FIELDS = ('score', 'technical_accuracy', 'communication_clarity', 'completeness', 'practical_understanding')
+
+# Evaluations that didn't come from the model, which the index must not learn from
+FALLBACK_FEEDBACK_PREFIX = "Response evaluated using fallback method"
+
+
+def normalize(text: str) -> str:
+    """Lowercase words, digits and $ (absolute references) separated by single spaces"""
+    text = str(text).lower().replace('’', "'")
+    return ' '.join(''.join(c if c.isalnum() or c in "$'" else ' ' for c in text).split())
+
+
+def question_key(question: str, topic: str, difficulty) -> str:
+    return '\x1f'.join([normalize(question), normalize(topic), str(difficulty)])
+
+
+def is_typo_of(a: str, b: str) -> bool:
+    """Whether two different words are one misspelt letter apart (one edit or swap of neighbours)
+
+    Short words, a different first letter, one word extending the other (SUMIF
+    and SUMIFS) or different digits and $ signs ($A$1 and $A$2) count as
+    different words, since those are usually different things rather than typos.
+    """
+    if a[0] != b[0] or min(len(a), len(b)) < 5 or a.startswith(b) or b.startswith(a):
+        return False
+    if [c for c in a if not c.isalpha()] != [c for c in b if not c.isalpha()]:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diffs) == 1 or (len(diffs) == 2 and diffs[1] == diffs[0] + 1 and
+                                   a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if abs(len(a) - len(b)) != 1:
+        return False
+    longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+    return any(longer[:i] + longer[i + 1:] == shorter for i in range(len(longer)))
+
+
+def same_wording(a: Tuple[str, ...], b: Tuple[str, ...]) -> bool:
+    """Whether two normalized answers have the same words in the same order, allowing typos
+
+    N-gram cosine barely moves when two key terms swap places or one term is
+    replaced, which can flip an answer from right to wrong, so a match has to
+    pass this as well as the threshold.
+    """
+    return len(a) == len(b) and all(x == y or is_typo_of(x, y) for x, y in zip(a, b))
+
+
+class HashedNgramVectorizer:
+    """Character n-gram counts hashed into a fixed number of dimensions, log-scaled"""
+
+    def __init__(self, dimensions: int = 2048, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+
+    def transform(self, text: str) -> np.ndarray:
+        padded = f" {normalize(text)} "
+        low, high = self.ngram_range
+        grams = [padded[i:i + n] for n in range(low, high + 1) for i in range(len(padded) - n + 1)]
+        # crc32 rather than hash(), which is salted per process
+        buckets = np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint32, count=len(grams))
+        counts = np.bincount(buckets % self.dimensions, minlength=self.dimensions).astype(np.float32)
+        return np.log1p(counts, out=counts)
+
+
+class _QuestionAnswers:
+    """Answer vectors for one question, in a ring buffer that grows up to its capacity"""
+    __slots__ = ('vectors', 'evaluations', 'words', 'doc_freq', 'count', 'next_row', 'capacity')
+
+    def __init__(self, dimensions: int, capacity: int):
+        self.vectors = np.zeros((min(8, capacity), dimensions), dtype=np.float32)
+        self.evaluations: List[Dict] = []
+        self.words: List[Tuple[str, ...]] = []
+        self.doc_freq = np.zeros(dimensions, dtype=np.float32)
+        self.count = 0
+        self.next_row = 0
+        self.capacity = capacity
+
+    def add(self, vector: np.ndarray, words: Tuple[str, ...], evaluation: Dict):
+        if self.count < self.capacity:
+            row = self.count
+            if row == len(self.vectors):
+                grown = np.zeros((min(2 * row, self.capacity), self.vectors.shape[1]), dtype=np.float32)
+                grown[:row] = self.vectors
+                self.vectors = grown
+            self.evaluations.append(evaluation)
+            self.words.append(words)
+            self.count += 1
+        else:
+            # Full: overwrite the oldest answer
+            row = self.next_row
+            self.next_row = (row + 1) % self.capacity
+            self.doc_freq -= self.vectors[row] > 0
+            self.evaluations[row] = evaluation
+            self.words[row] = words
+        self.vectors[row] = vector
+        self.doc_freq += vector > 0
+
+    def nearest(self, vector: np.ndarray, k: int) -> List[Tuple[float, Tuple[str, ...], Dict]]:
+        idf = np.log((1 + self.count) / (1 + self.doc_freq)) + 1
+        query = vector * idf
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+        weighted = self.vectors[:self.count] * idf
+        norms = np.maximum(np.linalg.norm(weighted, axis=1), 1e-12)
+        similarities = (weighted @ query) / (norms * query_norm)
+        top = np.argsort(similarities)[::-1][:k]
+        return [(float(similarities[i]), self.words[i], self.evaluations[i]) for i in top]
+
+
+class AnswerIndex:
+    """Past graded answers per question, searched for near-duplicates of a new answer
+
+    Keys are whatever identifies a question (see question_key). Questions are
+    kept least-recently-used first, so one-off generated questions age out while
+    the fallback questions, which are asked again and again, stay.
+    """
+
+    def __init__(self, threshold: float, neighbours: int = 3, max_per_question: int = 200,
+                 max_questions: int = 2000, score_fields: Iterable[str] = SCORE_FIELDS,
+                 vectorizer: Optional[HashedNgramVectorizer] = None):
+        self.threshold = threshold
+        self.neighbours = neighbours
+        self.max_per_question = max_per_question
+        self.max_questions = max_questions
+        self.score_fields = tuple(score_fields)
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self.hits = 0
+        self.misses = 0
+        self._questions: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def match(self, key: str, text: str) -> Optional[Dict]:
+        """Evaluation calibrated from the nearest earlier answers, or None if none is close enough"""
+        vector = self.vectorizer.transform(text)
+        words = tuple(normalize(text).split())
+        with self._lock:
+            answers = self._questions.get(key)
+            neighbours = answers.nearest(vector, self.neighbours) if answers else []
+            close = [(similarity, evaluation) for similarity, other_words, evaluation in neighbours
+                     if similarity >= self.threshold and same_wording(words, other_words)]
+            if not close:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._questions.move_to_end(key)
+
+        best_similarity, evaluation = close[0]
+        evaluation = dict(evaluation)
+        for field in self.score_fields:
+            values = [(similarity, other[field]) for similarity, other in close if isinstance(other.get(field), (int, float))]
+            if values:
+                evaluation[field] = int(round(sum(s * v for s, v in values) / sum(s for s, _ in values)))
+        evaluation['similar_answer'] = round(best_similarity, 3)
+        evaluation['similar_answers'] = len(close)
+        return evaluation
+
+    def add(self, key: str, text: str, evaluation: Dict):
+        """Remember a model-graded answer"""
+        vector = self.vectorizer.transform(text)
+        words = tuple(normalize(text).split())
+        with self._lock:
+            answers = self._questions.get(key)
+            if answers is None:
+                answers = self._questions[key] = _QuestionAnswers(self.vectorizer.dimensions, self.max_per_question)
+                while len(self._questions) > self.max_questions:
+                    self._questions.popitem(last=False)
+            self._questions.move_to_end(key)
+            answers.add(vector, words, dict(evaluation))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "questions": len(self._questions),
+                "answers": sum(answers.count for answers in self._questions.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+def is_model_graded(score: Dict) -> bool:
+    return not (score.get('similar_answer') or str(score.get('feedback', '')).startswith(FALLBACK_FEEDBACK_PREFIX))
+
+
+def report_paths(paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.json'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def load_graded_answers(paths: Iterable[str]) -> Tuple[List[Dict], int]:
+    """Model-graded answers with their text from saved reports, plus the number of reports without answer text"""
+    answers = []
+    skipped = 0
+    for path in report_paths(paths):
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        scores = [score for score in report.get('detailed_scores', []) if 'response' in score and 'question' in score]
+        if not scores:
+            skipped += 1
+            continue
+        answers.extend(score for score in scores if is_model_graded(score))
+    return answers, skipped
+
+
+def replay(answers: List[Dict], threshold: float, neighbours: int = 3) -> Dict:
+    """Grade answers in order against an index of the ones before them, as the app would"""
+    index = AnswerIndex(threshold, neighbours=neighbours)
+    errors = []
+    for answer in answers:
+        key = question_key(answer['question'], answer.get('topic', ''), answer.get('difficulty', ''))
+        reused = index.match(key, answer['response'])
+        if reused is not None:
+            errors.append(abs(reused['score'] - answer['score']))
+        else:
+            index.add(key, answer['response'], answer)
+    errors = np.array(errors, dtype=np.float32)
+    return {
+        'threshold': threshold,
+        'reused': len(errors),
+        'reuse_rate': len(errors) / len(answers) if answers else 0.0,
+        'mean_abs_error': float(errors.mean()) if len(errors) else 0.0,
+        'within_one': float((errors <= 1).mean()) if len(errors) else 0.0
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="How often near-duplicate reuse would apply to saved reports, and how accurate it is")
+    parser.add_argument('paths', nargs='+', help="report JSON files or directories of them")
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.8, 0.85, 0.9, 0.95])
+    parser.add_argument('--neighbours', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    answers, skipped = load_graded_answers(args.paths)
+    print(f"{len(answers)} model-graded answers, "
+          f"{len({question_key(a['question'], a.get('topic', ''), a.get('difficulty', '')) for a in answers})} questions; "
+          f"{skipped} reports skipped without answer text")
+    if not answers:
+        return 1
+
+    print(f"{'threshold':>9} {'reused':>7} {'rate':>6} {'mean |err|':>10} {'within 1':>8}")
+    for threshold in sorted(args.thresholds):
+        row = replay(answers, threshold, args.neighbours)
+        print(f"{row['threshold']:>9.2f} {row['reused']:>7} {row['reuse_rate']:>6.1%} "
+              f"{row['mean_abs_error']:>10.2f} {row['within_one']:>8.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,9 @@ class ExcelInterviewer {
         this.isRecording = false;
         this.currentTranscript = '';
         this.microphoneReady = false;
+        this.streamedFeedback = '';
+        this.streamedScore = null;
+        this.questionNumber = 0;
 
         this.initializeEventListeners();
         this.initializeSpeechRecognition();
@@ -106,20 +109,53 @@ class ExcelInterviewer {
     initializeSocketListeners() {
         this.socket.on('connect', () => {
             console.log('Connected to server');
+
+            // Pick up an interview this tab was in before a reload or dropped connection
+            const token = sessionStorage.getItem('interviewToken');
+            if (token) {
+                this.socket.emit('resume_interview', { token: token });
+            }
         });
 
         this.socket.on('interview_started', (data) => {
             this.handleInterviewStarted(data);
         });
 
+        this.socket.on('interview_resumed', (data) => {
+            this.handleInterviewResumed(data);
+        });
+
+        this.socket.on('resume_failed', (data) => {
+            sessionStorage.removeItem('interviewToken');
+            if (document.getElementById('interview-phase').classList.contains('active')) {
+                this.showError(data.message);
+            }
+        });
+
+        this.socket.on('feedback_chunk', (data) => {
+            this.handleFeedbackChunk(data);
+        });
+
         this.socket.on('next_question', (data) => {
             this.handleNextQuestion(data);
         });
 
+        this.socket.on('report_progress', (data) => {
+            this.handleReportProgress(data);
+        });
+
         this.socket.on('interview_complete', (data) => {
             this.handleInterviewComplete(data);
         });
 
+        this.socket.on('report_narrative', (data) => {
+            this.handleReportNarrative(data);
+        });
+
+        this.socket.on('queue_position', (data) => {
+            this.handleQueuePosition(data);
+        });
+
         this.socket.on('error', (data) => {
             this.showError(data.message);
         });
@@ -152,6 +188,7 @@ class ExcelInterviewer {
     startInterview() {
         const name = document.getElementById('candidate-name').value;
         const skillLevel = document.getElementById('skill-level').value;
+        const adaptive = document.getElementById('adaptive-mode').checked;
 
         if (!name || !skillLevel || !this.microphoneReady) {
             this.showError('Please fill in all fields and test your microphone first.');
@@ -161,11 +198,14 @@ class ExcelInterviewer {
         // Emit start interview event
         this.socket.emit('start_interview', {
             name: name,
-            skill_level: skillLevel
+            skill_level: skillLevel,
+            adaptive: adaptive
         });
     }
 
     handleInterviewStarted(data) {
+        sessionStorage.setItem('interviewToken', data.token);
+
         // Switch to interview phase
         this.switchPhase('interview-phase');
 
@@ -178,6 +218,36 @@ class ExcelInterviewer {
         this.showSuccess('Interview started! Listen to the question and click "Click to Answer" when ready.');
     }
 
+    handleInterviewResumed(data) {
+        this.switchPhase('interview-phase');
+        this.updateProgress(Math.min(data.question_number, data.total_questions), data.total_questions);
+        if (data.question) {
+            this.updateQuestion(data.question);
+        }
+        if (data.scores.length > 0) {
+            this.handleReportProgress(data.progress);
+        }
+
+        if (data.evaluating) {
+            this.showInfo('Reconnected. Your last answer is still being evaluated...');
+        } else {
+            const last = data.scores[data.scores.length - 1];
+            if (last) {
+                this.showFeedback(last.feedback, last.score);
+            }
+            this.resetResponseUI();
+            this.showSuccess(`Welcome back, ${data.candidate_name}! Continuing from question ${data.question_number}.`);
+        }
+    }
+
+    handleQueuePosition(data) {
+        if (data.position > 0) {
+            this.showInfo(`The interviewer is busy right now. You're number ${data.position} in the queue...`);
+        } else {
+            this.showInfo('Your turn. Processing now...');
+        }
+    }
+
     handleNextQuestion(data) {
         // Update progress
         this.updateProgress(data.question_number, data.total_questions);
@@ -195,7 +265,58 @@ class ExcelInterviewer {
         this.resetResponseUI();
     }
 
+    resetStreamedFeedback() {
+        this.streamedFeedback = '';
+        this.streamedScore = null;
+    }
+
+    handleFeedbackChunk(data) {
+        if (data.text) {
+            this.streamedFeedback += data.text;
+        }
+        if (data.scores && data.scores.score !== undefined) {
+            this.streamedScore = data.scores.score;
+        }
+
+        const feedbackSection = document.getElementById('feedback-section');
+        const feedbackContent = document.getElementById('question-feedback');
+
+        feedbackContent.innerHTML = `
+            <div class="feedback-score">${this.streamedScore !== null ? `Score: ${this.streamedScore}/10` : 'Scoring...'}</div>
+            <div class="feedback-text"></div>
+        `;
+        // Streamed text is set as plain text while it is still being written
+        feedbackContent.querySelector('.feedback-text').textContent = this.streamedFeedback;
+
+        feedbackSection.classList.remove('hidden');
+    }
+
+    handleReportProgress(data) {
+        const runningScore = document.getElementById('running-score');
+        runningScore.textContent = `Running score: ${data.percentage}% (${data.proficiency_level} level) after ${data.questions_answered} question${data.questions_answered === 1 ? '' : 's'}`;
+        runningScore.classList.remove('hidden');
+    }
+
+    handleReportNarrative(data) {
+        sessionStorage.removeItem('interviewToken');
+        if (!this.currentReport) return;
+
+        // The report was shown before its feedback was written; fill it in now
+        this.displayResults({
+            ...this.currentReport,
+            overall_feedback: data.overall_feedback,
+            recommendations: data.recommendations,
+            timing_breakdown: data.timing_breakdown,
+            narrative_pending: false
+        });
+    }
+
     handleInterviewComplete(data) {
+        // Keep the token while the feedback is still being written, so a reconnect can still fetch it
+        if (!data.report.narrative_pending) {
+            sessionStorage.removeItem('interviewToken');
+        }
+
         // Switch to results phase
         this.switchPhase('results-phase');
 
@@ -239,8 +360,10 @@ class ExcelInterviewer {
         }
 
         // Emit response to server
+        this.resetStreamedFeedback();
         this.socket.emit('submit_response', {
-            response: this.currentTranscript
+            response: this.currentTranscript,
+            question_number: this.questionNumber
         });
 
         // Update UI
@@ -252,8 +375,10 @@ class ExcelInterviewer {
 
     skipQuestion() {
         if (confirm('Are you sure you want to skip this question? This will count as an unanswered question.')) {
+            this.resetStreamedFeedback();
             this.socket.emit('submit_response', {
-                response: 'Question skipped by candidate'
+                response: 'Question skipped by candidate',
+                question_number: this.questionNumber
             });
         }
     }
@@ -276,6 +401,8 @@ class ExcelInterviewer {
     }
 
     updateProgress(current, total) {
+        // Sent with each answer so the server can ignore a repeated submit
+        this.questionNumber = current;
         const percentage = (current / total) * 100;
         document.getElementById('progress-fill').style.width = percentage + '%';
         document.getElementById('progress-text').textContent = `Question ${current} of ${total}`;
@@ -363,7 +490,7 @@ class ExcelInterviewer {
 
             <div class="results-details">
                 <h4>Overall Feedback</h4>
-                <p>${report.overall_feedback}</p>
+                <p>${report.overall_feedback || (report.narrative_pending ? '<em>Writing your feedback...</em>' : '')}</p>
 
                 <div class="score-breakdown">
                     <div class="score-item">
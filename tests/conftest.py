@@ -0,0 +1,79 @@
+"""Shared setup: the app on the fake LLM backend, with a throwaway transcript store"""
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+# Settings are read when app is imported, so they go in before any test module imports it
+os.environ.update(
+    LLM_BACKEND='fake',
+    FAKE_LLM_LATENCY='0.2',
+    FAKE_LLM_LATENCY_SIGMA='0',
+    LLM_PRELOAD='false',
+    QUESTION_BANK_SIZE='0',
+    TRANSCRIPT_DB_PATH=os.path.join(tempfile.mkdtemp(prefix='interviewer-tests-'), 'transcripts.db'),
+    TRANSCRIPT_FLUSH_INTERVAL='0.1'
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+def wait_for(client, event: str, timeout: float = 10.0) -> dict:
+    """Payload of the next `event` the client receives, skipping others; fails after timeout seconds"""
+    seen = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for received in client.get_received():
+            if received['name'] == event:
+                return received['args'][0]
+            seen.append(received['name'])
+        time.sleep(0.02)
+    raise AssertionError(f"no {event} within {timeout}s; received {seen}")
+
+
+def received_events(client, seconds: float = 0.5) -> list:
+    """Names of everything the client receives over the next few seconds"""
+    time.sleep(seconds)
+    return [received['name'] for received in client.get_received()]
+
+
+@pytest.fixture
+def app():
+    return app_module
+
+
+@pytest.fixture
+def connect(app):
+    """Opens Socket.IO test clients, disconnecting whichever are still connected at the end"""
+    clients = []
+
+    def open_client():
+        client = app.socketio.test_client(app.app)
+        clients.append(client)
+        return client
+
+    yield open_client
+    for client in clients:
+        if client.is_connected():
+            client.disconnect()
+
+
+@pytest.fixture
+def answer():
+    """Starts an interview on a client and answers questions up to and including `through`"""
+    def run(client, through: int, name: str = 'Test Candidate') -> dict:
+        client.emit('start_interview', {'name': name, 'skill_level': 'beginner'})
+        started = wait_for(client, 'interview_started')
+        for number in range(1, through + 1):
+            client.emit('submit_response', {
+                'response': f"Answer {number}: I would use SUM over the range with $A$1 absolute references",
+                'question_number': number
+            })
+            if number < started['total_questions']:
+                wait_for(client, 'next_question')
+        return started
+
+    return run
@@ -0,0 +1,140 @@
+"""Admission control: admit, queue or shed model-bound socket requests"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import AdmissionQueue
+from conftest import received_events, wait_for
+
+
+class Recorder:
+    """Stands in for socketio.emit, and builds tasks that block until released"""
+
+    def __init__(self):
+        self.emits = []
+        self.runs = []
+        self.release = threading.Event()
+
+    def emit(self, event, data, to=None):
+        self.emits.append((to, event, data))
+
+    def positions(self, sid):
+        return [data['position'] for to, event, data in self.emits if to == sid and event == 'queue_position']
+
+    def task(self, name):
+        def run(use_model):
+            self.runs.append((name, use_model))
+            if use_model:
+                self.release.wait(5)
+        return run
+
+
+@pytest.fixture
+def recorder(app, monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(app.socketio, 'emit', recorder.emit)
+    yield recorder
+    recorder.release.set()
+
+
+@pytest.fixture
+def queue():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield AdmissionQueue(max_active=1, max_queue=2, executor=executor)
+    executor.shutdown(wait=True)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_admit_then_queue_then_shed(queue, recorder):
+    assert queue.submit('a', 'submit_response', recorder.task('a1'), 1) == 'admitted'
+    assert queue.submit('b', 'submit_response', recorder.task('b1'), 1) == 'queued'
+    assert queue.submit('c', 'submit_response', recorder.task('c1'), 1) == 'queued'
+    assert recorder.positions('b') == [1] and recorder.positions('c') == [2]
+
+    # The queue is full: shed requests run at once on the caller's thread, without the model
+    assert queue.submit('d', 'submit_response', recorder.task('d1'), 1) == 'shed'
+    assert ('d1', False) in recorder.runs
+    assert queue.stats() == {'active': 1, 'waiting': 2, 'admitted': 1, 'queued': 2, 'shed': 1, 'duplicate': 0}
+
+
+def test_finished_slot_goes_to_the_next_in_line(queue, recorder):
+    queue.submit('a', 'submit_response', recorder.task('a1'), 1)
+    queue.submit('b', 'submit_response', recorder.task('b1'), 1)
+    queue.submit('c', 'submit_response', recorder.task('c1'), 1)
+    recorder.release.set()
+
+    wait_until(lambda: queue.stats()['active'] == 0)
+    assert [name for name, _ in recorder.runs] == ['a1', 'b1', 'c1']
+    assert recorder.positions('b') == [1, 0]
+    assert recorder.positions('c') == [2, 1, 0]
+
+
+def test_repeat_of_a_pending_request_is_dropped(queue, recorder):
+    queue.submit('a', 'submit_response', recorder.task('a1'), 1)
+    assert queue.submit('a', 'submit_response', recorder.task('a1 again'), 1) == 'duplicate'
+    # The next question is a different request
+    assert queue.submit('a', 'submit_response', recorder.task('a2'), 2) == 'queued'
+
+    recorder.release.set()
+    wait_until(lambda: queue.stats()['active'] == 0)
+    assert queue.submit('a', 'submit_response', recorder.task('a1 later'), 1) == 'admitted'
+    wait_until(lambda: queue.stats()['active'] == 0)
+    assert [name for name, _ in recorder.runs] == ['a1', 'a2', 'a1 later']
+
+
+def test_disconnect_drops_only_a_queued_start(queue, recorder):
+    queue.submit('a', 'submit_response', recorder.task('a1'), 1)
+    queue.submit('b', 'start_interview', recorder.task('b start'))
+    queue.submit('c', 'submit_response', recorder.task('c1'), 1)
+    queue.drop('b')
+    queue.drop('c')
+    assert queue.stats()['waiting'] == 1
+    assert recorder.positions('c') == [2, 1]
+
+    recorder.release.set()
+    wait_until(lambda: queue.stats()['active'] == 0)
+    assert [name for name, _ in recorder.runs] == ['a1', 'c1']
+
+
+def test_failed_task_reports_an_error_and_frees_its_slot(queue, recorder):
+    def fail(use_model):
+        raise RuntimeError("boom")
+
+    queue.submit('a', 'submit_response', fail, 1)
+    wait_until(lambda: queue.stats()['active'] == 0)
+    assert ('a', 'error', {'message': 'Something went wrong while processing your request'}) in recorder.emits
+
+
+def test_shed_final_answer_gets_canned_narrative(app, connect, answer, monkeypatch):
+    narrative_calls = []
+    monkeypatch.setattr(app.interview_agent, 'start_narrative', lambda *args: narrative_calls.append(args))
+    monkeypatch.setattr(app.admission, 'max_active', 0)
+    monkeypatch.setattr(app.admission, 'max_queue', 0)
+
+    client = connect()
+    answer(client, through=5)
+    report = wait_for(client, 'interview_complete')['report']
+
+    assert not report.get('narrative_pending')
+    assert report['overall_feedback'] == app.interview_agent._fallback_feedback(report['percentage'])
+    assert report['recommendations']
+    assert narrative_calls == []
+    assert 'report_narrative' not in received_events(client)
+
+
+def test_non_integer_question_number_is_rejected(connect, answer):
+    client = connect()
+    answer(client, through=0)
+    client.emit('submit_response', {'response': 'SUM adds numbers', 'question_number': 'first'})
+    assert wait_for(client, 'error')['message'] == 'question_number must be a whole number'
+
+    client.emit('submit_response', {'response': 'SUM adds numbers', 'question_number': '1'})
+    assert wait_for(client, 'next_question')['question_number'] == 2
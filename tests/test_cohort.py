@@ -0,0 +1,33 @@
+import numpy as np
+
+from cohort import CohortColumns
+
+
+def report(percentage, answers):
+    return {
+        'skill_level': 'intermediate',
+        'percentage': percentage,
+        'detailed_scores': [{'topic': 'VLOOKUP', 'difficulty': difficulty, 'score': score} for difficulty, score in answers]
+    }
+
+
+def test_adjusted_percentiles_tolerate_out_of_range_difficulty():
+    columns = CohortColumns.from_reports([
+        report(50, [(-3, 5), (2, 6), (None, 7), (14, 8), (10.6, 3)]),
+        report(90, [(2, 9)]),
+        report(0, [])
+    ])
+    percentiles = columns.adjusted_percentiles()
+    assert percentiles[0] < percentiles[1]
+    assert np.isnan(percentiles[2])
+
+
+def test_harder_questions_rank_higher_for_the_same_score():
+    columns = CohortColumns.from_reports([
+        report(60, [(2, 6)]),
+        report(60, [(8, 6)]),
+        report(80, [(2, 8)]),
+        report(40, [(8, 4)])
+    ])
+    percentiles = columns.adjusted_percentiles()
+    assert percentiles[1] > percentiles[0]
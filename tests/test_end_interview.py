@@ -0,0 +1,32 @@
+"""Ending an interview over Socket.IO stores and sends its report once"""
+from conftest import received_events, wait_for
+
+
+def test_end_after_completion_stores_one_report(app, connect, answer):
+    client = connect()
+    started = answer(client, through=5)
+    wait_for(client, 'interview_complete')
+    wait_for(client, 'report_narrative')
+
+    client.emit('end_interview')
+    client.emit('end_interview')
+    assert 'interview_complete' not in received_events(client)
+
+    app.transcript_store.flush(5)
+    stored = app.transcript_store._connect().execute(
+        "SELECT COUNT(*) FROM reports WHERE session_id = ?", (started['token'],)
+    ).fetchone()[0]
+    assert stored == 1
+
+
+def test_double_end_sends_one_report(app, connect, answer):
+    client = connect()
+    started = answer(client, through=2)
+    client.emit('end_interview')
+    client.emit('end_interview')
+    wait_for(client, 'interview_complete')
+    wait_for(client, 'report_narrative')
+    assert 'interview_complete' not in received_events(client)
+
+    app.transcript_store.flush(5)
+    assert app.transcript_store.get_session_report(started['token'])['questions_answered'] == 2
@@ -0,0 +1,56 @@
+from app import EvaluationCache
+
+EVALUATION = {'score': 7, 'technical_accuracy': 7, 'feedback': 'Solid answer.'}
+
+
+def key(response):
+    return EvaluationCache.make_key('What does VLOOKUP do?', 'VLOOKUP', 4, response)
+
+
+def test_key_ignores_case_spacing_and_trailing_punctuation():
+    assert key('It looks up a value in the first column.') == key('  it LOOKS up a value   in the first column ')
+    assert key('It looks up a value') != key('It looks up a row')
+
+
+def test_hits_misses_and_copies():
+    cache = EvaluationCache(max_entries=10)
+    assert cache.get(key('a')) is None
+    cache.put(key('a'), EVALUATION)
+    hit = cache.get(key('a'))
+    assert hit == EVALUATION
+    hit['score'] = 1
+    assert cache.get(key('a'))['score'] == 7
+    assert cache.stats() == {'entries': 1, 'hits': 2, 'misses': 1, 'hit_rate': 0.667}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EvaluationCache(max_entries=2)
+    cache.put(key('a'), EVALUATION)
+    cache.put(key('b'), EVALUATION)
+    cache.get(key('a'))
+    cache.put(key('c'), EVALUATION)
+    assert cache.get(key('b')) is None
+    assert cache.get(key('a')) is not None
+
+
+def test_size_zero_disables_the_cache():
+    cache = EvaluationCache(max_entries=0)
+    cache.put(key('a'), EVALUATION)
+    assert cache.get(key('a')) is None
+
+
+def test_disk_copy_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    EvaluationCache(max_entries=10, path=path).put(key('a'), EVALUATION)
+    assert EvaluationCache(max_entries=10, path=path).get(key('a')) == EVALUATION
+
+
+def test_disk_copy_keeps_the_newest_rows(tmp_path):
+    cache = EvaluationCache(max_entries=10, path=str(tmp_path / 'cache.db'), max_disk_entries=50)
+    for n in range(2 * EvaluationCache.PRUNE_EVERY):
+        cache.put(key(f'answer {n}'), EVALUATION)
+    conn = cache._connect()
+    assert conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0] == 50
+    newest = EvaluationCache(max_entries=10, path=cache.path)
+    assert newest.get(key(f'answer {2 * EvaluationCache.PRUNE_EVERY - 1}')) is not None
+    assert newest.get(key('answer 0')) is None
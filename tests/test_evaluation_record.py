@@ -0,0 +1,65 @@
+import sys
+
+import pytest
+
+from app import TEXT_PACK_MIN_CHARS, EvaluationRecord, InterviewState, ResponseRecord
+
+EVALUATION = {
+    'score': 7, 'raw_score': 7, 'technical_accuracy': 8, 'weighted_score': 10.5, 'max_possible': 15,
+    'difficulty': 4, 'topic': 'Lookup Functions',
+    'feedback': 'Correct use of an exact match.',
+    'suggestions': 'Mention XLOOKUP as well.',
+    'strengths': ['Exact match', 'Clear example'],
+    'areas_for_improvement': ['Error handling'],
+    'escalated': True
+}
+
+
+def test_round_trip_keeps_every_field():
+    record = EvaluationRecord.from_dict(EVALUATION)
+    assert record.to_dict() == EVALUATION
+
+
+def test_list_valued_text_fields_stay_lists():
+    record = EvaluationRecord.from_dict(EVALUATION)
+    assert record['strengths'] == ['Exact match', 'Clear example']
+    assert EvaluationRecord.from_dict(record.to_dict()).get('areas_for_improvement') == ['Error handling']
+
+
+def test_reads_like_the_evaluation_dict():
+    record = EvaluationRecord.from_dict({'score': 5, 'topic': 'Charts'})
+    assert record['score'] == 5
+    assert record.get('completeness', 0) == 0
+    assert record.get('feedback') == ''
+    assert 'escalated' not in record
+    with pytest.raises(KeyError):
+        record['escalated']
+    assert record.topic is sys.intern('Charts')
+
+
+def test_long_text_is_packed():
+    feedback = 'Detailed feedback. ' * TEXT_PACK_MIN_CHARS
+    record = EvaluationRecord.from_dict({'score': 6, 'feedback': feedback})
+    assert isinstance(record._text, bytes) and len(record._text) < len(feedback)
+    assert record['feedback'] == feedback
+
+
+def test_response_record_round_trip():
+    response = ResponseRecord('What does SUM do?', 'It adds numbers. ' * TEXT_PACK_MIN_CHARS)
+    restored = ResponseRecord.from_dict(response.to_dict())
+    assert restored.response == response.response
+    assert restored.timestamp == pytest.approx(response.timestamp)
+
+
+def test_interview_state_round_trip():
+    state = InterviewState()
+    state.candidate_name = 'Ada'
+    state.responses.append(ResponseRecord('What does VLOOKUP do?', 'Looks up a value'))
+    state.scores.append(EvaluationRecord.from_dict(EVALUATION))
+    state.report.add(EVALUATION)
+    state.current_question = 1
+
+    restored = InterviewState.from_dict(state.to_dict())
+    assert restored.to_dict() == state.to_dict()
+    assert restored.report.snapshot() == state.report.snapshot()
+    assert not hasattr(restored, '__dict__')
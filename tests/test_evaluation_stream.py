@@ -0,0 +1,72 @@
+import json
+import time
+import uuid
+
+from app import EvaluationStreamParser
+
+EVALUATION = {
+    'score': 8.5,
+    'technical_accuracy': 8,
+    'feedback': 'Good use of "$A$1"\nand a tab\there — café',
+    'communication_clarity': 9,
+    'strengths': 'Clear'
+}
+
+
+def feed_all(parser, text, size):
+    """Feed text in fixed-size chunks, collecting every update"""
+    updates = [parser.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return ''.join(u.get('text', '') for u in updates), [u['scores'] for u in updates if 'scores' in u]
+
+
+def test_text_and_scores_come_through_for_any_chunking():
+    text = json.dumps(EVALUATION)
+    for size in (1, 2, 3, 7, len(text)):
+        feedback, scores = feed_all(EvaluationStreamParser(), text, size)
+        assert feedback == EVALUATION['feedback']
+        merged = {field: value for update in scores for field, value in update.items()}
+        assert merged == {'score': 8.5, 'technical_accuracy': 8, 'communication_clarity': 9}
+
+
+def test_unicode_escape_split_across_chunks():
+    parser = EvaluationStreamParser()
+    assert parser.feed('{"feedback": "caf\\u00') == {'text': 'caf'}
+    assert parser.feed('e9 ok", ') == {'text': 'é ok'}
+
+
+def test_score_waits_for_its_terminator_and_is_reported_once():
+    parser = EvaluationStreamParser()
+    assert parser.feed('{"score": 8') == {}
+    assert parser.feed('.5,') == {'scores': {'score': 8.5}}
+    assert parser.feed(' "feedback": "Fine"}') == {'text': 'Fine'}
+    assert parser.feed('\n') == {}
+
+
+def test_fields_other_than_scores_are_ignored():
+    parser = EvaluationStreamParser()
+    assert parser.feed('{"weight": 10, "difficulty": 4, "suggestions": "More"}') == {}
+
+
+def test_feedback_is_streamed_before_the_next_question(connect, answer):
+    client = connect()
+    answer(client, through=0)
+    client.emit('submit_response', {
+        'response': f"VLOOKUP searches the first column for {uuid.uuid4().hex} and returns a matching value",
+        'question_number': 1
+    })
+    chunks = []
+    deadline = time.monotonic() + 10
+    next_question = None
+    while next_question is None and time.monotonic() < deadline:
+        for received in client.get_received():
+            if received['name'] == 'feedback_chunk':
+                chunks.append(received['args'][0])
+            elif received['name'] == 'next_question':
+                next_question = received['args'][0]
+        time.sleep(0.02)
+
+    assert next_question is not None
+    assert chunks and all(chunk['question_number'] == 1 for chunk in chunks)
+    assert ''.join(chunk.get('text', '') for chunk in chunks) == next_question['feedback']
+    scores = {field: value for chunk in chunks for field, value in chunk.get('scores', {}).items()}
+    assert scores['score'] == next_question['score']
@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+
+import pytest
+
+from app import EvaluationRecord, InterviewState
+
+
+def report(candidate, skill_level='intermediate'):
+    return {
+        'candidate_name': candidate,
+        'skill_level': skill_level,
+        'percentage': 70.0,
+        'proficiency_level': 'Intermediate',
+        'detailed_scores': [
+            {'topic': 'VLOOKUP', 'difficulty': 4, 'score': 7, 'feedback': 'Good'},
+            {'topic': 'Charts', 'difficulty': 3, 'score': 8, 'feedback': 'Clear, with "quotes"'}
+        ]
+    }
+
+
+@pytest.fixture
+def http(app):
+    return app.app.test_client()
+
+
+@pytest.fixture
+def stored(app):
+    """A candidate with two stored reports, named uniquely so other tests' reports don't match"""
+    candidate = f'Export {uuid.uuid4().hex[:8]}'
+    for skill_level in ('beginner', 'advanced'):
+        app.transcript_store.append(report(candidate, skill_level), f'{candidate}-{skill_level}')
+    app.transcript_store.flush(5)
+    return candidate
+
+
+def live_state(app, final_report=None):
+    state = InterviewState()
+    state.candidate_name = 'Live Candidate'
+    state.generated_questions = [{'question': 'What does SUM do?', 'topic': 'Basic Formulas', 'difficulty': 2, 'weight': 10}]
+    evaluation = {'score': 6, 'raw_score': 6, 'weighted_score': 6.0, 'max_possible': 10, 'topic': 'Basic Formulas',
+                  'difficulty': 2, 'feedback': 'Fine'}
+    state.scores.append(EvaluationRecord.from_dict(evaluation))
+    state.report.add(evaluation)
+    state.current_question = 1
+    state.final_report = final_report
+    app.interview_sessions.save(state.session_id, state)
+    return state
+
+
+def test_reports_export_as_ndjson_by_default(http, stored):
+    response = http.get(f'/export/reports?candidate={stored}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'excel-interview-reports.ndjson' in response.headers['Content-Disposition']
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['skill_level'] for line in lines] == ['beginner', 'advanced']
+
+
+def test_reports_export_as_a_json_array_with_filters(http, stored):
+    response = http.get(f'/export/reports?candidate={stored}&skill_level=advanced&format=json')
+    [only] = json.loads(response.get_data(as_text=True))
+    assert only['skill_level'] == 'advanced'
+    assert 'report_id' in only
+
+
+def test_reports_export_as_csv_one_row_per_question(http, stored):
+    response = http.get(f'/export/reports?candidate={stored}&format=csv')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 4
+    assert [row['question_number'] for row in rows] == ['1', '2', '1', '2']
+    assert rows[1]['feedback'] == 'Clear, with "quotes"'
+    assert rows[0]['candidate_name'] == stored
+
+
+def test_export_is_gzipped_when_accepted(http, stored):
+    response = http.get(f'/export/reports?candidate={stored}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(gzip.decompress(response.data).decode('utf-8').splitlines()) == 2
+
+
+def test_unknown_format_is_rejected(http):
+    assert http.get('/export/reports?format=xml').status_code == 400
+    assert http.get('/export/session/anything?format=xml').status_code == 400
+
+
+def test_session_export_from_the_store(http, stored):
+    response = http.get(f'/export/session/{stored}-advanced')
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True))['skill_level'] == 'advanced'
+
+
+def test_session_export_uses_the_finished_report_before_it_is_stored(app, http):
+    final_report = {**report('Live Candidate'), 'overall_feedback': 'Written by the model', 'recommendations': ['Practise']}
+    state = live_state(app, final_report)
+    exported = json.loads(http.get(f'/export/session/{state.session_id}').get_data(as_text=True))
+    assert exported == final_report
+
+
+def test_session_export_of_an_interview_in_progress(app, http):
+    state = live_state(app)
+    exported = json.loads(http.get(f'/export/session/{state.session_id}').get_data(as_text=True))
+    assert exported['candidate_name'] == 'Live Candidate'
+    assert exported['questions_answered'] == 1
+
+
+def test_unknown_session_is_not_found(http):
+    assert http.get(f'/export/session/{uuid.uuid4()}').status_code == 404
@@ -0,0 +1,82 @@
+import json
+import uuid
+
+import grade_batch
+
+
+def write_answers(path, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(1, count + 1):
+            f.write(json.dumps({
+                'id': f'a{n}',
+                'question': 'What does SUM do?',
+                # Distinct answers, so nothing comes from the caches
+                'response': f'SUM adds {uuid.uuid4().hex} and {uuid.uuid4().hex}',
+                'topic': 'Basic Formulas'
+            }) + '\n')
+
+
+def read_output(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def calls_to(app, monkeypatch, fail=False):
+    """Call types sent to the model; with fail, every call raises"""
+    calls = []
+    invoke = app.llm_metrics.invoke
+
+    def record(call_type, messages, *args, **kwargs):
+        calls.append(call_type)
+        if fail:
+            raise RuntimeError("model unavailable")
+        return invoke(call_type, messages, *args, **kwargs)
+
+    monkeypatch.setattr(app.llm_metrics, 'invoke', record)
+    return calls
+
+
+def test_grades_in_packs(app, tmp_path, monkeypatch):
+    answers, graded = tmp_path / 'answers.jsonl', tmp_path / 'graded.jsonl'
+    write_answers(answers, 5)
+    calls = calls_to(app, monkeypatch)
+
+    assert grade_batch.main([str(answers), str(graded), '--pack-size', '3', '--concurrency', '2']) == 0
+    results = read_output(graded)
+    assert sorted(record['id'] for record in results) == ['a1', 'a2', 'a3', 'a4', 'a5']
+    assert all(record['evaluation']['max_possible'] == 10 for record in results)
+    assert calls == ['evaluate_batch', 'evaluate_batch']
+
+
+def test_rerun_skips_answers_already_graded(app, tmp_path, monkeypatch):
+    answers, graded = tmp_path / 'answers.jsonl', tmp_path / 'graded.jsonl'
+    write_answers(answers, 3)
+    graded.write_text(json.dumps({'id': 'a1', 'evaluation': {'score': 7}}) + '\n{"id": "a2", "evalu')
+    calls = calls_to(app, monkeypatch)
+
+    assert grade_batch.main([str(answers), str(graded), '--pack-size', '5']) == 0
+    assert calls == ['evaluate_batch']
+    assert grade_batch.load_done_ids(str(graded)) == {'a1', 'a2', 'a3'}
+
+
+def test_fallback_scores_are_not_written_and_are_retried(app, tmp_path, monkeypatch):
+    answers, graded = tmp_path / 'answers.jsonl', tmp_path / 'graded.jsonl'
+    write_answers(answers, 2)
+    with monkeypatch.context() as patch:
+        calls_to(app, patch, fail=True)
+        assert grade_batch.main([str(answers), str(graded)]) == 1
+    assert read_output(graded) == []
+
+    assert grade_batch.main([str(answers), str(graded)]) == 0
+    results = read_output(graded)
+    assert sorted(record['id'] for record in results) == ['a1', 'a2']
+    assert not any(record['evaluation'].get('fallback') for record in results)
+
+
+def test_flagged_fallback_rows_are_not_counted_as_done(tmp_path):
+    graded = tmp_path / 'graded.jsonl'
+    graded.write_text(
+        json.dumps({'id': 'a1', 'evaluation': {'score': 6, 'fallback': True}}) + '\n' +
+        json.dumps({'id': 'a2', 'evaluation': {'score': 8}}) + '\n'
+    )
+    assert grade_batch.load_done_ids(str(graded)) == {'a2'}
@@ -0,0 +1,47 @@
+import pytest
+
+QUESTION = 'How would you use VLOOKUP to find a price?'
+TOPIC = 'Lookup Functions'
+
+
+def prescore(app, response, weight=10):
+    return app.interview_agent._prescore_response(QUESTION, response, TOPIC, 4, weight)
+
+
+@pytest.mark.parametrize('response, reason', [
+    ('', 'No response was given.'),
+    ('   ', 'No response was given.'),
+    ("I don’t know", "The response says the candidate doesn't know the answer."),
+    ('Honestly no idea, sorry', "The response says the candidate doesn't know the answer."),
+    ('Pass', "The response is too short and doesn't address the question."),
+])
+def test_non_answers_get_the_minimum_score(app, response, reason):
+    evaluation = prescore(app, response, weight=15)
+    assert evaluation['score'] == 1
+    assert evaluation['feedback'].startswith(reason)
+    assert evaluation['weighted_score'] == 1.5
+    assert evaluation['max_possible'] == 15
+    assert evaluation['topic'] == TOPIC
+
+
+@pytest.mark.parametrize('response', [
+    'VLOOKUP',
+    "I'm not sure, maybe VLOOKUP with an exact match?",
+    'I would search the first column of the table and return the matching value from the price column',
+])
+def test_real_attempts_go_to_the_model(app, response):
+    assert prescore(app, response) is None
+
+
+def test_non_answer_never_reaches_the_model(app, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the model was called")
+
+    monkeypatch.setattr(app.llm_metrics, 'invoke', fail)
+    evaluation = app.interview_agent.evaluate_response(QUESTION, 'no clue', TOPIC, 4, 10)
+    assert evaluation['score'] == 1
+
+
+def test_can_be_switched_off(app, monkeypatch):
+    monkeypatch.setattr(app, 'PRESCORE_ENABLED', False)
+    assert prescore(app, '') is None
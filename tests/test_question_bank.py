@@ -0,0 +1,82 @@
+import itertools
+import time
+
+from app import QuestionBank
+
+FALLBACK = [{'question': 'What does SUM do?', 'topic': 'Basic Formulas', 'difficulty': 2, 'weight': 10}]
+
+
+class StubAgent:
+    """Hands out a distinct one-question set per call, or whatever `sets` lists"""
+
+    def __init__(self, sets=None):
+        self.counter = itertools.count(1)
+        self.sets = iter(sets) if sets is not None else None
+        self.calls = 0
+
+    def generate_questions(self, skill_level, num_questions):
+        self.calls += 1
+        if self.sets is not None:
+            return next(self.sets, FALLBACK)
+        n = next(self.counter)
+        return [{'question': f'{skill_level} question {n}', 'topic': 'VLOOKUP', 'difficulty': 4, 'weight': 10}]
+
+    def _get_fallback_questions(self, skill_level):
+        return FALLBACK
+
+
+def bank(agent, size=2, ttl=60):
+    return QuestionBank(agent, size=size, ttl=ttl, num_questions=1)
+
+
+def wait_until_idle(bank):
+    deadline = time.monotonic() + 5
+    while bank._refilling and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_cold_pool_serves_the_fallback_and_refills():
+    question_bank = bank(StubAgent())
+    assert question_bank.take('beginner') == FALLBACK
+    wait_until_idle(question_bank)
+    assert len(question_bank._pools['beginner']) == 2
+    assert question_bank.take('beginner') == [
+        {'question': 'beginner question 1', 'topic': 'VLOOKUP', 'difficulty': 4, 'weight': 10}
+    ]
+
+
+def test_warm_fills_every_level_up_to_size():
+    question_bank = bank(StubAgent(), size=3)
+    question_bank.warm()
+    deadline = time.monotonic() + 5
+    while any(len(pool) < 3 for pool in question_bank._pools.values()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert {level: len(pool) for level, pool in question_bank._pools.items()} == {
+        'beginner': 3, 'intermediate': 3, 'advanced': 3
+    }
+
+
+def test_fallback_incomplete_and_repeated_sets_are_not_pooled():
+    valid = [{'question': 'What is XLOOKUP?', 'topic': 'Lookup', 'difficulty': 5, 'weight': 10}]
+    repeat = [{'question': 'what is  XLOOKUP', 'topic': 'Lookup', 'difficulty': 5, 'weight': 10}]
+    incomplete = [{'question': 'Name a chart type', 'topic': 'Charts'}]
+    question_bank = bank(StubAgent(sets=[FALLBACK, incomplete, valid, repeat]))
+    question_bank._schedule_refill('advanced')
+    wait_until_idle(question_bank)
+    assert [questions for _, questions in question_bank._pools['advanced']] == [valid]
+
+
+def test_expired_sets_are_dropped():
+    question_bank = bank(StubAgent(), size=1, ttl=0)
+    stale = [{'question': 'Stale question', 'topic': 'Charts', 'difficulty': 3, 'weight': 10}]
+    question_bank._pools['beginner'].append((time.monotonic() - 1, stale))
+    assert question_bank.take('beginner') == FALLBACK
+
+
+def test_size_zero_disables_the_bank():
+    agent = StubAgent()
+    question_bank = bank(agent, size=0)
+    question_bank.warm()
+    assert question_bank.take('beginner') is None
+    assert question_bank.take('expert') is None
+    assert agent.calls == 0
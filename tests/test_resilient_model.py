@@ -0,0 +1,131 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from app import PriorityTokenBucket, ResilientModel
+
+PROMPT = [SimpleNamespace(content="Generate 5 Excel interview questions for beginner")]
+
+
+class StubModel:
+    """Answers after a delay, raising the queued errors first"""
+
+    def __init__(self, delay=0.0, errors=()):
+        self.delay = delay
+        self.errors = list(errors)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            error = self.errors.pop(0) if self.errors else None
+        time.sleep(self.delay)
+        if error:
+            raise error
+        return SimpleNamespace(content=f"reply to {messages[-1].content}")
+
+    def stream(self, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            error = self.errors.pop(0) if self.errors else None
+        yield SimpleNamespace(content="first ")
+        if error:
+            raise error
+        yield SimpleNamespace(content="second")
+
+
+def resilient(inner, max_retries=2, rate=0.0):
+    return ResilientModel(inner, PriorityTokenBucket(rate, burst=1), max_retries=max_retries, base_delay=0.01)
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = PriorityTokenBucket(0, burst=1)
+    assert [bucket.acquire(1) for _ in range(100)] == [0.0] * 100
+
+
+def test_waiters_are_served_by_priority():
+    bucket = PriorityTokenBucket(20, burst=1)
+    bucket.acquire(0)
+    order = []
+
+    def take(priority):
+        bucket.acquire(priority)
+        order.append(priority)
+
+    threads = []
+    for priority in (3, 1, 0):
+        threads.append(threading.Thread(target=take, args=(priority,)))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(5)
+    assert order == [0, 1, 3]
+
+
+def test_identical_prompts_in_flight_share_one_call():
+    inner = StubModel(delay=0.2)
+    model = resilient(inner)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        replies = list(pool.map(lambda _: model.invoke(PROMPT), range(5)))
+    assert inner.calls == 1
+    assert model.stats()['coalesced'] == 4
+    assert {reply.content for reply in replies} == {f"reply to {PROMPT[0].content}"}
+
+    model.invoke([SimpleNamespace(content="Another prompt")])
+    assert inner.calls == 2
+
+
+def test_coalesced_callers_share_the_error():
+    model = resilient(StubModel(delay=0.2, errors=[ValueError("bad request")]))
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(model.invoke, PROMPT) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+
+
+def test_transient_errors_are_retried():
+    inner = StubModel(errors=[ConnectionError("reset"), TimeoutError("slow")])
+    model = resilient(inner, max_retries=2)
+    assert model.invoke(PROMPT).content.startswith("reply to")
+    assert inner.calls == 3
+    assert model.stats()['retries'] == 2
+
+
+def test_gives_up_after_max_retries():
+    inner = StubModel(errors=[ConnectionError("reset")] * 3)
+    with pytest.raises(ConnectionError):
+        resilient(inner, max_retries=2).invoke(PROMPT)
+    assert inner.calls == 3
+
+
+def test_bad_arguments_are_not_retried():
+    inner = StubModel(errors=[ValueError("invalid argument")])
+    with pytest.raises(ValueError):
+        resilient(inner).invoke(PROMPT)
+    assert inner.calls == 1
+
+
+def test_stream_is_not_retried_once_chunks_were_sent():
+    inner = StubModel(errors=[ConnectionError("reset")])
+    chunks = []
+    with pytest.raises(ConnectionError):
+        for chunk in resilient(inner).stream(PROMPT):
+            chunks.append(chunk.content)
+    assert chunks == ["first "]
+    assert inner.calls == 1
+
+
+def test_gemini_client_retries_are_turned_off(app, monkeypatch):
+    built = {}
+    module = ModuleType('langchain_google_genai')
+    module.ChatGoogleGenerativeAI = lambda **kwargs: built.update(kwargs)
+    monkeypatch.setitem(sys.modules, 'langchain_google_genai', module)
+    monkeypatch.setattr(app, 'LLM_BACKEND', 'gemini')
+    app.create_model('gemini-2.0-flash', 0.3, 1024)
+    assert built['max_retries'] == 0
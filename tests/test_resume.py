@@ -0,0 +1,100 @@
+"""Reconnecting to an interview with the token from interview_started"""
+import time
+
+import pytest
+
+from app import SqliteSessionStore
+from conftest import received_events, wait_for
+
+
+def test_resume_mid_interview_replays_progress(connect, answer):
+    client = connect()
+    started = answer(client, through=1)
+    client.disconnect()
+
+    resumed = connect()
+    resumed.emit('resume_interview', {'token': started['token']})
+    state = wait_for(resumed, 'interview_resumed')
+    assert state['question_number'] == 2
+    assert [score['question_number'] for score in state['scores']] == [1]
+    assert state['progress']['questions_answered'] == 1
+
+    resumed.emit('submit_response', {'response': 'I would use SUMIF with a criteria range', 'question_number': 2})
+    assert wait_for(resumed, 'next_question')['question_number'] == 3
+
+
+def test_unknown_token_fails_to_resume(connect):
+    client = connect()
+    client.emit('resume_interview', {'token': 'no-such-interview'})
+    assert 'expired' in wait_for(client, 'resume_failed')['message']
+
+
+def test_resume_on_a_socket_with_another_interview_releases_it(app, connect, answer):
+    away = connect()
+    resumable = answer(away, through=1)
+    away.disconnect()
+
+    client = connect()
+    abandoned = answer(client, through=0)
+    client.emit('resume_interview', {'token': resumable['token']})
+    wait_for(client, 'interview_resumed')
+    assert app.interview_sessions.get(abandoned['token']) is None
+
+    client.emit('submit_response', {'response': 'A Pivot Table summarizes by region', 'question_number': 2})
+    assert wait_for(client, 'next_question')['question_number'] == 3
+    assert 'error' not in received_events(client)
+
+
+@pytest.fixture
+def persistent_sessions(app, tmp_path, monkeypatch):
+    store = SqliteSessionStore(str(tmp_path / 'sessions.db'), max_sessions=100, idle_ttl=60)
+    monkeypatch.setattr(app, 'interview_sessions', store)
+    return store
+
+
+def test_connected_socket_keeps_its_interview_after_eviction(connect, answer, persistent_sessions):
+    client = connect()
+    answer(client, through=1)
+    # What the LRU does under memory pressure; the next lookup reloads from SQLite without the socket
+    persistent_sessions._sessions.clear()
+
+    client.emit('submit_response', {'response': 'Conditional formatting with a formula rule', 'question_number': 2})
+    assert wait_for(client, 'next_question')['question_number'] == 3
+
+
+def test_resume_while_narrative_is_pending_gets_the_narrative(connect, answer):
+    client = connect()
+    started = answer(client, through=1)
+    client.emit('end_interview')
+    complete = wait_for(client, 'interview_complete')
+    assert complete['report']['narrative_pending']
+
+    client.disconnect()
+    resumed = connect()
+    resumed.emit('resume_interview', {'token': started['token']})
+    again = wait_for(resumed, 'interview_complete')
+    assert again['report']['questions_answered'] == 1
+    narrative = wait_for(resumed, 'report_narrative')
+    assert narrative['overall_feedback']
+    assert narrative['recommendations']
+
+
+def test_resume_after_narrative_was_sent_while_away(app, connect, answer):
+    client = connect()
+    started = answer(client, through=1)
+    client.emit('end_interview')
+    wait_for(client, 'interview_complete')
+    client.disconnect()
+
+    # Kept while the narrative is written, even though nobody is connected to receive it
+    state = app.interview_sessions.get(started['token'])
+    assert state is not None
+    deadline = time.monotonic() + 10
+    while state.final_report is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    resumed = connect()
+    resumed.emit('resume_interview', {'token': started['token']})
+    report = wait_for(resumed, 'interview_complete')['report']
+    assert not report.get('narrative_pending')
+    assert report['overall_feedback']
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from app import EvaluationRecord, InterviewState, RedisSessionStore, ResponseRecord, SessionStore, SqliteSessionStore
+from benchmark import StandInBroker
+
+
+def make_state(name='Ada') -> InterviewState:
+    state = InterviewState()
+    state.candidate_name = name
+    state.is_active = True
+    state.generated_questions = [{'question': 'What does SUM do?', 'topic': 'Basic Formulas', 'difficulty': 2, 'weight': 10}]
+    state.responses.append(ResponseRecord('What does SUM do?', 'It adds the numbers in a range'))
+    evaluation = {'score': 8, 'raw_score': 8, 'weighted_score': 8.0, 'max_possible': 10, 'topic': 'Basic Formulas',
+                  'difficulty': 2, 'feedback': 'Correct.'}
+    state.scores.append(EvaluationRecord.from_dict(evaluation))
+    state.report.add(evaluation)
+    state.current_question = 1
+    return state
+
+
+@pytest.fixture
+def broker():
+    broker = StandInBroker()
+    yield broker
+    broker.close()
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(max_sessions=2, idle_ttl=60)
+    a, b, c = make_state(), make_state(), make_state()
+    store[a.session_id] = a
+    store[b.session_id] = b
+    assert store.get(a.session_id) is a
+    store[c.session_id] = c
+    assert b.session_id not in store
+    assert store[a.session_id] is a and store[c.session_id] is c
+    assert len(store) == 2
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(max_sessions=10, idle_ttl=0.05)
+    state = make_state()
+    store.save(state.session_id, state)
+    time.sleep(0.1)
+    assert store.get(state.session_id) is None
+    assert len(store) == 0
+
+
+def test_dict_style_access():
+    store = SessionStore(max_sessions=10, idle_ttl=60)
+    state = make_state()
+    store[state.session_id] = state
+    del store[state.session_id]
+    with pytest.raises(KeyError):
+        store[state.session_id]
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    state = make_state()
+    SqliteSessionStore(path, max_sessions=10, idle_ttl=60).save(state.session_id, state)
+
+    loaded = SqliteSessionStore(path, max_sessions=10, idle_ttl=60).get(state.session_id)
+    assert loaded is not state
+    assert loaded.to_dict() == state.to_dict()
+    assert loaded.report.snapshot() == state.report.snapshot()
+
+
+def test_sqlite_store_reloads_an_evicted_session_and_deletes(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / 'sessions.db'), max_sessions=1, idle_ttl=60)
+    first, second = make_state('First'), make_state('Second')
+    store.save(first.session_id, first)
+    store.save(second.session_id, second)
+    # Only one row is kept on disk as well as in memory
+    assert store.get(first.session_id) is None
+    assert store.get(second.session_id).candidate_name == 'Second'
+
+    store.delete(second.session_id)
+    assert SqliteSessionStore(store.path, max_sessions=1, idle_ttl=60).get(second.session_id) is None
+
+
+def test_redis_store_is_shared_between_instances(broker):
+    state = make_state()
+    RedisSessionStore(broker.url, max_sessions=10, idle_ttl=60).save(state.session_id, state)
+
+    other = RedisSessionStore(broker.url, max_sessions=10, idle_ttl=60)
+    assert other.get(state.session_id).to_dict() == state.to_dict()
+    other.delete(state.session_id)
+    assert RedisSessionStore(broker.url, max_sessions=10, idle_ttl=60).get(state.session_id) is None
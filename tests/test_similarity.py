@@ -0,0 +1,114 @@
+import pytest
+
+from similarity import AnswerIndex, is_typo_of, normalize, question_key, replay, same_wording
+
+KEY = question_key('How does VLOOKUP find a value?', 'Lookup Functions', 4)
+ANSWER = "VLOOKUP searches the first column of the table for the value and returns the matching cell from the column you give it."
+
+
+def evaluation(score, feedback='Accurate'):
+    return {'score': score, 'technical_accuracy': score, 'feedback': feedback}
+
+
+def words(text):
+    return tuple(normalize(text).split())
+
+
+@pytest.fixture
+def index():
+    index = AnswerIndex(threshold=0.9)
+    index.add(KEY, ANSWER, evaluation(9))
+    return index
+
+
+def test_reworded_punctuation_case_and_typo_reuse_the_evaluation(index):
+    reused = index.match(KEY, ANSWER.upper().replace('searches', 'serches').replace('.', '!') + ' ')
+    assert reused['score'] == 9
+    assert reused['feedback'] == 'Accurate'
+    assert reused['similar_answer'] >= 0.9
+    assert index.stats()['hits'] == 1
+
+
+def test_swapped_key_terms_are_not_reused(index):
+    swapped = ANSWER.replace('first column', 'TMP').replace('matching cell', 'first column').replace('TMP', 'matching cell')
+    assert index.match(KEY, swapped) is None
+
+
+@pytest.mark.parametrize('change', [('VLOOKUP', 'HLOOKUP'), ('first', 'last'), ('returns', 'does not return')])
+def test_changed_terms_are_not_reused(index, change):
+    assert index.match(KEY, ANSWER.replace(*change)) is None
+
+
+def test_other_questions_are_not_matched(index):
+    assert index.match(question_key('What does SUM do?', 'Basic Formulas', 2), ANSWER) is None
+
+
+def test_scores_are_averaged_over_close_answers():
+    index = AnswerIndex(threshold=0.9)
+    index.add(KEY, ANSWER, evaluation(9, 'First'))
+    index.add(KEY, ANSWER.replace('searches', 'serches'), evaluation(7, 'Second'))
+    reused = index.match(KEY, ANSWER)
+    assert reused['score'] == 8
+    assert reused['similar_answers'] == 2
+    assert reused['feedback'] == 'First'
+
+
+def test_oldest_answers_and_questions_are_dropped():
+    index = AnswerIndex(threshold=0.9, max_per_question=2, max_questions=2)
+    for n in range(3):
+        index.add(KEY, f'{ANSWER} Example {n}', evaluation(n))
+    assert index.match(KEY, f'{ANSWER} Example 0') is None
+    index.add('other question', ANSWER, evaluation(5))
+    index.add('third question', ANSWER, evaluation(5))
+    assert index.stats()['questions'] == 2
+    assert index.match(KEY, f'{ANSWER} Example 2') is None
+
+
+@pytest.mark.parametrize('a, b, typo', [
+    ('searches', 'serches', True),
+    ('column', 'colunm', True),
+    ('returns', 'retruns', True),
+    ('vlookup', 'hlookup', False),
+    ('sumif', 'sumifs', False),
+    ('a$1', 'a$2', False),
+    ('row', 'rwo', False),
+    ('first', 'final', False),
+])
+def test_typos(a, b, typo):
+    assert is_typo_of(a, b) is typo
+
+
+def test_same_wording_needs_the_same_order():
+    assert same_wording(words('Use INDEX then MATCH'), words('use index, then match!'))
+    assert not same_wording(words('Use INDEX then MATCH'), words('Use MATCH then INDEX'))
+    assert not same_wording(words('Use INDEX then MATCH'), words('Use INDEX and then MATCH'))
+
+
+def test_replay_counts_reuse_and_error():
+    answers = [
+        {'question': 'Q', 'topic': 'T', 'difficulty': 1, 'response': ANSWER, 'score': 9},
+        {'question': 'Q', 'topic': 'T', 'difficulty': 1, 'response': ANSWER.replace('searches', 'serches'), 'score': 8},
+        {'question': 'Q', 'topic': 'T', 'difficulty': 1, 'response': 'Something else entirely', 'score': 2},
+    ]
+    row = replay(answers, threshold=0.9)
+    assert (row['reused'], row['mean_abs_error']) == (1, 1.0)
+
+
+def test_reuse_is_off_by_default(app):
+    assert app.SIMILAR_ANSWER_THRESHOLD == 0
+    assert app.get_answer_index() is None
+
+
+def test_agent_reuses_a_near_duplicate_without_the_model(app, monkeypatch):
+    monkeypatch.setattr(app, 'answer_index', AnswerIndex(threshold=0.9))
+    question, topic = 'How does VLOOKUP find a value?', 'Lookup Functions'
+    app.interview_agent._remember_answer(question, ANSWER, topic, 4, {**evaluation(9), 'weighted_score': 13.5, 'max_possible': 15})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the model was called")
+
+    monkeypatch.setattr(app.llm_metrics, 'invoke', fail)
+    reused = app.interview_agent.evaluate_response(question, ANSWER.replace('column', 'colunm', 1), topic, 4, 10)
+    assert reused['score'] == 9
+    assert reused['max_possible'] == 10
+    assert reused['similar_answer'] >= 0.9
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import EVALUATION_SCHEMA, NUMBER, QUESTION_SCHEMA, StructuredOutputError, StructuredOutputParser, find_json
+
+MESSAGES = [SimpleNamespace(content="Evaluate this answer")]
+
+
+def repair_reply(app, monkeypatch, content):
+    """Make the repair call answer with content; returns the call types made"""
+    calls = []
+
+    def invoke(call_type, messages):
+        calls.append((call_type, len(messages)))
+        if isinstance(content, Exception):
+            raise content
+        return SimpleNamespace(content=content)
+
+    monkeypatch.setattr(app.llm_metrics, 'invoke', invoke)
+    return calls
+
+
+def test_skips_leading_fragment_that_does_not_fit_the_schema():
+    assert find_json('Intro (see [1]) then [{"a": 1}] end', list, {'a': NUMBER}) == [{'a': 1}]
+
+
+def test_skips_fragment_of_the_wrong_item_type():
+    assert find_json('Rated [8] overall: ["Practice VLOOKUP", "Learn INDEX/MATCH"]', list, str) == [
+        "Practice VLOOKUP", "Learn INDEX/MATCH"
+    ]
+
+
+def test_ignores_brackets_inside_strings():
+    text = 'Here you go: {"question": "What does =SUM(A1:A3) return if A2 is \\"}\\"?", ' \
+           '"topic": "Basic Formulas", "difficulty": "3", "weight": 10}'
+    question = find_json(text, dict, QUESTION_SCHEMA)
+    assert question['topic'] == 'Basic Formulas'
+    # Numeric strings are converted in place
+    assert question['difficulty'] == 3
+
+
+def test_reports_the_schema_mismatch_when_nothing_fits():
+    with pytest.raises(StructuredOutputError, match="item 0 is not a str"):
+        find_json('see [1] and [2]', list, str)
+
+
+def test_no_json_at_all():
+    with pytest.raises(StructuredOutputError, match="no valid JSON dict"):
+        find_json('I cannot evaluate this response.', dict)
+
+
+def test_fenced_json_is_found():
+    assert find_json('```json\n{"score": 7, "feedback": "Good"}\n```', dict, EVALUATION_SCHEMA) == {
+        'score': 7, 'feedback': 'Good'
+    }
+
+
+def test_valid_reply_needs_no_repair(app, monkeypatch):
+    calls = repair_reply(app, monkeypatch, '{}')
+    parser = StructuredOutputParser()
+    assert parser.parse('evaluate', '{"score": 7, "feedback": "Good"}', schema=EVALUATION_SCHEMA, messages=MESSAGES)
+    assert calls == []
+    assert parser.stats() == {'evaluate': {'success': 1, 'repaired': 0, 'failure': 0, 'success_rate': 1.0}}
+
+
+def test_bad_reply_is_repaired_once(app, monkeypatch):
+    calls = repair_reply(app, monkeypatch, '{"score": 6, "feedback": "Fixed"}')
+    parser = StructuredOutputParser()
+    data = parser.parse('evaluate', '{"score": "high"}', schema=EVALUATION_SCHEMA, messages=MESSAGES)
+    assert data == {'score': 6, 'feedback': 'Fixed'}
+    # The original prompt, the bad reply and the correction request
+    assert calls == [('repair', 3)]
+    assert parser.stats()['evaluate']['repaired'] == 1
+
+
+@pytest.mark.parametrize('reply', ['still not JSON', RuntimeError('model unavailable')])
+def test_failed_repair_raises(app, monkeypatch, reply):
+    repair_reply(app, monkeypatch, reply)
+    parser = StructuredOutputParser()
+    with pytest.raises(StructuredOutputError, match="evaluate: .*repair failed"):
+        parser.parse('evaluate', 'no JSON here', schema=EVALUATION_SCHEMA, messages=MESSAGES)
+    assert parser.stats() == {'evaluate': {'success': 0, 'repaired': 0, 'failure': 1, 'success_rate': 0.0}}
+
+
+def test_no_repair_without_the_original_messages(app, monkeypatch):
+    calls = repair_reply(app, monkeypatch, '{"score": 6, "feedback": "Fixed"}')
+    with pytest.raises(StructuredOutputError):
+        StructuredOutputParser().parse('evaluate', 'no JSON here', schema=EVALUATION_SCHEMA)
+    assert calls == []
@@ -0,0 +1,81 @@
+from app import TranscriptStore
+
+
+def report(candidate, skill_level='beginner', percentage=60.0, topic='Charts', score=6):
+    return {
+        'candidate_name': candidate,
+        'skill_level': skill_level,
+        'percentage': percentage,
+        'detailed_scores': [{'topic': topic, 'difficulty': 3, 'score': score}]
+    }
+
+
+def test_opens_on_first_use(tmp_path):
+    path = tmp_path / 'transcripts.db'
+    store = TranscriptStore(str(path), batch_size=10, flush_interval=0.1)
+    assert not path.exists()
+    assert store.enabled
+    assert path.exists()
+
+
+def test_unopenable_path_disables_the_store(tmp_path):
+    store = TranscriptStore(str(tmp_path / 'missing' / 'transcripts.db'), batch_size=10, flush_interval=0.1)
+    assert not store.enabled
+    store.append(report('a'), 'session')
+    store.flush(1)
+
+
+def test_report_is_stored_once_per_session(tmp_path):
+    store = TranscriptStore(str(tmp_path / 'transcripts.db'), batch_size=10, flush_interval=0.1)
+    store.append(report('a'), 'session-1')
+    store.append(report('a'), 'session-1')
+    store.flush(5)
+    store.append(report('a'), 'session-1')
+    store.append(report('b'), None)
+    store.append(report('b'), None)
+    store.flush(5)
+
+    assert len(store.list_reports()) == 3
+    assert store.topic_averages() == [{'topic': 'Charts', 'difficulty': 3, 'answers': 3, 'average_score': 6.0}]
+    assert store.daily_averages()[0]['reports'] == 3
+
+
+def test_session_index_is_unique(tmp_path):
+    store = TranscriptStore(str(tmp_path / 'transcripts.db'), batch_size=10, flush_interval=0.1)
+    assert store.enabled
+    indexes = store._connect().execute("PRAGMA index_list(reports)").fetchall()
+    # (seq, name, unique, origin, partial)
+    assert [(name, unique) for _, name, unique, *_ in indexes if 'session' in name] == [('idx_reports_session', 1)]
+
+
+def test_reports_are_listed_filtered_and_read_back(tmp_path):
+    store = TranscriptStore(str(tmp_path / 'transcripts.db'), batch_size=10, flush_interval=0.1)
+    store.append(report('Ada', 'advanced', 90.0, 'Pivot Tables', 9), 'session-ada')
+    store.append(report('Bob', 'beginner', 40.0, 'Charts', 4), 'session-bob')
+    store.append({'error': 'generation failed'}, 'session-failed')
+    store.flush(5)
+
+    assert [row['candidate_name'] for row in store.list_reports()] == ['Bob', 'Ada']
+    assert [row['candidate_name'] for row in store.list_reports(skill_level='advanced')] == ['Ada']
+    assert [row['candidate_name'] for row in store.list_reports(topic='Charts')] == ['Bob']
+    assert store.list_reports(limit=1, offset=1)[0]['candidate_name'] == 'Ada'
+
+    ada = store.get_session_report('session-ada')
+    assert ada['percentage'] == 90.0
+    assert store.get_report(ada['report_id'])['candidate_name'] == 'Ada'
+    assert store.get_session_report('session-failed') is None
+    assert [r['candidate_name'] for r in store.iter_reports(chunk_size=1)] == ['Ada', 'Bob']
+
+
+def test_summaries_by_skill_level(tmp_path):
+    store = TranscriptStore(str(tmp_path / 'transcripts.db'), batch_size=10, flush_interval=0.1)
+    store.append(report('Ada', 'advanced', 90.0, 'Charts', 9))
+    store.append(report('Bob', 'beginner', 40.0, 'Charts', 4))
+    store.flush(5)
+
+    assert store.topic_averages() == [{'topic': 'Charts', 'difficulty': 3, 'answers': 2, 'average_score': 6.5}]
+    assert store.topic_averages('advanced')[0]['average_score'] == 9.0
+    [day] = store.daily_averages()
+    assert (day['reports'], day['average_percentage']) == (2, 65.0)
+    assert store.daily_averages(skill_level='beginner')[0]['average_percentage'] == 40.0
+    assert store.daily_averages(since='2999-01-01') == []